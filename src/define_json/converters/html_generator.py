@@ -14,7 +14,13 @@ Example usage:
     generator = DefineHTMLGenerator()
     
     # Convert Define-JSON directly to HTML
-    generator.json_to_htm(
+    generator.json_to_html(
+        Path("study_define.json"),
+        Path("study_define.html")
+    )
+    
+    # Or render natively, without XML or XSLT (fast for large defines)
+    generator.json_to_native_html(
         Path("study_define.json"),
         Path("study_define.html")
     )
@@ -24,13 +30,24 @@ Example usage:
         Path("study_define.xml"),
         Path("study_define.html")
     )
+
+    # Convert a directory of Define-JSON files on a process pool
+    generator.batch_convert(Path("defines"), Path("html"), max_workers=4)
+
+Compiled stylesheets are cached per path and modification time, so only the
+first transformation in a process pays for parsing and compiling the XSL.
+json_to_html() hands the generated XML to the transform in memory; no
+intermediate file is written unless one is asked for.
 """
 
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any, Union
-import tempfile
+from typing import TYPE_CHECKING, Optional, Dict, Any, Union
+import os
 import logging
 import json
+import time
 from datetime import datetime
 
 # Import the high-fidelity converter
@@ -50,8 +67,37 @@ except ImportError:
     LXML_AVAILABLE = False
     etree = None
 
+if TYPE_CHECKING:  # pragma: no cover
+    from ..utils.mdv_index import MDVIndex
+
 logger = logging.getLogger(__name__)
 
+XSLT_CACHE_SIZE = 8
+
+
+def compiled_xslt(xsl_path: Union[Path, str]) -> "etree.XSLT":
+    """
+    Compiled XSL transformation for a stylesheet, cached per path and mtime.
+
+    Editing the stylesheet invalidates its entry; parse errors are raised
+    (etree.XSLTParseError / etree.XMLSyntaxError) and not cached.
+    """
+    resolved = Path(xsl_path).resolve()
+    stat = resolved.stat()
+    return _compile_xslt(str(resolved), stat.st_mtime_ns, stat.st_size)
+
+
+def clear_xslt_cache() -> None:
+    """Drop every compiled stylesheet held by this process."""
+    _compile_xslt.cache_clear()
+
+
+@lru_cache(maxsize=XSLT_CACHE_SIZE)
+def _compile_xslt(path: str, mtime_ns: int, size: int) -> "etree.XSLT":
+    """Parse and compile one version of a stylesheet; the arguments are the cache key."""
+    logger.info(f"Compiling XSL stylesheet: {path}")
+    return etree.XSLT(etree.parse(path))
+
 
 class DefineHTMLGenerator:
     """
@@ -117,15 +163,16 @@ class DefineHTMLGenerator:
             json_path: Path to input Define-JSON file
             output_path: Path for output HTML file
             xsl_path: Optional path to XSL stylesheet (uses default if not provided)
-            keep_temp_xml: If True, keeps the intermediate XML file
-            temp_xml_path: Optional specific path for intermediate XML
+            keep_temp_xml: If True, also writes the intermediate XML next to the
+                          HTML for debugging (by default it stays in memory)
+            temp_xml_path: Optional specific path to write the intermediate XML to
             
         Returns:
             Dictionary with conversion results:
             {
                 'success': bool,
                 'html_path': Path to output HTML (if successful),
-                'xml_path': Path to intermediate XML (if kept),
+                'xml_path': Path to intermediate XML (if written),
                 'errors': List of error messages (if any),
                 'warnings': List of warning messages (if any)
             }
@@ -167,38 +214,35 @@ class DefineHTMLGenerator:
             result['errors'].append(f"JSON file not found: {json_path}")
             return result
             
-        try:
-            # Determine XML output path
-            if temp_xml_path:
-                xml_path = Path(temp_xml_path)
-                delete_xml = False
-            elif keep_temp_xml:
-                xml_path = output_path.with_suffix('.xml')
-                delete_xml = False
-            else:
-                # Create temporary file
-                with tempfile.NamedTemporaryFile(
-                    mode='w', suffix='.xml', delete=False
-                ) as tmp_xml:
-                    xml_path = Path(tmp_xml.name)
-                delete_xml = True
+        # Intermediate XML is only written when asked for (for debugging)
+        if temp_xml_path:
+            xml_path = Path(temp_xml_path)
+        elif keep_temp_xml:
+            xml_path = output_path.with_suffix('.xml')
+        else:
+            xml_path = None
             
-            # Step 1: Generate high-fidelity XML
+        try:
+            # Step 1: Generate high-fidelity XML, in memory
             logger.info(f"Converting {json_path} to XML...")
             try:
-                self.converter.convert_file(json_path, xml_path)
-                logger.info(f"XML generated at: {xml_path}")
-                if keep_temp_xml:
+                with open(json_path, 'r') as f:
+                    json_data = json.load(f)
+                xml_text = self.converter.to_xml_string(self.converter.convert(json_data))
+                if xml_path:
+                    xml_path.parent.mkdir(parents=True, exist_ok=True)
+                    with open(xml_path, 'w', encoding='utf-8') as f:
+                        f.write(xml_text)
+                    logger.info(f"XML written to: {xml_path}")
                     result['xml_path'] = xml_path
+                xml_doc = etree.fromstring(xml_text.encode('utf-8')).getroottree()
             except Exception as e:
                 result['errors'].append(f"XML conversion failed: {str(e)}")
-                if delete_xml and xml_path.exists():
-                    xml_path.unlink()
                 return result
             
             # Step 2: Apply XSL transformation
             logger.info(f"Applying XSL transformation...")
-            html_result = self.xml_to_html(xml_path, output_path, xsl_path)
+            html_result = self._transform(xml_doc, output_path, xsl_path)
             
             if html_result['success']:
                 result['success'] = True
@@ -206,10 +250,7 @@ class DefineHTMLGenerator:
                 logger.info(f"HTML generated successfully at: {output_path}")
             else:
                 result['errors'].extend(html_result.get('errors', []))
-                
-            # Clean up temporary XML if needed
-            if delete_xml and xml_path.exists():
-                xml_path.unlink()
+            result['warnings'].extend(html_result.get('warnings', []))
                 
         except Exception as e:
             result['errors'].append(f"Unexpected error during HTML generation: {str(e)}")
@@ -217,6 +258,65 @@ class DefineHTMLGenerator:
             
         return result
     
+    def json_to_native_html(self,
+                            json_path: Union[Path, str],
+                            output_path: Union[Path, str],
+                            split: bool = False,
+                            search: bool = True) -> Dict[str, Any]:
+        """
+        Convert Define-JSON to HTML with the native renderer (no XML, no XSLT).
+        
+        The page is written section by section from an OID index of the
+        document, so large defines render in a fraction of the XSLT time.
+        lxml is not required.
+        
+        Args:
+            json_path: Path to input Define-JSON file
+            output_path: Path for output HTML file
+            split: If True, write a small index page that loads each dataset,
+                   codelist group and analysis display on demand from
+                   ``<output stem>_parts/``; unchanged parts are not rewritten
+            search: If True, write a search index beside the page (or into
+                    the parts directory) and add a search box to the page
+            
+        Returns:
+            Dictionary with 'success', 'html_path' (if successful), 'errors'
+            and 'warnings', as for json_to_html(); split output adds
+            'parts_dir', 'parts', 'written' and 'unchanged', and search
+            adds 'search_path'
+        """
+        result = {
+            'success': False,
+            'errors': [],
+            'warnings': []
+        }
+        
+        json_path = Path(json_path)
+        output_path = Path(output_path)
+        if not json_path.exists():
+            result['errors'].append(f"JSON file not found: {json_path}")
+            return result
+            
+        # Imported here: define_json.utils imports this module via its CLI
+        from .html_renderer import DefineHTMLRenderer
+        try:
+            logger.info(f"Rendering {json_path} to HTML...")
+            renderer = DefineHTMLRenderer.from_file(json_path)
+            if split:
+                result.update(renderer.render_split(output_path, search=search))
+            else:
+                renderer.render_file(output_path, search=search)
+                if search:
+                    result['search_path'] = output_path.with_name(f"{output_path.stem}.search.js")
+            result['success'] = True
+            result['html_path'] = output_path
+            logger.info(f"HTML generated successfully at: {output_path}")
+        except Exception as e:
+            result['errors'].append(f"Native HTML rendering failed: {str(e)}")
+            logger.error(f"Native HTML rendering failed: {e}", exc_info=True)
+            
+        return result
+    
     def xml_to_html(self, 
                    xml_path: Union[Path, str], 
                    output_path: Union[Path, str], 
@@ -278,13 +378,34 @@ class DefineHTMLGenerator:
             # Load XML document
             logger.info(f"Loading XML from: {xml_path}")
             xml_doc = etree.parse(str(xml_path))
+        except etree.XMLSyntaxError as e:
+            result['errors'].append(f"XML syntax error: {str(e)}")
+            logger.error(f"XML syntax error: {e}")
+            return result
             
-            # Load XSL stylesheet
+        return self._transform(xml_doc, output_path, xsl_path, parameters)
+    
+    def _transform(self,
+                   xml_doc: "etree._ElementTree",
+                   output_path: Path,
+                   xsl_path: Path,
+                   parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Apply the cached XSL transform to a parsed document and write the HTML.
+        
+        Returns the same result dictionary as xml_to_html().
+        """
+        result = {
+            'success': False,
+            'errors': [],
+            'warnings': [],
+            'xsl_messages': []
+        }
+        
+        try:
+            # Compiled XSL stylesheet (cached per path and mtime)
             logger.info(f"Loading XSL from: {xsl_path}")
-            xsl_doc = etree.parse(str(xsl_path))
-            
-            # Create transformer with error handling
-            transform = etree.XSLT(xsl_doc)
+            transform = compiled_xslt(xsl_path)
             
             # Apply transformation with optional parameters
             logger.info("Applying XSL transformation...")
@@ -314,17 +435,17 @@ class DefineHTMLGenerator:
                     else:
                         result['xsl_messages'].append(message)
             
-            # Write HTML output
+            # Stream HTML output to the file
             logger.info(f"Writing HTML to: {output_path}")
             output_path.parent.mkdir(parents=True, exist_ok=True)
             
             with open(output_path, 'wb') as f:
-                f.write(etree.tostring(
-                    html_doc,
+                html_doc.write(
+                    f,
                     pretty_print=True,
                     method='html',
                     encoding='utf-8'
-                ))
+                )
             
             result['success'] = True
             result['html_path'] = output_path
@@ -404,6 +525,9 @@ class DefineHTMLGenerator:
         html_parts.append('</div>')
         
         # Add datasets preview
+        # Imported here: define_json.utils imports this module via its CLI
+        from ..utils.mdv_index import MDVIndex
+        index = MDVIndex(data)
         datasets = data.get('itemGroups', [])[:max_datasets]
         if datasets:
             html_parts.append('<h2>Datasets Preview</h2>')
@@ -416,7 +540,7 @@ class DefineHTMLGenerator:
                 for item in items:
                     # Try to find variable details
                     var_oid = item.get('OID') or item.get('itemOID')
-                    var_info = self._find_variable_info(data, var_oid)
+                    var_info = self._find_variable_info(index, var_oid)
                     
                     html_parts.append('<tr>')
                     html_parts.append(f'<td>{var_info.get("name", var_oid)}</td>')
@@ -433,65 +557,118 @@ class DefineHTMLGenerator:
         
         return '\n'.join(html_parts)
     
-    def _find_variable_info(self, data: Dict[str, Any], var_oid: str) -> Dict[str, Any]:
+    def _find_variable_info(self, index: "MDVIndex", var_oid: str) -> Dict[str, Any]:
         """Helper to find variable information by OID."""
-        for item in data.get('items', []):
-            if item.get('OID') == var_oid:
-                return item
-        return {'name': var_oid}
+        return index.item(var_oid) or {'name': var_oid}
     
     def batch_convert(self, 
                      input_dir: Union[Path, str],
                      output_dir: Union[Path, str],
                      pattern: str = "*.json",
-                     xsl_path: Optional[Union[Path, str]] = None) -> Dict[str, Any]:
+                     xsl_path: Optional[Union[Path, str]] = None,
+                     max_workers: Optional[int] = None) -> Dict[str, Any]:
         """
         Batch convert multiple Define-JSON files to HTML.
         
+        Files are converted on a process pool; each worker compiles the
+        stylesheet once and reuses it for every file it converts.
+        
         Args:
             input_dir: Directory containing Define-JSON files
             output_dir: Directory for output HTML files
             pattern: File pattern to match (default: "*.json")
             xsl_path: Optional path to XSL stylesheet
+            max_workers: Worker processes (default: CPU count, capped at
+                        the number of files); 1 converts in this process
             
         Returns:
-            Dictionary with batch conversion results
+            Dictionary with batch conversion results:
+            {
+                'total', 'successful', 'failed': file counts,
+                'workers': worker processes used (0 when run in-process),
+                'elapsed': wall-clock seconds for the batch,
+                'files': per-file dicts with 'input', 'output', 'status',
+                         'seconds' and, on failure, 'errors'
+            }
         """
+        start = time.perf_counter()
         input_dir = Path(input_dir)
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
+        xsl_path = Path(xsl_path) if xsl_path else self.default_xsl_path
         
-        results = {
-            'total': 0,
-            'successful': 0,
-            'failed': 0,
-            'files': []
+        jobs = [
+            (json_file, output_dir / json_file.with_suffix('.html').name)
+            for json_file in sorted(input_dir.glob(pattern))
+        ]
+        workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+        
+        if workers > 1:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_batch_worker,
+                initargs=(self.converter, xsl_path),
+            ) as pool:
+                files = list(pool.map(_convert_batch_file, *zip(*jobs)))
+        else:
+            workers = 0
+            files = [
+                self._convert_for_batch(json_file, output_file, xsl_path)
+                for json_file, output_file in jobs
+            ]
+        
+        successful = sum(1 for f in files if f['status'] == 'success')
+        return {
+            'total': len(files),
+            'successful': successful,
+            'failed': len(files) - successful,
+            'workers': workers,
+            'elapsed': time.perf_counter() - start,
+            'files': files
         }
+    
+    def _convert_for_batch(self,
+                           json_file: Path,
+                           output_file: Path,
+                           xsl_path: Optional[Path]) -> Dict[str, Any]:
+        """Convert one batch file and report its status and timing."""
+        start = time.perf_counter()
+        try:
+            conversion_result = self.json_to_html(json_file, output_file, xsl_path)
+        except Exception as e:
+            conversion_result = {'success': False, 'errors': [str(e)]}
         
-        for json_file in input_dir.glob(pattern):
-            results['total'] += 1
-            output_file = output_dir / json_file.with_suffix('.html').name
-            
-            file_result = {
-                'input': json_file,
-                'output': output_file
-            }
-            
-            conversion_result = self.json_to_htm(
-                json_file, output_file, xsl_path
-            )
-            
-            if conversion_result['success']:
-                results['successful'] += 1
-                file_result['status'] = 'success'
-            else:
-                results['failed'] += 1
-                file_result['status'] = 'failed'
-                file_result['errors'] = conversion_result.get('errors', [])
-                
-            results['files'].append(file_result)
-            
-        return results
+        file_result = {
+            'input': json_file,
+            'output': output_file,
+            'status': 'success' if conversion_result['success'] else 'failed',
+            'seconds': time.perf_counter() - start
+        }
+        if not conversion_result['success']:
+            file_result['errors'] = conversion_result.get('errors', [])
+        return file_result
+
+
+# Per-process state for batch_convert workers
+_batch_generator: Optional[DefineHTMLGenerator] = None
+
+
+def _init_batch_worker(converter: DefineJSONToXMLConverter, xsl_path: Optional[Path]) -> None:
+    """Set up a batch worker: one generator, with the stylesheet compiled up front."""
+    global _batch_generator
+    _batch_generator = DefineHTMLGenerator(converter=converter, default_xsl_path=xsl_path)
+    if LXML_AVAILABLE and xsl_path and xsl_path.exists():
+        try:
+            compiled_xslt(xsl_path)
+        except Exception:
+            pass  # reported per file by xml_to_html
+
+
+def _convert_batch_file(json_file: Path, output_file: Path) -> Dict[str, Any]:
+    """Process-pool entry point for batch_convert."""
+    return _batch_generator._convert_for_batch(
+        json_file, output_file, _batch_generator.default_xsl_path
+    )
 
 
 # Convenience function for quick conversion
@@ -510,7 +687,7 @@ def json_to_html(json_path: Union[Path, str],
         True if successful, False otherwise
     """
     generator = DefineHTMLGenerator()
-    result = generator.convert_file(json_path, html_path, xsl_path)
+    result = generator.json_to_html(json_path, html_path, xsl_path)
     return result['success']
 
 
@@ -0,0 +1,895 @@
+"""
+Native HTML rendering of Define-JSON, without XSLT.
+
+DefineHTMLRenderer renders a Define-JSON document straight to HTML: study
+metadata, datasets and their variables, value-level metadata, codelists,
+external dictionaries, methods, comments and analysis results (ARM). Every
+cross-reference (codelist, method, comment, where clause, document) is
+resolved through an MDVIndex, and each section is written to the output
+stream as soon as it is rendered, so time and memory grow linearly with the
+size of the define. Use it when XSLT over the whole document is too slow.
+
+Every rendered definition carries its OID as its HTML id, so ``#IG.DM``,
+``#IT.DM.AGE`` or ``#CL.SEX`` link straight to it.
+
+For very large defines, render_split() writes a small index page instead and
+puts each dataset, codelist group and analysis display in its own part,
+loaded by the page on demand (``define-json json2html --split``).
+
+Both also write a search index beside the page (see html_search): a search
+box in the navigation finds datasets, variables, value-level items,
+codelists and terms, methods, comments and analysis results by name, label,
+coded value, decode or description, and links to them.
+
+Usage:
+    renderer = DefineHTMLRenderer.from_file("define.json")
+    with open("define.html", "w", encoding="utf-8") as f:
+        renderer.render(f)
+
+    # Or, through the generator (``define-json json2html --native``)
+    DefineHTMLGenerator().json_to_native_html("define.json", "define.html")
+
+    # Index page plus define_parts/
+    renderer.render_split("define.html")
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+from collections import deque
+from html import escape, unescape
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, TextIO, Tuple, Union
+from urllib.parse import quote
+
+# Not imported by the converters package itself (define_json.utils imports the
+# converters via its CLI), so the index can be imported at module level here
+from ..utils.mdv_index import MDVIndex, get_field, ref_oid
+from .html_search import SEARCH_STYLES, SEARCH_WIDGET, SearchIndex
+
+STYLESHEET = """
+body { font-family: Arial, Helvetica, sans-serif; font-size: 13px; margin: 0; }
+nav { position: fixed; top: 0; bottom: 0; left: 0; width: 220px; overflow-y: auto;
+      padding: 10px; background: #f4f6f8; border-right: 1px solid #ccd; }
+nav ul { list-style: none; padding-left: 10px; margin: 4px 0; }
+main { margin-left: 250px; padding: 10px 20px; }
+h1 { font-size: 20px; } h2 { font-size: 17px; border-bottom: 2px solid #ccd; padding-bottom: 4px; }
+h3 { font-size: 15px; margin-top: 24px; }
+table { border-collapse: collapse; width: 100%; margin-bottom: 16px; }
+th, td { border: 1px solid #ccd; padding: 4px 6px; text-align: left; vertical-align: top; }
+th { background: #e6ebf0; }
+caption { text-align: left; font-weight: bold; padding: 4px 0; }
+pre { white-space: pre-wrap; margin: 0; }
+.key { font-weight: bold; }
+.meta td:first-child { width: 200px; font-weight: bold; }
+:target { background: #fff6c8; }
+.part { padding: 12px; margin: 8px 0; border: 1px dashed #ccd; color: #556; cursor: pointer; min-height: 20px; }
+""".strip()
+
+# Loader for render_split(): parts are fetched as scripts (which, unlike
+# fetch(), also works for pages opened from disk) when they are needed.
+PART_LOADER = """
+(function () {
+  var manifest = JSON.parse(document.getElementById('define-parts').textContent);
+  var slots = {}, loaded = {}, waiting = {};
+  document.querySelectorAll('[data-part]').forEach(function (slot) {
+    slots[slot.getAttribute('data-part')] = slot;
+    slot.addEventListener('click', function () { load(slot.getAttribute('data-part')); });
+  });
+  window.defineParts = {
+    loaded: function (key, html) {
+      loaded[key] = true;
+      if (slots[key]) { slots[key].outerHTML = html; delete slots[key]; }
+      (waiting[key] || []).forEach(function (done) { done(); });
+      delete waiting[key];
+    },
+    load: load
+  };
+  function load(key, done) {
+    if (loaded[key]) { if (done) done(); return; }
+    if (waiting[key]) { if (done) waiting[key].push(done); return; }
+    waiting[key] = done ? [done] : [];
+    var script = document.createElement('script');
+    script.src = manifest.parts[key];
+    document.head.appendChild(script);
+  }
+  function show(id) {
+    var target = document.getElementById(id);
+    if (target) { target.scrollIntoView(); return; }
+    var key = manifest.anchors[id];
+    if (key) load(key, function () {
+      var loadedTarget = document.getElementById(id);
+      if (loadedTarget) loadedTarget.scrollIntoView();
+    });
+  }
+  window.addEventListener('hashchange', function () { show(decodeURIComponent(location.hash.slice(1))); });
+  if (location.hash) show(decodeURIComponent(location.hash.slice(1)));
+  if ('IntersectionObserver' in window) {
+    var observer = new IntersectionObserver(function (entries) {
+      entries.forEach(function (entry) {
+        if (entry.isIntersecting) {
+          observer.unobserve(entry.target);
+          load(entry.target.getAttribute('data-part'));
+        }
+      });
+    }, { rootMargin: '400px' });
+    Object.keys(slots).forEach(function (key) { observer.observe(slots[key]); });
+  }
+})();
+""".strip()
+
+CODELIST_GROUP_TERMS = 2000
+
+_ANCHOR = re.compile(r' id="([^"]+)"')
+
+
+def _text(value: Any) -> str:
+    """Plain text of a field given as a string, a TranslatedText-like object or a list of them."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)):
+        return " ".join(t for t in (_text(v) for v in value) if t)
+    if isinstance(value, dict):
+        for key in ("value", "text", "translatedText", "description"):
+            if key in value:
+                return _text(value[key])
+        return ""
+    for key in ("value", "text"):
+        if hasattr(value, key):
+            return _text(getattr(value, key))
+    return str(value)
+
+
+def _e(value: Any) -> str:
+    """Escaped plain text of a field."""
+    return escape(_text(value))
+
+
+def _link(oid: Optional[str], label: Any = None) -> str:
+    """Link to the definition with id ``oid`` (the OID itself when no label)."""
+    if not oid:
+        return _e(label)
+    return f'<a href="#{quote(oid, safe="")}">{_e(label if label is not None else oid)}</a>'
+
+
+def _write_if_changed(path: Path, content: bytes) -> bool:
+    """Write ``content`` unless the file already holds it; True if written."""
+    try:
+        if path.stat().st_size == len(content) and path.read_bytes() == content:
+            return False
+    except OSError:
+        pass
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
+    return True
+
+
+class DefineHTMLRenderer:
+    """
+    Streaming HTML renderer for a Define-JSON document.
+
+    Args:
+        doc: Define-JSON document (a dict as loaded from JSON); a nested
+            ``metaDataVersion`` is unwrapped for the content, while study
+            metadata is read from the top level
+        index: Optional prebuilt MDVIndex of the content
+    """
+
+    def __init__(self, doc: Dict[str, Any], index: Optional[MDVIndex] = None):
+        self.doc = doc
+        mdv = doc.get("metaDataVersion") if isinstance(doc, dict) else None
+        if isinstance(mdv, list):
+            mdv = mdv[0] if mdv else None
+        self.mdv = mdv if isinstance(mdv, dict) else doc
+        self.index = index or MDVIndex(self.mdv)
+
+        metadata = self.mdv.get("_xmlMetadata") or doc.get("_xmlMetadata") or {}
+        self._group_supplemental = metadata.get("itemGroupSupplemental") or {}
+        self._item_supplemental = self._group_supplemental.get("_itemOriginMetadata") or {}
+        self._code_list_supplemental = metadata.get("codeListSupplemental") or {}
+        self._analysis_supplemental = (metadata.get("analysisSupplemental") or {}).get("resultSupplemental") or {}
+        self._display_supplemental = (metadata.get("displaySupplemental") or {}).get("multipleAnalyses") or {}
+
+        self.resources: Dict[str, Any] = {
+            r["OID"]: r for r in (self.mdv.get("resources") or []) if isinstance(r, dict) and r.get("OID")
+        }
+        self.analyses: Dict[str, Any] = {
+            a["OID"]: a for a in (self.mdv.get("analyses") or []) if isinstance(a, dict) and a.get("OID")
+        }
+        self._where_text: Dict[str, str] = {}
+        self._anchors: set = set()
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "DefineHTMLRenderer":
+        """Renderer for a Define-JSON file."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    # ------------------------------------------------------------------
+    # Document structure
+    # ------------------------------------------------------------------
+
+    @property
+    def datasets(self) -> List[Dict[str, Any]]:
+        """Top-level ItemGroups (datasets), in document order."""
+        return [ig for ig in (self.mdv.get("itemGroups") or []) if isinstance(ig, dict)]
+
+    @property
+    def code_lists(self) -> List[Dict[str, Any]]:
+        return [cl for cl in (self.mdv.get("codeLists") or []) if isinstance(cl, dict)]
+
+    @property
+    def displays(self) -> List[Dict[str, Any]]:
+        return [d for d in (self.mdv.get("displays") or []) if isinstance(d, dict)]
+
+    def value_lists(self, dataset: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Value-level metadata (ValueList slices) of a dataset, nested slices included."""
+        found = []
+        pending = deque(dataset.get("slices") or [])
+        while pending:
+            child = pending.popleft()
+            if isinstance(child, str):
+                child = self.index.item_group(child)
+            if not isinstance(child, dict):
+                continue
+            if child.get("items"):
+                found.append(child)
+            pending.extend(child.get("slices") or [])
+        return found
+
+    def _value_list_for(self, item: Dict[str, Any], by_suffix: Dict[str, str]) -> Optional[str]:
+        """OID of the value list describing a dataset variable, if any."""
+        supplemental = self._item_supplemental.get(item.get("OID")) or {}
+        return item.get("valueList") or supplemental.get("valueListOID") or by_suffix.get(item.get("name"))
+
+    # ------------------------------------------------------------------
+    # Rendering
+    # ------------------------------------------------------------------
+
+    def _id(self, oid: Optional[str]) -> str:
+        """``id`` attribute for a definition; OIDs shared between datasets get it once."""
+        if not oid or oid in self._anchors:
+            return ""
+        self._anchors.add(oid)
+        return f' id="{escape(oid)}"'
+
+    def render(self, stream: TextIO, search_src: Optional[str] = None) -> None:
+        """
+        Write the complete HTML page to ``stream``, section by section.
+
+        Args:
+            stream: Output stream
+            search_src: URL of the search index script (see search_index());
+                no search box when None
+        """
+        self._anchors = set()
+        self.write_head(stream, search=bool(search_src))
+        self.write_navigation(stream, search_src)
+        stream.write("<main>\n")
+        self.write_study(stream)
+        self.write_datasets_overview(stream)
+        for dataset in self.datasets:
+            self.write_dataset(stream, dataset)
+        self.write_code_lists(stream)
+        self.write_methods(stream)
+        self.write_comments(stream)
+        self.write_analysis_results(stream)
+        stream.write("</main>\n")
+        if search_src:
+            stream.write(f"<script>\n{SEARCH_WIDGET}\n</script>\n")
+        self.write_tail(stream)
+
+    def render_split(self,
+                     output_path: Union[str, Path],
+                     codelist_group_terms: int = CODELIST_GROUP_TERMS,
+                     search: bool = True) -> Dict[str, Any]:
+        """
+        Write a small index page plus lazily loaded parts.
+
+        The index holds the study metadata, the dataset overview and a
+        placeholder per part; a part (one per dataset, per group of
+        codelists of up to ``codelist_group_terms`` terms, per ARM display,
+        and one each for methods and comments) is loaded when its
+        placeholder scrolls into view, is clicked, or holds the target of a
+        link. Parts are scripts wrapping JSON-encoded HTML, so the page also
+        works when opened from disk. Part files are named by content hash
+        and only written when their content changed; parts no longer
+        produced are removed.
+
+        Args:
+            output_path: Index page; parts go to ``<stem>_parts/`` beside it
+            codelist_group_terms: Codelist terms per codelist part
+            search: Also write a search index to the parts directory and
+                add a search box to the page
+
+        Returns:
+            Dict with 'html_path', 'parts_dir', 'parts' (count), 'written'
+            and 'unchanged' (part files), and 'search_path' when searching
+        """
+        output_path = Path(output_path)
+        parts_dir = output_path.with_name(f"{output_path.stem}_parts")
+        parts_dir.mkdir(parents=True, exist_ok=True)
+        self._anchors = set()
+
+        top = io.StringIO()
+        self.write_study(top)
+        self.write_datasets_overview(top)
+
+        # (section, key, placeholder label, HTML); a shared OID is anchored in its first part
+        parts: List[Tuple[str, str, str, str]] = []
+
+        def add(section: str, key: str, label: str, write: Callable[[TextIO], Any]) -> None:
+            buffer = io.StringIO()
+            write(buffer)
+            if buffer.tell():
+                parts.append((section, key, label, buffer.getvalue()))
+
+        for position, dataset in enumerate(self.datasets):
+            label = f"{_text(dataset.get('name'))} ({_text(dataset.get('description') or dataset.get('label'))})"
+            add("datasets", dataset.get("OID") or f"dataset-{position}", label,
+                lambda out, ds=dataset: self.write_dataset(out, ds))
+        for position, group in enumerate(self._code_list_groups(codelist_group_terms)):
+            names = [_text(cl.get("name")) or _text(cl.get("OID")) for cl in group]
+            label = f"Codelists {names[0]} … {names[-1]} ({len(group)})" if len(group) > 1 else f"Codelist {names[0]}"
+            add("codelists", f"codelists-{position}", label,
+                lambda out, cls=group: [self.write_code_list(out, cl) for cl in cls])
+        dictionaries = io.StringIO()
+        self.write_dictionaries(dictionaries)
+        add("reference", "methods", "Methods", self.write_methods)
+        add("reference", "comments", "Comments", self.write_comments)
+        for position, display in enumerate(self.displays):
+            add("displays", display.get("OID") or f"display-{position}",
+                _text(display.get("name")) or "Analysis display",
+                lambda out, d=display: self.write_display(out, d))
+
+        files: Dict[str, str] = {}
+        anchors: Dict[str, str] = {}
+        written = unchanged = 0
+        for _, key, _, body in parts:
+            content = f"defineParts.loaded({json.dumps(key)}, {json.dumps(body)});\n".encode("utf-8")
+            digest = hashlib.sha256(content).hexdigest()[:16]
+            name = f"{re.sub(r'[^A-Za-z0-9_.-]', '_', key)}.{digest}.js"
+            if _write_if_changed(parts_dir / name, content):
+                written += 1
+            else:
+                unchanged += 1
+            files[key] = f"{parts_dir.name}/{name}"
+            for oid in _ANCHOR.findall(body):
+                anchors.setdefault(unescape(oid), key)
+
+        current = {Path(f).name for f in files.values()}
+        search_path = None
+        if search:
+            content = self.search_index().to_script().encode("utf-8")
+            search_path = parts_dir / f"search.{hashlib.sha256(content).hexdigest()[:16]}.js"
+            _write_if_changed(search_path, content)
+            current.add(search_path.name)
+        for stale in parts_dir.glob("*.js"):
+            if stale.name not in current:
+                stale.unlink()
+
+        def placeholders(section: str) -> str:
+            return "".join(
+                f'<div class="part" data-part="{escape(key)}">{escape(label)}</div>\n'
+                for part_section, key, label, _ in parts if part_section == section
+            )
+
+        index = io.StringIO()
+        search_src = f"{parts_dir.name}/{search_path.name}" if search_path else None
+        self.write_head(index, search=search)
+        self.write_navigation(index, search_src)
+        index.write("<main>\n")
+        index.write(top.getvalue())
+        index.write(placeholders("datasets"))
+        if self.code_lists or self.dictionaries:
+            index.write('<section id="codelists">\n<h2>Controlled Terminology</h2>\n')
+            index.write(placeholders("codelists"))
+            index.write(dictionaries.getvalue())
+            index.write("</section>\n")
+        index.write(placeholders("reference"))
+        if self.displays:
+            index.write('<section id="analysis-results">\n<h2>Analysis Results</h2>\n')
+            index.write(placeholders("displays"))
+            index.write("</section>\n")
+        index.write("</main>\n")
+        manifest = json.dumps({"parts": files, "anchors": anchors}, separators=(",", ":")).replace("</", "<\\/")
+        index.write(f'<script type="application/json" id="define-parts">{manifest}</script>\n')
+        index.write(f"<script>\n{PART_LOADER}\n</script>\n")
+        if search_src:
+            index.write(f"<script>\n{SEARCH_WIDGET}\n</script>\n")
+        self.write_tail(index)
+        _write_if_changed(output_path, index.getvalue().encode("utf-8"))
+
+        result = {
+            "html_path": output_path,
+            "parts_dir": parts_dir,
+            "parts": len(parts),
+            "written": written,
+            "unchanged": unchanged,
+        }
+        if search_path:
+            result["search_path"] = search_path
+        return result
+
+    def _code_list_groups(self, max_terms: int) -> List[List[Dict[str, Any]]]:
+        """Consecutive codelists, grouped up to ``max_terms`` terms (a larger codelist stands alone)."""
+        groups: List[List[Dict[str, Any]]] = []
+        terms = 0
+        for code_list in self.code_lists:
+            size = len(code_list.get("codeListItems") or [])
+            if not groups or (groups[-1] and terms + size > max_terms):
+                groups.append([])
+                terms = 0
+            groups[-1].append(code_list)
+            terms += size
+        return groups
+
+    def render_file(self, output_path: Union[str, Path], search: bool = True) -> Path:
+        """Render to a file and return its path; with ``search``, the index goes to ``<stem>.search.js``."""
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        search_src = None
+        if search:
+            search_path = output_path.with_name(f"{output_path.stem}.search.js")
+            _write_if_changed(search_path, self.search_index().to_script().encode("utf-8"))
+            search_src = quote(search_path.name)
+        with open(output_path, "w", encoding="utf-8") as f:
+            self.render(f, search_src)
+        return output_path
+
+    def search_index(self) -> SearchIndex:
+        """
+        Search index of everything the page shows.
+
+        Variables, value-level items, codelists, methods, comments, displays
+        and analysis results link to their OIDs; codelist terms link to their
+        codelist.
+        """
+        index = SearchIndex()
+        for dataset in self.datasets:
+            dataset_name = _text(dataset.get("name"))
+            label = _text(dataset.get("description") or dataset.get("label"))
+            index.add(dataset.get("OID"), "Dataset", f"{dataset_name} — {label}" if label else dataset_name,
+                      [dataset_name, label, dataset.get("OID")])
+            for kind, items in [("Variable", dataset.get("items") or [])] + [
+                ("Value-level", value_list.get("items") or []) for value_list in self.value_lists(dataset)
+            ]:
+                for item in items:
+                    if not isinstance(item, dict):
+                        continue
+                    name = _text(item.get("name"))
+                    label = _text(item.get("description") or item.get("label"))
+                    title = f"{dataset_name}.{name}" + (f" — {label}" if label else "")
+                    index.add(item.get("OID"), kind, title, [name, label, item.get("OID")])
+
+        for code_list in self.code_lists:
+            oid = code_list.get("OID")
+            name = _text(code_list.get("name"))
+            index.add(oid, "Codelist", f"{name} [{oid}]", [name, oid])
+            index.add_terms(oid, name, [
+                (_text(item.get("codedValue")), _text(item.get("decode")))
+                for item in code_list.get("codeListItems") or [] if isinstance(item, dict)
+            ])
+
+        for oid, method in self.index.methods.items():
+            name = _text(get_field(method, "name")) or oid
+            index.add(oid, "Method", name, [name, oid, get_field(method, "description")])
+        for oid, comment in self.index.comments.items():
+            text = _text(get_field(comment, "text") or get_field(comment, "description"))
+            index.add(oid, "Comment", f"{oid}: {text[:80]}", [oid, text])
+
+        for display in self.displays:
+            name = _text(display.get("name")) or display.get("OID")
+            description = _text(display.get("description")) or _text(display.get("label"))
+            index.add(display.get("OID"), "Analysis", f"{name} — {description}" if description else name,
+                      [name, description, display.get("OID")])
+            for oid in self.display_analyses(display):
+                analysis = self.analyses.get(oid) or {}
+                supplemental = self._analysis_supplemental.get(oid) or {}
+                description = _text(supplemental.get("description") or analysis.get("description"))
+                index.add(oid, "Analysis", f"{name}: {description or oid}", [oid, description])
+        return index
+
+    def title(self) -> str:
+        return _text(self.doc.get("studyName")) or _text(self.doc.get("name")) or "Define-JSON"
+
+    def write_head(self, stream: TextIO, extra: str = "", search: bool = False) -> None:
+        if search:
+            extra = f"<style>\n{SEARCH_STYLES}\n</style>\n{extra}"
+        stream.write(
+            "<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+            f"<title>{escape(self.title())}</title>\n<style>\n{STYLESHEET}\n</style>\n{extra}</head>\n<body>\n"
+        )
+
+    def write_tail(self, stream: TextIO) -> None:
+        stream.write("</body>\n</html>\n")
+
+    def write_navigation(self, stream: TextIO, search_src: Optional[str] = None) -> None:
+        parts = ["<nav>\n<strong>", escape(self.title()), "</strong>\n"]
+        if search_src:
+            parts.append(
+                f'<div class="define-search"><input id="define-search-input" type="search" '
+                f'data-index="{escape(search_src)}" placeholder="Search…" autocomplete="off">'
+                '<ol id="define-search-results"></ol></div>\n'
+            )
+        parts += ["<ul>\n",
+                  '<li><a href="#study">Study</a></li>\n',
+                  '<li><a href="#datasets">Datasets</a>\n<ul>\n']
+        for dataset in self.datasets:
+            parts.append(f"<li>{_link(dataset.get('OID'), dataset.get('name'))}</li>\n")
+        parts.append("</ul>\n</li>\n")
+        if self.code_lists:
+            parts.append('<li><a href="#codelists">Controlled Terminology</a></li>\n')
+        if self.index.methods:
+            parts.append('<li><a href="#methods">Methods</a></li>\n')
+        if self.index.comments:
+            parts.append('<li><a href="#comments">Comments</a></li>\n')
+        if self.displays:
+            parts.append('<li><a href="#analysis-results">Analysis Results</a></li>\n')
+        parts.append("</ul>\n</nav>\n")
+        stream.write("".join(parts))
+
+    def write_study(self, stream: TextIO) -> None:
+        fields = [
+            ("Study Name", self.doc.get("studyName")),
+            ("Study Description", self.doc.get("studyDescription")),
+            ("Protocol Name", self.doc.get("protocolName")),
+            ("Define Version", self.doc.get("defineVersion")),
+            ("Context", self.doc.get("context")),
+            ("Creation Date/Time", self.doc.get("creationDateTime")),
+            ("Originator", self.doc.get("originator")),
+        ]
+        parts = [f'<section id="study">\n<h1>{escape(self.title())}</h1>\n<table class="meta">\n']
+        for label, value in fields:
+            if _text(value):
+                parts.append(f"<tr><td>{label}</td><td>{_e(value)}</td></tr>\n")
+        parts.append("</table>\n")
+
+        standards = [s for s in (self.mdv.get("standards") or []) if isinstance(s, dict)]
+        if standards:
+            parts.append("<table>\n<caption>Standards</caption>\n"
+                         "<tr><th>Standard</th><th>Type</th><th>Version</th><th>Status</th></tr>\n")
+            for standard in standards:
+                parts.append(
+                    f"<tr{self._id(standard.get('OID'))}><td>{_e(standard.get('name'))}</td><td>{_e(standard.get('type'))}</td>"
+                    f"<td>{_e(standard.get('version'))}</td><td>{_e(standard.get('status'))}</td></tr>\n"
+                )
+            parts.append("</table>\n")
+        parts.append("</section>\n")
+        stream.write("".join(parts))
+
+    # -- Datasets -------------------------------------------------------
+
+    def write_datasets_overview(self, stream: TextIO) -> None:
+        parts = ['<section id="datasets">\n<h2>Datasets</h2>\n<table>\n'
+                 "<tr><th>Dataset</th><th>Description</th><th>Class</th><th>Structure</th>"
+                 "<th>Purpose</th><th>Keys</th><th>Location</th></tr>\n"]
+        for dataset in self.datasets:
+            supplemental = self._group_supplemental.get(dataset.get("OID")) or {}
+            parts.append(
+                f"<tr><td>{_link(dataset.get('OID'), dataset.get('name'))}</td>"
+                f"<td>{_e(dataset.get('description') or dataset.get('label'))}</td>"
+                f"<td>{_e(supplemental.get('defClass'))}</td>"
+                f"<td>{_e(dataset.get('structure'))}</td>"
+                f"<td>{_e(dataset.get('purpose'))}</td>"
+                f"<td>{escape(', '.join(self._key_names(dataset)))}</td>"
+                f"<td>{self._documents([supplemental.get('leafID')] if supplemental.get('leafID') else [])}</td></tr>\n"
+            )
+        parts.append("</table>\n</section>\n")
+        stream.write("".join(parts))
+
+    def _key_names(self, dataset: Dict[str, Any]) -> List[str]:
+        names = []
+        for oid in dataset.get("keySequence") or []:
+            item = self.index.item(ref_oid(oid))
+            names.append(_text(get_field(item, "name")) if item is not None else str(ref_oid(oid)))
+        return names
+
+    def write_dataset(self, stream: TextIO, dataset: Dict[str, Any]) -> None:
+        """Variables of one dataset, followed by its value-level metadata."""
+        oid = dataset.get("OID")
+        supplemental = self._group_supplemental.get(oid) or {}
+        keys = {ref_oid(k): position for position, k in enumerate(dataset.get("keySequence") or [], start=1)}
+        value_lists = self.value_lists(dataset)
+        by_suffix = {vl["OID"].rsplit(".", 1)[-1]: vl["OID"] for vl in value_lists if vl.get("OID")}
+
+        parts = [
+            f"<section{self._id(oid)}>\n<h3>{_e(dataset.get('name'))} "
+            f"({_e(dataset.get('description') or dataset.get('label'))})</h3>\n"
+        ]
+        comment = self._comment_links(supplemental.get("commentOID"), dataset.get("comments"))
+        if comment:
+            parts.append(f"<p>{comment}</p>\n")
+        parts.append(
+            "<table>\n<tr><th>Variable</th><th>Label</th><th>Key</th><th>Type</th><th>Length / Format</th>"
+            "<th>Controlled Terms or Format</th><th>Origin / Source / Method / Comment</th></tr>\n"
+        )
+        for item in dataset.get("items") or []:
+            if not isinstance(item, dict):
+                continue
+            value_list = self._value_list_for(item, by_suffix)
+            name = _e(item.get("name"))
+            if value_list:
+                name += f" ({_link(value_list, 'VLM')})"
+            key = keys.get(item.get("OID"))
+            key_class = ' class="key"' if key else ""
+            parts.append(
+                f"<tr{self._id(item.get('OID'))}><td{key_class}>{name}</td>"
+                f"<td>{_e(item.get('description') or item.get('label'))}</td>"
+                f"<td>{key or ''}</td>"
+                f"{self._item_cells(item)}</tr>\n"
+            )
+        parts.append("</table>\n")
+        stream.write("".join(parts))
+
+        for value_list in value_lists:
+            self.write_value_list(stream, value_list)
+        stream.write("</section>\n")
+
+    def write_value_list(self, stream: TextIO, value_list: Dict[str, Any]) -> None:
+        parts = [
+            f"<table{self._id(value_list.get('OID'))}>\n<caption>Value-level metadata: {_e(value_list.get('name') or value_list.get('OID'))}</caption>\n"
+            "<tr><th>Where</th><th>Variable</th><th>Label</th><th>Type</th><th>Length / Format</th>"
+            "<th>Controlled Terms or Format</th><th>Origin / Source / Method / Comment</th></tr>\n"
+        ]
+        for item in value_list.get("items") or []:
+            if not isinstance(item, dict):
+                continue
+            where = "<br>".join(self._where(ref_oid(wc)) for wc in (item.get("applicableWhen") or []))
+            parts.append(
+                f"<tr{self._id(item.get('OID'))}><td>{where}</td><td>{_e(item.get('name'))}</td>"
+                f"<td>{_e(item.get('description') or item.get('label'))}</td>"
+                f"{self._item_cells(item)}</tr>\n"
+            )
+        parts.append("</table>\n")
+        stream.write("".join(parts))
+
+    def _item_cells(self, item: Dict[str, Any]) -> str:
+        """Type, length/format, controlled terms and origin cells of a variable."""
+        length = _text(item.get("length")) if item.get("length") is not None else ""
+        if item.get("displayFormat"):
+            length = f"{length} ({_text(item.get('displayFormat'))})" if length else _text(item.get("displayFormat"))
+        code_list = ref_oid(item.get("codeList"))
+        terms = ""
+        if code_list:
+            cl = self.index.code_list(code_list)
+            terms = _link(code_list, get_field(cl, "name") if cl is not None else code_list)
+        return (
+            f"<td>{_e(item.get('dataType'))}</td><td>{escape(length)}</td>"
+            f"<td>{terms}</td><td>{self._origin(item)}</td>"
+        )
+
+    def _origin(self, item: Dict[str, Any]) -> str:
+        parts = []
+        origin = item.get("origin")
+        if isinstance(origin, dict):
+            label = _e(origin.get("type"))
+            if origin.get("source"):
+                label += f" ({_e(origin.get('source'))})"
+            parts.append(label)
+            if origin.get("documents"):
+                parts.append(self._documents(origin["documents"]))
+        elif origin:
+            parts.append(_e(origin))
+        method = ref_oid(item.get("method"))
+        if method:
+            definition = self.index.method(method)
+            parts.append("Method: " + _link(method, get_field(definition, "name") or method))
+        supplemental = self._item_supplemental.get(item.get("OID")) or {}
+        comment = self._comment_links(ref_oid(item.get("comment")) or supplemental.get("commentOID"))
+        if comment:
+            parts.append("Comment: " + comment)
+        return "<br>".join(p for p in parts if p)
+
+    def _where(self, oid: Optional[str]) -> str:
+        """Readable text of a where clause (``PARAMCD IN (A, B)``), built once per clause."""
+        if not oid:
+            return ""
+        cached = self._where_text.get(oid)
+        if cached is not None:
+            return cached
+        clause = self.index.where_clause(oid)
+        texts = []
+        for cond_ref in (get_field(clause, "conditions") or []) if clause is not None else []:
+            cond = self.index.condition(cond_ref) if isinstance(cond_ref, str) else cond_ref
+            for check in (get_field(cond, "rangeChecks") or []) if cond is not None else []:
+                item_oid = ref_oid(get_field(check, "item"))
+                item = self.index.item(item_oid) if item_oid else None
+                name = _text(get_field(item, "name")) if item is not None else (item_oid or "")
+                values = [_text(v) for v in (get_field(check, "checkValues") or [])]
+                comparator = _text(get_field(check, "comparator")) or "EQ"
+                shown = f"({', '.join(values)})" if comparator in ("IN", "NOTIN") else ", ".join(values)
+                texts.append(f"{name} {comparator} {shown}")
+        text = f'<span title="{escape(oid)}">{escape(" and ".join(texts) or oid)}</span>'
+        self._where_text[oid] = text
+        return text
+
+    # -- Documents and comments ----------------------------------------
+
+    def _documents(self, documents: Iterable[Any]) -> str:
+        """Links to the leaves (external documents) of a document list."""
+        links = []
+        for document in documents or []:
+            leaf = document if isinstance(document, str) else (document.get("leafID") or document.get("OID"))
+            if not leaf:
+                continue
+            resource = self.resources.get(f"RES.{leaf}") or self.resources.get(leaf) or {}
+            title = _text(resource.get("title") or resource.get("label") or resource.get("name")).strip() or leaf
+            href = resource.get("href")
+            link = f'<a href="{escape(href)}">{escape(title)}</a>' if href else escape(title)
+            pages = []
+            for ref in (document.get("pdfPageRefs") or []) if isinstance(document, dict) else []:
+                page = ref.get("pageRefs") or "-".join(filter(None, [ref.get("firstPage"), ref.get("lastPage")]))
+                if page:
+                    pages.append(_text(ref.get("title")) or f"p. {page}")
+            if pages:
+                link += f" [{escape(', '.join(pages))}]"
+            links.append(link)
+        return ", ".join(links)
+
+    def _comment_links(self, oid: Optional[str], inline: Any = None) -> str:
+        parts = []
+        if oid:
+            comment = self.index.comment(oid)
+            parts.append(_link(oid, _text(get_field(comment, "text") or get_field(comment, "description")) or oid))
+        if inline:
+            parts.append(_e(inline))
+        return " ".join(parts)
+
+    # -- Codelists, methods, comments ---------------------------------------
+
+    @property
+    def dictionaries(self) -> List[Dict[str, Any]]:
+        return [d for d in (self.mdv.get("dictionaries") or []) if isinstance(d, dict)]
+
+    def write_code_lists(self, stream: TextIO) -> None:
+        if not self.code_lists and not self.dictionaries:
+            return
+        stream.write('<section id="codelists">\n<h2>Controlled Terminology</h2>\n')
+        for code_list in self.code_lists:
+            self.write_code_list(stream, code_list)
+        self.write_dictionaries(stream)
+        stream.write("</section>\n")
+
+    def write_dictionaries(self, stream: TextIO) -> None:
+        if not self.dictionaries:
+            return
+        parts = ["<table>\n<caption>External Dictionaries</caption>\n"
+                 "<tr><th>Dictionary</th><th>Version</th></tr>\n"]
+        for dictionary in self.dictionaries:
+            parts.append(
+                f"<tr{self._id(dictionary.get('OID'))}><td>{_e(dictionary.get('name'))}</td>"
+                f"<td>{_e(dictionary.get('version'))}</td></tr>\n"
+            )
+        parts.append("</table>\n")
+        stream.write("".join(parts))
+
+    def write_code_list(self, stream: TextIO, code_list: Dict[str, Any]) -> None:
+        oid = code_list.get("OID")
+        items = [i for i in (code_list.get("codeListItems") or []) if isinstance(i, dict)]
+        decoded = any("decode" in i for i in items)
+        supplemental = self._code_list_supplemental.get(oid) or {}
+        caption = f"{_e(code_list.get('name'))} [{escape(oid or '')}]"
+        if code_list.get("dataType"):
+            caption += f" ({_e(code_list.get('dataType'))})"
+        comment = self._comment_links(supplemental.get("commentOID"))
+        if comment:
+            caption += f" {comment}"
+        header = "<th>Coded Value</th><th>Decode</th>" if decoded else "<th>Permitted Value</th>"
+        parts = [f"<table{self._id(oid)}>\n<caption>{caption}</caption>\n<tr>{header}</tr>\n"]
+        for item in items:
+            cell = f"<td>{_e(item.get('codedValue'))}</td>"
+            if decoded:
+                cell += f"<td>{_e(item.get('decode'))}</td>"
+            parts.append(f"<tr>{cell}</tr>\n")
+        parts.append("</table>\n")
+        stream.write("".join(parts))
+
+    def write_methods(self, stream: TextIO) -> None:
+        if not self.index.methods:
+            return
+        parts = ['<section id="methods">\n<h2>Methods</h2>\n<table>\n'
+                 "<tr><th>Method</th><th>Type</th><th>Description</th><th>Documents</th></tr>\n"]
+        for oid, method in self.index.methods.items():
+            parts.append(
+                f"<tr{self._id(oid)}><td>{_e(get_field(method, 'name') or oid)}</td><td>{_e(get_field(method, 'type'))}</td>"
+                f"<td><pre>{_e(get_field(method, 'description'))}</pre></td>"
+                f"<td>{self._documents(get_field(method, 'documents') or [])}</td></tr>\n"
+            )
+        parts.append("</table>\n</section>\n")
+        stream.write("".join(parts))
+
+    def write_comments(self, stream: TextIO) -> None:
+        if not self.index.comments:
+            return
+        parts = ['<section id="comments">\n<h2>Comments</h2>\n<table>\n'
+                 "<tr><th>Comment</th><th>Description</th><th>Documents</th></tr>\n"]
+        for oid, comment in self.index.comments.items():
+            parts.append(
+                f"<tr{self._id(oid)}><td>{escape(oid)}</td>"
+                f"<td><pre>{_e(get_field(comment, 'text') or get_field(comment, 'description'))}</pre></td>"
+                f"<td>{self._documents(get_field(comment, 'documents') or [])}</td></tr>\n"
+            )
+        parts.append("</table>\n</section>\n")
+        stream.write("".join(parts))
+
+    # -- Analysis results (ARM) ----------------------------------------
+
+    def write_analysis_results(self, stream: TextIO) -> None:
+        displays = self.displays
+        if not displays:
+            return
+        stream.write('<section id="analysis-results">\n<h2>Analysis Results</h2>\n')
+        for display in displays:
+            self.write_display(stream, display)
+        stream.write("</section>\n")
+
+    def display_analyses(self, display: Dict[str, Any]) -> List[str]:
+        """OIDs of the analysis results of a display, in order."""
+        oids = list(self._display_supplemental.get(display.get("OID")) or [])
+        primary = ref_oid(display.get("analysis"))
+        if primary and primary not in oids:
+            oids.insert(0, primary)
+        return oids
+
+    def write_display(self, stream: TextIO, display: Dict[str, Any]) -> None:
+        title = _text(display.get("description")) or _text(display.get("label"))
+        parts = [
+            f"<div{self._id(display.get('OID'))}>\n<h3>{_e(display.get('name') or display.get('OID'))}"
+            f"{' — ' + escape(title) if title else ''}</h3>\n"
+        ]
+        if display.get("location"):
+            parts.append(f"<p>Display: {self._documents(display['location'])}</p>\n")
+        for oid in self.display_analyses(display):
+            analysis = self.analyses.get(oid) or {"OID": oid}
+            supplemental = self._analysis_supplemental.get(oid) or {}
+            rows = [
+                ("Description", _e(supplemental.get("description") or analysis.get("description"))),
+                ("Reason", _e(analysis.get("analysisReason") or supplemental.get("analysisReason"))),
+                ("Purpose", _e(analysis.get("analysisPurpose") or supplemental.get("analysisPurpose"))),
+                ("Analysis Datasets", ", ".join(self._dataset_link(d) for d in (analysis.get("inputData") or []))),
+            ]
+            documentation = supplemental.get("documentation") or {}
+            if documentation:
+                rows.append(("Documentation", f"<pre>{_e(documentation.get('description'))}</pre>"
+                                              + self._documents(documentation.get("documents") or [])))
+            code = supplemental.get("programmingCode") or {}
+            if code:
+                rows.append((
+                    "Programming Statements",
+                    (f"{_e(code.get('context'))}<br>" if code.get("context") else "")
+                    + (f"<pre>{_e(code.get('code'))}</pre>" if code.get("code") else "")
+                    + self._documents(code.get("documents") or []),
+                ))
+            parts.append(f'<table class="meta"{self._id(oid)}>\n<caption>{escape(oid)}</caption>\n')
+            for label, value in rows:
+                if value:
+                    parts.append(f"<tr><td>{label}</td><td>{value}</td></tr>\n")
+            parts.append("</table>\n")
+        parts.append("</div>\n")
+        stream.write("".join(parts))
+
+    def _dataset_link(self, reference: Any) -> str:
+        """Link to an analysis dataset (``IG.ADSL``, ``ADSL`` or ``ADSL.ITTFL``)."""
+        oid = ref_oid(reference) or ""
+        if self.index.item_group(oid) is not None:
+            return _link(oid, get_field(self.index.item_group(oid), "name") or oid)
+        if self.index.item(oid) is not None:
+            return _link(oid, oid)
+        return escape(oid)
+
+
+def render_html(json_path: Union[str, Path], output_path: Union[str, Path]) -> Path:
+    """Render a Define-JSON file to HTML with the native renderer."""
+    return DefineHTMLRenderer.from_file(json_path).render_file(output_path)
+
+
+__all__ = [
+    "DefineHTMLRenderer",
+    "render_html",
+]
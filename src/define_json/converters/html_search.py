@@ -0,0 +1,325 @@
+"""
+Prebuilt client-side search for natively rendered defines.
+
+SearchIndex is an inverted index from tokens to documents, where a document
+is something a reviewer searches for (a dataset, variable, value-level
+item, codelist, codelist term, method, comment or analysis result) and
+points at the anchor it is rendered under. DefineHTMLRenderer.search_index()
+fills one with everything the renderer writes.
+
+The serialised index is compact: anchors are stored once; codelist terms
+are not documents of their own but positions in a per-codelist table of
+coded values and decodes, from which the widget builds their titles; the
+sorted tokens and the table columns are front-coded (each entry stores only
+what differs from the previous one); and each token's postings
+are delta-encoded base-36 document numbers, decoded only when a query first
+reaches the token. The search widget loads the index on first use and
+matches each query word as a prefix by binary search over the sorted tokens,
+intersecting the postings of the words, so lookups stay instant with 100k
+codelist terms.
+
+Tokens are the lower-cased runs of letters and digits of names, labels,
+coded values, decodes and descriptions (``VSORRES``, ``blood``, ``mmhg``);
+SEARCH_WIDGET tokenises queries the same way.
+"""
+
+import json
+import re
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+TOKEN = re.compile(r"[^\W_]+")
+
+# Document kinds, in the order results of equal score are shown
+KINDS = ("Dataset", "Variable", "Value-level", "Codelist", "Term", "Method", "Comment", "Analysis")
+
+SEARCH_STYLES = """
+.define-search { position: relative; margin: 6px 0 10px; }
+.define-search input { width: 100%; box-sizing: border-box; padding: 4px; }
+.define-search ol { list-style: none; margin: 2px 0; padding: 0; max-height: 60vh; overflow-y: auto;
+                    background: #fff; border: 1px solid #ccd; }
+.define-search ol:empty { display: none; }
+.define-search li a { display: block; padding: 2px 4px; font-size: 12px; text-decoration: none; }
+.define-search li small { color: #778; }
+""".strip()
+
+SEARCH_WIDGET = """
+(function () {
+  var input = document.getElementById('define-search-input');
+  var list = document.getElementById('define-search-results');
+  var index = null, tokens, postings, ids = [], termStart = [], tables = [], requested = false, limit = 50;
+  window.defineSearch = {
+    loaded: function (data) {
+      index = data;
+      tokens = expand(data.tokens.split(','));
+      postings = data.postings.split(';');
+      var start = data.docs.length;
+      data.codeLists.forEach(function (codeList) { termStart.push(start); start += codeList[2].length; });
+      search();
+    }
+  };
+  function expand(entries) {
+    // Front-coded: one base-36 digit of prefix shared with the previous value, then the rest
+    var out = [], last = '';
+    entries.forEach(function (entry) {
+      last = last.slice(0, parseInt(entry[0], 36)) + entry.slice(1);
+      out.push(last);
+    });
+    return out;
+  }
+  function docsOf(t) {
+    // Postings are decoded when a query first reaches the token
+    if (!ids[t]) {
+      var last = 0;
+      ids[t] = postings[t].split(',').map(function (step) { return last += parseInt(step, 36); });
+    }
+    return ids[t];
+  }
+  function doc(id) {
+    // [anchor, kind, title]; codelist terms are built from their codelist's table
+    if (id < index.docs.length) return index.docs[id];
+    var lo = 0, hi = termStart.length - 1;
+    while (lo < hi) { var mid = (lo + hi + 1) >> 1; if (termStart[mid] <= id) lo = mid; else hi = mid - 1; }
+    var codeList = index.codeLists[lo], position = id - termStart[lo];
+    if (!tables[lo]) tables[lo] = [expand(codeList[2]), codeList[3] ? expand(codeList[3]) : null];
+    var decode = tables[lo][1] && tables[lo][1][position];
+    return [codeList[0], index.termKind,
+            tables[lo][0][position] + (decode ? ' = ' + decode : '') + ' (' + codeList[1] + ')'];
+  }
+  function words(text) { return text.toLowerCase().match(/[\\p{L}\\p{N}]+/gu) || []; }
+  function lowerBound(token) {
+    var lo = 0, hi = tokens.length;
+    while (lo < hi) { var mid = (lo + hi) >> 1; if (tokens[mid] < token) lo = mid + 1; else hi = mid; }
+    return lo;
+  }
+  function matches(word) {
+    // Documents containing a token that starts with the word; exact tokens score higher
+    var scores = new Map();
+    for (var t = lowerBound(word); t < tokens.length && tokens[t].lastIndexOf(word, 0) === 0; t++) {
+      var score = tokens[t] === word ? 2 : 1;
+      docsOf(t).forEach(function (id) { if ((scores.get(id) || 0) < score) scores.set(id, score); });
+    }
+    return scores;
+  }
+  function kindOf(id) { return id < index.docs.length ? index.docs[id][1] : index.termKind; }
+  function search() {
+    list.innerHTML = '';
+    var query = words(input.value);
+    if (!index || !query.length) return;
+    var sets = query.map(matches).sort(function (a, b) { return a.size - b.size; });
+    var found = [];
+    sets[0].forEach(function (score, id) {
+      for (var i = 1; i < sets.length; i++) {
+        var other = sets[i].get(id);
+        if (!other) return;
+        score += other;
+      }
+      found.push([score, id]);
+    });
+    found.sort(function (a, b) {
+      return b[0] - a[0] || kindOf(a[1]) - kindOf(b[1]) || a[1] - b[1];
+    });
+    var html = [];
+    found.slice(0, limit).forEach(function (hit) {
+      var shown = doc(hit[1]);
+      html.push('<li><a href="#' + encodeURIComponent(index.anchors[shown[0]]) + '"><small>' +
+                index.kinds[shown[1]] + '</small> ' + escapeHtml(shown[2]) + '</a></li>');
+    });
+    if (found.length > limit) html.push('<li><small>' + (found.length - limit) + ' more…</small></li>');
+    list.innerHTML = html.join('');
+  }
+  function escapeHtml(text) {
+    return text.replace(/[&<>"]/g, function (c) { return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c]; });
+  }
+  function load() {
+    if (requested) return;
+    requested = true;
+    var script = document.createElement('script');
+    script.src = input.getAttribute('data-index');
+    document.head.appendChild(script);
+  }
+  input.addEventListener('focus', load);
+  input.addEventListener('input', function () { load(); search(); });
+})();
+""".strip()
+
+
+def tokenize(text: Any) -> List[str]:
+    """Lower-cased letter/digit runs of ``text`` (as the search widget splits queries)."""
+    if not text:
+        return []
+    return TOKEN.findall(str(text).lower())
+
+
+class SearchIndex:
+    """
+    Inverted index from tokens to searchable documents.
+
+    Documents with the same anchor and title are stored once. Codelist terms
+    are not stored as documents: each codelist keeps a table of its coded
+    values and decodes, and a term is found by its position in that table.
+    """
+
+    def __init__(self):
+        self.anchors: List[str] = []
+        self.docs: List[Tuple[int, int, str]] = []
+        self.code_lists: List[Tuple[int, str, List[str], Optional[List[str]]]] = []
+        self.postings: Dict[str, List[int]] = {}
+        self.term_postings: Dict[str, List[int]] = {}
+        self._terms = 0
+        self._anchor_ids: Dict[str, int] = {}
+        self._seen: set = set()
+
+    def _anchor_id(self, anchor: str) -> int:
+        anchor_id = self._anchor_ids.get(anchor)
+        if anchor_id is None:
+            anchor_id = self._anchor_ids[anchor] = len(self.anchors)
+            self.anchors.append(anchor)
+        return anchor_id
+
+    def add(self, anchor: str, kind: str, title: str, texts: Iterable[Any]) -> Optional[int]:
+        """
+        Add a document.
+
+        Args:
+            anchor: HTML id the result links to
+            kind: One of KINDS
+            title: Text shown for the result
+            texts: Texts whose tokens find the document
+
+        Returns:
+            The document number, or None for a duplicate or a document without tokens
+        """
+        if not anchor or (anchor, title) in self._seen:
+            return None
+        tokens = {token for text in texts for token in tokenize(text)}
+        if not tokens:
+            return None
+        self._seen.add((anchor, title))
+        doc_id = len(self.docs)
+        self.docs.append((self._anchor_id(anchor), KINDS.index(kind), title))
+        for token in tokens:
+            self.postings.setdefault(token, []).append(doc_id)
+        return doc_id
+
+    def add_terms(self, anchor: str, name: str, terms: Iterable[Tuple[Any, Any]]) -> None:
+        """
+        Add the terms of a codelist, found by coded value and decode.
+
+        Args:
+            anchor: HTML id of the codelist
+            name: Codelist name, shown with each term
+            terms: (coded value, decode) pairs, in codelist order; decode may be None
+        """
+        if not anchor:
+            return
+        coded: List[str] = []
+        decodes: List[str] = []
+        for position, (value, decode) in enumerate(terms, start=self._terms):
+            value, decode = str(value or ""), str(decode or "")
+            coded.append(value)
+            decodes.append(decode)
+            for token in set(tokenize(value)) | set(tokenize(decode)):
+                self.term_postings.setdefault(token, []).append(position)
+        if coded:
+            self.code_lists.append((self._anchor_id(anchor), name, coded, decodes if any(decodes) else None))
+            self._terms += len(coded)
+
+    def __len__(self) -> int:
+        return len(self.docs) + self._terms
+
+    def _doc_ids(self, token: str) -> List[int]:
+        """Documents of a token; term ``t`` is document ``len(docs) + t``."""
+        offset = len(self.docs)
+        return self.postings.get(token, []) + [offset + t for t in self.term_postings.get(token, [])]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialisable form read by SEARCH_WIDGET."""
+        tokens = sorted(self.postings.keys() | self.term_postings.keys())
+        return {
+            "kinds": list(KINDS),
+            "termKind": KINDS.index("Term"),
+            "anchors": self.anchors,
+            "docs": [list(doc) for doc in self.docs],
+            "codeLists": [
+                [anchor_id, name, _front_code(coded), _front_code(decodes) if decodes else None]
+                for anchor_id, name, coded, decodes in self.code_lists
+            ],
+            "tokens": ",".join(_front_code(tokens)),
+            "postings": ";".join(_encode(self._doc_ids(token)) for token in tokens),
+        }
+
+    def to_script(self) -> str:
+        """The index as a script for SEARCH_WIDGET to load (also works from disk)."""
+        return f"defineSearch.loaded({json.dumps(self.to_dict(), ensure_ascii=False, separators=(',', ':'))});\n"
+
+    def document(self, doc_id: int) -> Tuple[str, str, str]:
+        """(anchor, kind, title) of a document number."""
+        if doc_id < len(self.docs):
+            anchor_id, kind, title = self.docs[doc_id]
+            return self.anchors[anchor_id], KINDS[kind], title
+        position = doc_id - len(self.docs)
+        for anchor_id, name, coded, decodes in self.code_lists:
+            if position < len(coded):
+                decode = decodes[position] if decodes else ""
+                title = f"{coded[position]} = {decode} ({name})" if decode else f"{coded[position]} ({name})"
+                return self.anchors[anchor_id], "Term", title
+            position -= len(coded)
+        raise IndexError(doc_id)
+
+    def search(self, query: str) -> List[Tuple[str, str]]:
+        """(anchor, title) of the documents matching every query word as a prefix, in document order."""
+        words = tokenize(query)
+        if not words:
+            return []
+        tokens = sorted(self.postings.keys() | self.term_postings.keys())
+        found: Optional[set] = None
+        for word in words:
+            docs = set()
+            for position in range(bisect_left(tokens, word), len(tokens)):
+                if not tokens[position].startswith(word):
+                    break
+                docs.update(self._doc_ids(tokens[position]))
+            found = docs if found is None else found & docs
+        return [(anchor, title) for anchor, _, title in map(self.document, sorted(found))]
+
+
+def _front_code(values: List[str]) -> List[str]:
+    """Per value, the length of the prefix shared with the previous value (one base-36 digit) and the rest."""
+    entries = []
+    last = ""
+    for value in values:
+        shared = 0
+        limit = min(len(last), len(value), 35)
+        while shared < limit and last[shared] == value[shared]:
+            shared += 1
+        entries.append(_base36(shared) + value[shared:])
+        last = value
+    return entries
+
+
+def _encode(ids: List[int]) -> str:
+    """Delta-encoded, base-36 postings (ids are in increasing order)."""
+    steps = []
+    last = 0
+    for doc_id in ids:
+        steps.append(_base36(doc_id - last))
+        last = doc_id
+    return ",".join(steps)
+
+
+def _base36(value: int) -> str:
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    if value == 0:
+        return "0"
+    out = []
+    while value:
+        value, remainder = divmod(value, 36)
+        out.append(digits[remainder])
+    return "".join(reversed(out))
+
+
+__all__ = [
+    "SearchIndex",
+    "tokenize",
+]
@@ -398,6 +398,23 @@ class DefineJSONToXMLConverter:
         with open(json_path, 'r') as f:
             json_data = json.load(f)
         
+        root = self.convert(json_data)
+        
+        # Write XML to file
+        self._write_xml(root, output_path)
+        
+        return root
+    
+    def convert(self, json_data: Dict[str, Any]) -> ET.Element:
+        """
+        Convert loaded Define-JSON to a Define-XML element tree, in memory.
+        
+        Args:
+            json_data: Define-JSON document
+            
+        Returns:
+            Root ET.Element of the XML tree (see to_xml_string())
+        """
         # Normalize structure (handle nested metaDataVersion)
         json_data = self._normalize_json_structure(json_data)
         
@@ -665,9 +682,6 @@ class DefineJSONToXMLConverter:
         if mdv_leaves_legacy:
             self._create_mdv_leaves(mdv, mdv_leaves_legacy)
         
-        # Write XML to file
-        self._write_xml(root, output_path)
-        
         return root
     
     def _create_global_variables(self, study: ET.Element, json_data: Dict[str, Any]) -> None:
@@ -2479,27 +2493,17 @@ class DefineJSONToXMLConverter:
         Returns:
             Set of method OIDs that should be created as top-level MethodDef elements
         """
-        referenced = set()
-        json_data = getattr(self, '_current_json_data', {})
+        # Imported here: define_json.utils imports this module via its CLI
+        from ..utils.references import ReferenceIndex
         
-        # Check top-level items
-        for item in json_data.get('items', []):
-            # Check both methodOID (Define-XML attribute) and method (inferred field)
-            method_oid = item.get('methodOID') or item.get('method')
-            if method_oid:
-                referenced.add(method_oid)
-        
-        # Use flattened ItemGroups if available (after _process_item_groups_and_value_lists)
-        # This ensures we check ValueLists that were nested in JSON
+        json_data = getattr(self, '_current_json_data', {})
         item_groups_to_check = getattr(self, '_flattened_item_groups', json_data.get('itemGroups', []))
         
-        # Check items within ItemGroups (now using flattened list which includes ValueLists)
-        for ig in item_groups_to_check:
-            for item in ig.get('items', []):
-                # Check both methodOID (Define-XML attribute) and method (inferred field)
-                method_oid = item.get('methodOID') or item.get('method')
-                if method_oid:
-                    referenced.add(method_oid)
+        # Index top-level items plus the flattened ItemGroups (after _process_item_groups_and_value_lists,
+        # nested ValueLists live in the flattened list rather than in their parents' slices).
+        # Check both methodOID (Define-XML attribute) and method (inferred field)
+        index = ReferenceIndex({'items': json_data.get('items', []), 'itemGroups': item_groups_to_check})
+        referenced = index.referenced_by_field(('methodOID', 'method'), kind='item')
         
         logger.info(f"Collected {len(referenced)} referenced method OIDs from {len(item_groups_to_check)} ItemGroups")
         
@@ -2645,16 +2649,16 @@ class DefineJSONToXMLConverter:
         Uses minidom for pretty printing but preserves significant whitespace
         in text nodes by avoiding toprettyxml's text reformatting.
         """
-        # Convert to string
-        xml_str = ET.tostring(root, encoding='unicode')
-        
         # Write directly without minidom pretty printing to preserve text whitespace
         # The original XML formatting is already preserved from the serialized containers
         with open(output_path, 'w', encoding='utf-8') as f:
-            f.write('<?xml version="1.0" encoding="utf-8"?>\n')
-            f.write(xml_str)
+            f.write(self.to_xml_string(root))
         
         logger.info(f"Written Define-XML to {output_path}")
+    
+    def to_xml_string(self, root: ET.Element) -> str:
+        """Serialize a tree from convert() exactly as convert_file() writes it."""
+        return '<?xml version="1.0" encoding="utf-8"?>\n' + ET.tostring(root, encoding='unicode')
 
 
 def main():
@@ -13,20 +13,36 @@ from .ir import (
     enforce_slice_invariants,
     register_variables,
     project_valuelist_for_domain,
+    IRIndex,
+    get_ir_index,
+    invalidate_ir_index,
     serialize_canonical,
+    write_canonical,
+    canonical_digest,
     export_define_xml_21,
     export_define_xml_10,
 )
+from .config_loader import load_yaml, clear_config_cache
+from .ir_store import CanonicalStore
+from .ir_diff import build_merkle_tree, diff_merkle, diff_mdv
+from .ir_session import IRSession
+from .ir_snapshot import save_snapshot, load_snapshot, StaleSnapshotError
+from .mdv_index import MDVIndex
+from .references import ReferenceIndex, prune_unreferenced
 from .sdmx import (
     load_data_cube_config,
     load_sdmx_policy,
     classify_item_role,
     build_dsd_for_domain,
+    build_dsds,
     validate_dsd_completeness,
     is_clean_whereclause,
     derive_groupkey_from_whereclause,
+    derive_groupkeys,
     analyze_attribute_variance,
+    analyze_attribute_variances,
     infer_attribute_relationships,
+    suggest_attribute_config,
 )
 
 __all__ = [
@@ -41,17 +57,41 @@ __all__ = [
     "enforce_slice_invariants",
     "register_variables",
     "project_valuelist_for_domain",
+    "IRIndex",
+    "get_ir_index",
+    "invalidate_ir_index",
     "serialize_canonical",
+    "write_canonical",
+    "canonical_digest",
     "export_define_xml_21",
     "export_define_xml_10",
+    "CanonicalStore",
+    "build_merkle_tree",
+    "diff_merkle",
+    "diff_mdv",
+    "IRSession",
+    "save_snapshot",
+    "load_snapshot",
+    "StaleSnapshotError",
+    # Document index
+    "MDVIndex",
+    "ReferenceIndex",
+    "prune_unreferenced",
+    # Config loading
+    "load_yaml",
+    "clear_config_cache",
     # SDMX utilities
     "load_data_cube_config",
     "load_sdmx_policy",
     "classify_item_role",
     "build_dsd_for_domain",
+    "build_dsds",
     "validate_dsd_completeness",
     "is_clean_whereclause",
     "derive_groupkey_from_whereclause",
+    "derive_groupkeys",
     "analyze_attribute_variance",
+    "analyze_attribute_variances",
     "infer_attribute_relationships",
+    "suggest_attribute_config",
 ]
@@ -5,6 +5,7 @@ Provides a clean CLI for XML ↔ JSON conversion and validation.
 """
 
 import argparse
+import json
 import sys
 from pathlib import Path
 from typing import Optional
@@ -14,6 +15,10 @@ from ..converters.json_to_xml import DefineJSONToXMLConverter
 from ..converters.html_generator import DefineHTMLGenerator, json_to_html
 from ..validation.roundtrip import run_roundtrip_test, validate_true_roundtrip, run_true_roundtrip_test
 from ..validation.schema import validate_define_json
+from .mdv_index import MDVIndex
+from .references import PRUNABLE_COLLECTIONS, prune_unreferenced
+
+QUERY_KINDS = ['item', 'var', 'domain', 'codelist', 'where', 'method', 'comment', 'stats']
 
 
 def create_cli_parser() -> argparse.ArgumentParser:
@@ -38,6 +43,15 @@ Examples:
   # Convert JSON to HTML (no CORS issues!)
   define-json json2html define.json output.html
   
+  # Render JSON to HTML natively, without XSLT (fast for large defines)
+  define-json json2html define.json output.html --native
+  
+  # Split HTML for huge defines: index page plus parts loaded on demand
+  define-json json2html define.json output.html --split
+  
+  # Native HTML without the search box and index
+  define-json json2html define.json output.html --native --no-search
+  
   # Convert XML to HTML (no CORS issues!)
   define-json xml2html define.xml output.html
   
@@ -46,6 +60,13 @@ Examples:
   
   # Validate JSON schema
   define-json validate define.json
+  
+  # Query a Define-JSON (item, var, domain, codelist, where, method, comment, stats)
+  define-json query define.json var VS VSORRES
+  define-json query define.json where IT.VS.VSTESTCD TEMP
+  
+  # Drop unreferenced codelists, methods, comments, where clauses and conditions
+  define-json prune define.json pruned.json
         """
     )
     
@@ -73,6 +94,13 @@ Examples:
     json2html_parser.add_argument('input', type=Path, help='Input Define-JSON file')
     json2html_parser.add_argument('output', type=Path, help='Output HTML file')
     json2html_parser.add_argument('--xsl', type=Path, help='Custom XSL stylesheet path (optional)')
+    json2html_parser.add_argument('--native', action='store_true',
+                                  help='Render directly from Define-JSON without XSLT (faster for large defines)')
+    json2html_parser.add_argument('--split', action='store_true',
+                                  help='Natively render an index page with datasets, codelists and analysis '
+                                       'displays loaded on demand (for very large defines)')
+    json2html_parser.add_argument('--no-search', dest='search', action='store_false',
+                                  help='With --native or --split, do not write a search index')
     
     # XML to HTML conversion
     xml2html_parser = subparsers.add_parser('xml2html', help='Convert Define-XML to HTML using XSL transformation')
@@ -94,9 +122,94 @@ Examples:
     validate_parser = subparsers.add_parser('validate', help='Validate Define-JSON schema')
     validate_parser.add_argument('input', type=Path, help='Define-JSON file to validate')
     
+    # Indexed queries
+    query_parser = subparsers.add_parser('query', help='Look up items, datasets, codelists, where clauses, methods or comments')
+    query_parser.add_argument('input', type=Path, help='Define-JSON file to query')
+    query_parser.add_argument('kind', choices=QUERY_KINDS, help='What to look up')
+    query_parser.add_argument('terms', nargs='*', help='Lookup keys (e.g. OID, or DOMAIN NAME for var)')
+    
+    # Unreferenced-object pruning
+    prune_parser = subparsers.add_parser('prune', help='Remove unreferenced codelists, methods, comments, where clauses and conditions')
+    prune_parser.add_argument('input', type=Path, help='Input Define-JSON file')
+    prune_parser.add_argument('output', type=Path, help='Output Define-JSON file')
+    prune_parser.add_argument('--kinds', nargs='+', choices=sorted(PRUNABLE_COLLECTIONS.values()),
+                              help='Only prune these kinds (default: all)')
+    prune_parser.add_argument('--keep', nargs='+', default=[], metavar='OID',
+                              help='OIDs that must never be removed')
+    
     return parser
 
 
+def run_query(index: MDVIndex, kind: str, terms: list):
+    """Answer one query against an MDVIndex; returns JSON-serialisable data or None."""
+    if kind == 'stats':
+        return index.stats()
+    if kind == 'var':
+        if len(terms) != 2:
+            raise ValueError("var expects DOMAIN NAME")
+        return index.items_named(terms[0], terms[1]) or None
+    if kind == 'where':
+        if len(terms) not in (1, 2):
+            raise ValueError("where expects ITEM_OID [VALUE]")
+        return index.where_clauses_for(terms[0], terms[1] if len(terms) == 2 else None) or None
+    if len(terms) != 1:
+        raise ValueError(f"{kind} expects a single key")
+    key = terms[0]
+    if kind == 'domain':
+        groups = index.item_groups_for(key)
+        return [
+            {'OID': ig.get('OID'), 'name': ig.get('name'), 'items': len(ig.get('items') or [])}
+            for ig in groups
+        ] or None
+    lookup = {
+        'item': index.item,
+        'codelist': index.code_list,
+        'method': index.method,
+        'comment': index.comment,
+    }[kind]
+    return lookup(key)
+
+
+def cmd_query(args) -> int:
+    """Answer an indexed query against a Define-JSON file."""
+    try:
+        index = MDVIndex.from_file(args.input)
+        result = run_query(index, args.kind, args.terms)
+        if result is None:
+            print(f"Not found: {args.kind} {' '.join(args.terms)}", file=sys.stderr)
+            return 1
+        print(json.dumps(result, indent=2, ensure_ascii=False, default=str))
+        return 0
+    except Exception as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+
+
+def cmd_prune(args) -> int:
+    """Remove unreferenced objects from a Define-JSON file."""
+    try:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        target = data
+        if isinstance(data, dict) and 'metaDataVersion' in data:
+            mdv = data['metaDataVersion']
+            target = mdv[0] if isinstance(mdv, list) and mdv else mdv
+        
+        removed = prune_unreferenced(target, kinds=args.kinds, keep=args.keep)
+        
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        
+        total = sum(len(oids) for oids in removed.values())
+        print(f"Pruned {total} unreferenced objects: {args.input} → {args.output}")
+        for kind, oids in sorted(removed.items()):
+            print(f"  {kind}: {len(oids)}")
+        return 0
+    except Exception as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+
+
 def cmd_xml2json(args) -> int:
     """Convert XML to JSON."""
     try:
@@ -137,12 +250,21 @@ def cmd_json2html(args) -> int:
     """Convert JSON to HTML using XSL transformation."""
     try:
         converter = DefineHTMLGenerator()
-        result = converter.json_to_html(args.input, args.output, args.xsl)
+        if args.native or args.split:
+            result = converter.json_to_native_html(args.input, args.output, split=args.split,
+                                                   search=args.search)
+        else:
+            result = converter.json_to_html(args.input, args.output, args.xsl)
         
         if result['success']:
             print(f"Converted: {args.input} -> {args.output}")
             if args.output.exists():
                 print(f"Size: {args.output.stat().st_size:,} bytes")
+            if args.split:
+                print(f"Parts: {result['parts']} in {result['parts_dir']} "
+                      f"({result['written']} written, {result['unchanged']} unchanged)")
+            if result.get('search_path'):
+                print(f"Search index: {result['search_path']}")
             print(f"Open in browser: file://{args.output.absolute()}")
             return 0
         else:
@@ -305,6 +427,10 @@ def main(argv: Optional[list] = None) -> int:
         return cmd_test_roundtrip(args)
     elif args.command == 'validate':
         return cmd_validate(args)
+    elif args.command == 'query':
+        return cmd_query(args)
+    elif args.command == 'prune':
+        return cmd_prune(args)
     else:
         print(f"Unknown command: {args.command}", file=sys.stderr)
         return 1
@@ -0,0 +1,118 @@
+"""
+Shared, cached YAML loading for data cube configurations and example data.
+
+Every YAML file read through load_yaml() is parsed once per process (per
+modification time): parsing uses libyaml's CSafeLoader when PyYAML was built
+with it, and the parsed (and validated) result is kept in an LRU cache keyed
+by path, mtime and size. Each call returns a fresh copy, so callers may
+modify what they get.
+
+Batch jobs that run many processes can also keep parsed files on disk: pass
+``cache_dir`` or set ``DEFINE_JSON_CONFIG_CACHE`` to a directory. Entries are
+pickles, so only point it at a directory you trust.
+
+Usage:
+    config = load_yaml("configs/laboratory_cube.yaml")
+    config = load_yaml(path, validator=check_config)   # validated once, then cached
+"""
+
+import hashlib
+import os
+import pickle
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as _SafeLoader
+    LIBYAML_AVAILABLE = True
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+    LIBYAML_AVAILABLE = False
+
+CACHE_DIR_ENV = "DEFINE_JSON_CONFIG_CACHE"
+CACHE_SIZE = 128
+
+_DISK_FORMAT = 1
+_PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+Validator = Callable[[Any], None]
+
+
+def load_yaml(
+    path: Union[str, Path],
+    validator: Optional[Validator] = None,
+    cache_dir: Optional[Union[str, Path]] = None,
+) -> Any:
+    """
+    Load a YAML file through the shared cache.
+
+    Args:
+        path: YAML file
+        validator: Called with the parsed data on a cache miss; raise to
+            reject it (rejected files are not cached)
+        cache_dir: Directory for the on-disk cache (default: the
+            ``DEFINE_JSON_CONFIG_CACHE`` environment variable, if set)
+
+    Returns:
+        A fresh copy of the parsed data
+    """
+    resolved = Path(path).resolve()
+    stat = resolved.stat()
+    cache_dir = cache_dir if cache_dir is not None else os.environ.get(CACHE_DIR_ENV)
+    payload = _load_payload(
+        str(resolved), stat.st_mtime_ns, stat.st_size, validator, str(cache_dir) if cache_dir else None
+    )
+    return pickle.loads(payload)
+
+
+def clear_config_cache() -> None:
+    """Drop every in-process cache entry (the on-disk cache is left alone)."""
+    _load_payload.cache_clear()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _load_payload(
+    path: str,
+    mtime_ns: int,
+    size: int,
+    validator: Optional[Validator],
+    cache_dir: Optional[str],
+) -> bytes:
+    """Pickled parse of one version of a file; the arguments are the cache key."""
+    disk_path = None
+    if cache_dir:
+        validator_name = f"{validator.__module__}.{validator.__qualname__}" if validator else ""
+        digest = hashlib.sha256(
+            f"{_DISK_FORMAT}|{path}|{mtime_ns}|{size}|{validator_name}".encode("utf-8")
+        ).hexdigest()
+        disk_path = Path(cache_dir) / f"{digest}.pickle"
+        try:
+            return disk_path.read_bytes()
+        except OSError:
+            pass
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.load(f, Loader=_SafeLoader)
+    if validator is not None:
+        validator(data)
+    payload = pickle.dumps(data, protocol=_PICKLE_PROTOCOL)
+
+    if disk_path is not None:
+        try:
+            disk_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = disk_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_bytes(payload)
+            os.replace(tmp_path, disk_path)
+        except OSError:
+            pass  # the disk cache is best effort
+    return payload
+
+
+__all__ = [
+    "load_yaml",
+    "clear_config_cache",
+    "LIBYAML_AVAILABLE",
+]
@@ -16,6 +16,7 @@ from ..schema.define import (
     DataAttribute,
     DataType
 )
+from .config_loader import load_yaml
 
 
 class CubeConfigConverter:
@@ -48,8 +49,7 @@ class CubeConfigConverter:
     @classmethod
     def load_yaml_config(cls, config_path: str) -> Dict[str, Any]:
         """Load a YAML cube configuration file"""
-        with open(config_path, 'r') as f:
-            return yaml.safe_load(f)
+        return load_yaml(config_path)
     
     @classmethod
     def yaml_to_schema(
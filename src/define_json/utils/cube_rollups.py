@@ -0,0 +1,363 @@
+"""
+Materialised rollup aggregates for data cubes.
+
+CubeRollups aggregates a data cube (a DataCubeEngine.datacube_df-style frame)
+once over a set of dimension subsets - test, test x visit, test x arm, ... -
+and answers summary queries from those aggregates instead of rescanning the
+observations.
+
+Every aggregate is mergeable, so rollups combine without the raw data:
+- row count, measure count, min and max
+- mean and sum of squared deviations (merged with Chan's parallel formula,
+  which avoids the cancellation of sum / sum-of-squares)
+- a quantile sketch: log-spaced buckets (DDSketch-style) whose quantiles are
+  within ``relative_accuracy`` of the true value
+
+Aggregates are kept per partition of the subjects (by hash of the subject
+identifier). Appending observations aggregates only the new rows and merges
+them into the partitions they fall in; finished rollups are cached and
+recombined from the partitions only when a query needs them. A dimension
+subset that was not materialised is rolled up from the smallest materialised
+superset.
+
+Usage:
+    rollups = CubeRollups(engine.datacube_df)
+    rollups.query(("test", "visit"))       # count, mean, std, min, p25, ... per group
+    rollups.append(new_observations)
+"""
+
+from typing import Dict, FrozenSet, Iterable, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+Dims = Tuple[str, ...]
+
+DEFAULT_ROLLUPS: Tuple[Dims, ...] = (
+    (),
+    ("subject",),
+    ("test",),
+    ("sex",),
+    ("arm",),
+    ("test", "visit"),
+    ("test", "arm"),
+    ("test", "sex"),
+)
+
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75)
+
+_PARTITION = "_partition"
+
+
+class CubeRollups:
+    """
+    Partitioned, mergeable rollup aggregates of one measure of a data cube.
+
+    Args:
+        cube: Observations, one row each, with the dimension columns used by
+            ``rollups``, ``partition_by`` and ``measure``
+        rollups: Dimension subsets to materialise (``()`` is the grand total)
+        measure: Numeric measure column
+        partition_by: Column whose hash assigns rows to partitions
+        n_partitions: Number of partitions
+        relative_accuracy: Relative error bound of sketch quantiles
+
+    Raises:
+        ValueError: If a rollup, partition or measure column is missing
+    """
+
+    def __init__(
+        self,
+        cube: pd.DataFrame,
+        rollups: Iterable[Sequence[str]] = DEFAULT_ROLLUPS,
+        measure: str = "result",
+        partition_by: str = "subject",
+        n_partitions: int = 16,
+        relative_accuracy: float = 0.01,
+    ):
+        self.rollups: List[Dims] = [tuple(dims) for dims in rollups]
+        self.measure = measure
+        self.partition_by = partition_by
+        self.n_partitions = n_partitions
+        self.relative_accuracy = relative_accuracy
+        self._log_gamma = np.log((1 + relative_accuracy) / (1 - relative_accuracy))
+
+        self._require_columns(cube)
+        self._partials: Dict[Dims, pd.DataFrame] = {}
+        self._sketches: Dict[Dims, pd.DataFrame] = {}
+        self._results: Dict[Dims, pd.DataFrame] = {}
+        self._quantiles: Dict[Tuple[Dims, Tuple[float, ...]], pd.DataFrame] = {}
+        self.refreshed_partitions: FrozenSet[int] = frozenset()
+
+        frame = self._prepare(cube)
+        for dims in self.rollups:
+            self._partials[dims], self._sketches[dims] = self._aggregate(frame, dims)
+        self.refreshed_partitions = frozenset(range(n_partitions))
+
+    # ------------------------------------------------------------------
+    # Building and appending
+    # ------------------------------------------------------------------
+
+    def _require_columns(self, cube: pd.DataFrame) -> None:
+        needed = {self.measure, self.partition_by}.union(*map(set, self.rollups))
+        missing = sorted(needed - set(cube.columns))
+        if missing:
+            raise ValueError(f"Columns not found in data cube: {', '.join(missing)}")
+
+    def _prepare(self, cube: pd.DataFrame) -> pd.DataFrame:
+        """Rollup columns plus the partition number and sketch bucket of every row."""
+        columns = sorted(set().union(*map(set, self.rollups)))
+        frame = cube[columns].copy()
+        frame[_PARTITION] = partition_of(cube[self.partition_by], self.n_partitions)
+        values = pd.to_numeric(cube[self.measure], errors="coerce").to_numpy(dtype="float64")
+        frame["_value"] = values
+        magnitude = np.abs(values)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            keys = np.ceil(np.log(magnitude) / self._log_gamma)
+        frame["_sign"] = np.sign(values)
+        frame["_key"] = np.where(magnitude > 0, keys, 0)
+        return frame
+
+    def _aggregate(self, frame: pd.DataFrame, dims: Dims) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Per-partition aggregates and sketch bucket counts of ``frame`` for one rollup."""
+        keys = [_PARTITION, *dims]
+        grouped = frame.groupby(keys, observed=True, dropna=False, sort=False)["_value"]
+        partial = pd.DataFrame({
+            "rows": grouped.size(),
+            "count": grouped.count(),
+            "mean": grouped.mean(),
+            "m2": grouped.var(ddof=0) * grouped.count(),
+            "min": grouped.min(),
+            "max": grouped.max(),
+        }).reset_index()
+
+        valid = frame[frame["_value"].notna()]
+        sketch = (
+            valid.groupby([*keys, "_sign", "_key"], observed=True, dropna=False, sort=False)
+            .size()
+            .rename("n")
+            .reset_index()
+        )
+        return partial, sketch
+
+    def append(self, cube: pd.DataFrame) -> FrozenSet[int]:
+        """
+        Add observations, refreshing only the partitions they fall in.
+
+        Returns:
+            The partitions that were refreshed
+        """
+        self._require_columns(cube)
+        frame = self._prepare(cube)
+        touched = frozenset(int(p) for p in np.unique(frame[_PARTITION]))
+        for dims in self.rollups:
+            self._absorb(dims, [self._aggregate(frame, dims)], touched)
+        self._results.clear()
+        self._quantiles.clear()
+        self.refreshed_partitions = touched
+        return touched
+
+    def _absorb(self, dims: Dims, parts: List[Tuple[pd.DataFrame, pd.DataFrame]], touched: FrozenSet[int]) -> None:
+        """Merge (partial, sketch) aggregates into the ``touched`` partitions of one rollup."""
+        keys = [_PARTITION, *dims]
+        old_partial = self._partials[dims]
+        affected = old_partial[_PARTITION].isin(touched)
+        merged = _combine_stats(pd.concat([old_partial[affected], *(p for p, _ in parts)], ignore_index=True), keys)
+        self._partials[dims] = pd.concat([old_partial[~affected], merged], ignore_index=True)
+
+        old_sketch = self._sketches[dims]
+        affected = old_sketch[_PARTITION].isin(touched)
+        merged = (
+            pd.concat([old_sketch[affected], *(s for _, s in parts)], ignore_index=True)
+            .groupby([*keys, "_sign", "_key"], observed=True, dropna=False, sort=False)["n"]
+            .sum()
+            .reset_index()
+        )
+        self._sketches[dims] = pd.concat([old_sketch[~affected], merged], ignore_index=True)
+
+    @classmethod
+    def merged(cls, parts: Sequence["CubeRollups"]) -> "CubeRollups":
+        """
+        Combine rollups built over disjoint sets of observations (e.g. shards of one cube).
+
+        Raises:
+            ValueError: If the parts do not share rollups, measure, partitioning
+                and sketch accuracy
+        """
+        first, rest = parts[0], list(parts[1:])
+        signature = (first.rollups, first.measure, first.partition_by, first.n_partitions, first.relative_accuracy)
+        for part in rest:
+            if (part.rollups, part.measure, part.partition_by, part.n_partitions, part.relative_accuracy) != signature:
+                raise ValueError("Cannot merge rollups with different rollups, measure or partitioning")
+        combined = cls.__new__(cls)
+        combined.__dict__.update(first.__dict__)
+        combined._partials = dict(first._partials)
+        combined._sketches = dict(first._sketches)
+        combined._results = {}
+        combined._quantiles = {}
+        touched = frozenset(range(first.n_partitions))
+        for dims in first.rollups:
+            combined._absorb(dims, [(p._partials[dims], p._sketches[dims]) for p in rest], touched)
+        combined.refreshed_partitions = touched
+        return combined
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def covers(self, dims: Sequence[str]) -> bool:
+        """Whether a materialised rollup includes all of ``dims``."""
+        wanted = set(dims)
+        return any(wanted.issubset(r) for r in self.rollups)
+
+    def _source(self, dims: Dims) -> Dims:
+        """Smallest materialised rollup whose dimensions include ``dims``."""
+        wanted = set(dims)
+        candidates = [r for r in self.rollups if wanted.issubset(r)]
+        if not candidates:
+            available = ", ".join("(" + ", ".join(r) + ")" for r in self.rollups)
+            raise ValueError(f"No materialised rollup covers ({', '.join(dims)}); available: {available}")
+        return min(candidates, key=len)
+
+    def stats(self, dims: Sequence[str] = ()) -> pd.DataFrame:
+        """
+        Exact aggregates per group of ``dims``.
+
+        Returns:
+            DataFrame indexed by ``dims`` (one row for the grand total) with
+            ``rows``, ``count``, ``mean``, ``std`` (sample), ``min`` and ``max``
+        """
+        dims = tuple(dims)
+        cached = self._results.get(dims)
+        if cached is not None:
+            return cached
+        source = self._partials[self._source(dims)]
+        if dims:
+            combined = _combine_stats(source, list(dims)).set_index(list(dims))
+        else:
+            combined = _combine_stats(source.assign(_all=0), ["_all"]).set_index("_all")
+        count = combined["count"]
+        combined["std"] = np.sqrt(combined["m2"] / (count - 1)).where(count > 1)
+        result = combined[["rows", "count", "mean", "std", "min", "max"]].sort_index()
+        self._results[dims] = result
+        return result
+
+    def quantiles(self, dims: Sequence[str] = (), qs: Sequence[float] = DEFAULT_QUANTILES) -> pd.DataFrame:
+        """
+        Approximate measure quantiles per group of ``dims`` from the sketches.
+
+        Each quantile is within ``relative_accuracy`` of an exact quantile and
+        is clamped to the group's exact min and max.
+        """
+        dims, qs = tuple(dims), tuple(qs)
+        cached = self._quantiles.get((dims, qs))
+        if cached is not None:
+            return cached
+        stats = self.stats(dims)
+        group_keys = list(dims) or ["_all"]
+        sketch = self._sketches[self._source(dims)]
+        if not dims:
+            sketch = sketch.assign(_all=0)
+        buckets = (
+            sketch.groupby([*group_keys, "_sign", "_key"], observed=True, dropna=False)["n"]
+            .sum()
+            .reset_index()
+        )
+        # Value order: negative buckets by decreasing magnitude, zero, positive buckets
+        buckets["_order"] = buckets["_sign"] * buckets["_key"] + buckets["_sign"] * 1e9
+        buckets = buckets.sort_values([*group_keys, "_order"], kind="stable")
+        gamma = np.exp(self._log_gamma)
+        buckets["_value"] = buckets["_sign"] * 2 * np.power(gamma, buckets["_key"]) / (gamma + 1)
+        buckets["_cumulative"] = buckets.groupby(group_keys, observed=True, dropna=False)["n"].cumsum()
+
+        totals = stats["count"].rename("_total").reset_index()
+        buckets = buckets.merge(totals, on=group_keys, how="left")
+        result = pd.DataFrame(index=stats.index)
+        total = buckets["_total"]
+
+        def value_at(rank: pd.Series) -> pd.Series:
+            """Bucket value of the observation at 0-based ``rank`` in each group."""
+            hit = buckets[buckets["_cumulative"] > rank]
+            first = hit.groupby(group_keys, observed=True, dropna=False)["_value"].first()
+            return first.reindex(result.index).clip(lower=stats["min"], upper=stats["max"])
+
+        for q in qs:
+            # Linear interpolation between neighbouring ranks, as pandas does
+            rank = q * (total - 1)
+            lower, upper = np.floor(rank), np.minimum(np.ceil(rank), total - 1)
+            low, high = value_at(lower), value_at(upper)
+            fraction = (rank - lower).groupby([buckets[k] for k in group_keys], observed=True, dropna=False).first()
+            value = low + (high - low) * fraction.reindex(result.index)
+            # The extreme ranks are the exact min and max
+            if q == 0:
+                value = stats["min"]
+            elif q == 1:
+                value = stats["max"]
+            result[_quantile_label(q)] = value
+        self._quantiles[(dims, qs)] = result
+        return result
+
+    def query(self, dims: Sequence[str] = (), qs: Sequence[float] = DEFAULT_QUANTILES) -> pd.DataFrame:
+        """Exact aggregates and approximate quantiles per group of ``dims``."""
+        return self.stats(dims).join(self.quantiles(dims, qs))
+
+    def value_counts(self, dim: str) -> pd.Series:
+        """Observation count per value of ``dim`` (missing values excluded), largest first."""
+        rows = self.stats((dim,))["rows"]
+        rows = rows[rows.index.notna()]
+        return rows.sort_values(ascending=False, kind="stable")
+
+    def describe(self, dims: Sequence[str] = ()) -> Dict[str, float]:
+        """pandas ``describe()``-style summary of the measure (grand total by default)."""
+        row = self.query(dims).iloc[0]
+        labels = ["count", "mean", "std", "min", *map(_quantile_label, DEFAULT_QUANTILES), "max"]
+        return {label: float(row[label]) for label in labels}
+
+
+def partition_of(values: pd.Series, n_partitions: int) -> np.ndarray:
+    """Partition number (stable hash modulo ``n_partitions``) per value; hashes each distinct value once."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    hashes = pd.util.hash_array(np.asarray(uniques, dtype=object)) % np.uint64(n_partitions)
+    return hashes.astype(np.int64)[codes]
+
+
+def _quantile_label(q: float) -> str:
+    return f"{q * 100:g}%"
+
+
+def _combine_stats(partials: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    """Merge aggregate rows that share ``keys`` (Chan et al. for mean and m2)."""
+    grouped = partials.groupby(keys, observed=True, dropna=False, sort=False)
+    count = grouped["count"].transform("sum")
+    weighted = (partials["mean"].fillna(0) * partials["count"]).groupby(
+        [partials[k] for k in keys], observed=True, dropna=False, sort=False
+    ).transform("sum")
+    mean = weighted / count.where(count > 0)
+    spread = partials["m2"].fillna(0) + partials["count"] * (partials["mean"].fillna(0) - mean.fillna(0)) ** 2
+    work = partials[keys].assign(
+        rows=partials["rows"],
+        count=partials["count"],
+        mean=partials["mean"].fillna(0) * partials["count"],
+        m2=spread,
+        min=partials["min"],
+        max=partials["max"],
+    )
+    combined = work.groupby(keys, observed=True, dropna=False, sort=False).agg(
+        rows=("rows", "sum"),
+        count=("count", "sum"),
+        mean=("mean", "sum"),
+        m2=("m2", "sum"),
+        min=("min", "min"),
+        max=("max", "max"),
+    )
+    counts = combined["count"]
+    combined["mean"] = (combined["mean"] / counts).where(counts > 0)
+    combined["m2"] = combined["m2"].where(counts > 0)
+    return combined.reset_index()
+
+
+__all__ = [
+    "CubeRollups",
+    "DEFAULT_ROLLUPS",
+    "partition_of",
+]
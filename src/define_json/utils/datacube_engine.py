@@ -3,11 +3,54 @@ Data Cube Engine for SDTM to Data Cube Transformation
 Generic engine that loads configurations and examples to create data cubes
 """
 
-import yaml
+import json
+import os
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Sequence, Tuple
+from pandas.api.types import union_categoricals
+
+from .config_loader import load_yaml
+from .cube_rollups import CubeRollups, DEFAULT_ROLLUPS, partition_of
+from .series_keys import SeriesKeyCodec
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    pa = None
+    pq = None
+
+SUBJECT_VARIABLE = 'USUBJID'
+MEASUREMENT_DOMAINS = ('VS', 'LB')
+
+# Data cube column for each DM variable, and for each measurement-domain
+# variable without its two-letter domain prefix (LBORRES -> ORRES)
+DM_COLUMNS = {'AGE': 'age', 'SEX': 'sex', 'RACE': 'race', 'ARM': 'arm'}
+DOMAIN_COLUMNS = {'VISIT': 'visit', 'ORRES': 'result', 'ORRESU': 'unit', 'DTC': 'date'}
+OUTPUT_COLUMNS = ['subject', 'age', 'sex', 'race', 'visit', 'test', 'result', 'unit', 'arm', 'date']
+# Dimensions identifying a series of observations, in key order
+SERIES_DIMENSIONS = ('subject', 'visit', 'test')
+
+# Numeric columns (parsed when the cube is built); every other column is
+# stored as a pandas categorical (dictionary-encoded in Arrow/Parquet)
+NUMERIC_COLUMNS = ('age', 'result')
+CATEGORICAL_COLUMNS = tuple(c for c in OUTPUT_COLUMNS if c not in NUMERIC_COLUMNS)
+
+DEFAULT_CHUNKSIZE = 250_000
+
+STANDARD_TEST_NAMES = {
+    'SYSBP': 'Systolic BP',
+    'DIABP': 'Diastolic BP',
+    'PULSE': 'Pulse Rate',
+    'TEMP': 'Temperature',
+    'HEIGHT': 'Height',
+    'WEIGHT': 'Weight'
+}
 
 
 class DataCubeEngine:
@@ -20,27 +63,31 @@ class DataCubeEngine:
         self.components = {}
         self.dsd = None
         self.datacube_df = None
+        self.rollups = None
+        self._build_domain = None
+        self._dm_lookup = None
+        self._summary = None
         
     def load_config(self, config_path: str) -> None:
         """Load a data cube configuration file"""
-        with open(config_path, 'r') as f:
-            self.config = yaml.safe_load(f)
-        
-        # Extract configuration sections
-        self.items = self.config.get('items', {})
-        self.components = self.config.get('components', {})
-        self.dsd = self.config.get('data_structure_definition', {})
-        self.data_mapping = self.config.get('data_mapping', {})
+        self._apply_config(load_yaml(config_path))
         
         print(f"✅ Loaded configuration: {self.config.get('name', 'Unknown')}")
         print(f"   • Items: {len(self.items)}")
         print(f"   • Components: {len(self.components)}")
         print(f"   • Data Structure Definition: {self.dsd.get('name', 'Unknown')}")
     
+    def _apply_config(self, config: Dict[str, Any]) -> None:
+        """Extract configuration sections"""
+        self.config = config
+        self.items = config.get('items', {})
+        self.components = config.get('components', {})
+        self.dsd = config.get('data_structure_definition', {})
+        self.data_mapping = config.get('data_mapping', {})
+    
     def load_example_data(self, example_path: str) -> None:
         """Load example SDTM data from YAML file"""
-        with open(example_path, 'r') as f:
-            self.sdtm_data = yaml.safe_load(f)
+        self.sdtm_data = load_yaml(example_path)
         
         # Convert to DataFrames
         for domain, data in self.sdtm_data.items():
@@ -53,113 +100,329 @@ class DataCubeEngine:
                 print(f"   • {domain}: {len(df)} records")
     
     def build_datacube(self) -> pd.DataFrame:
-        """Transform SDTM data to data cube format using configuration"""
+        """
+        Transform SDTM data to data cube format using configuration.
+
+        The measurement domain is joined to DM on USUBJID in a single merge
+        (the first DM record of each subject is used; measurements without a
+        DM record are dropped). The domains and variables taken from each are
+        those listed in the configuration's ``data_mapping``.
+        """
         if not self.config or not self.sdtm_data:
             raise ValueError("Configuration and data must be loaded first")
-        
-        observations = []
-        
-        # Get the main measurement domain (VS or LB) - handle both with and without sdtm_ prefix
-        measurement_domains = ['VS', 'LB', 'sdtm_vs', 'sdtm_lb']
-        measurement_domain = None
-        for domain in measurement_domains:
-            if domain in self.sdtm_data:
-                measurement_domain = domain
-                break
-        
-        if not measurement_domain:
+
+        domain, measurements = self._measurement_domain()
+        if measurements is None:
             raise ValueError("No measurement domain (VS or LB) found in data")
-        
-        # Get DM domain for demographics - handle both with and without sdtm_ prefix
-        dm_df = self.sdtm_data.get('DM', pd.DataFrame())
-        if dm_df.empty:
-            dm_df = self.sdtm_data.get('sdtm_dm', pd.DataFrame())
-        
-        # Process measurement domain
-        if measurement_domain in ['VS', 'sdtm_vs']:
-            observations = self._process_vital_signs(dm_df)
-        elif measurement_domain in ['LB', 'sdtm_lb']:
-            observations = self._process_laboratory(dm_df)
-        
-        self.datacube_df = pd.DataFrame(observations)
+        self._build_domain = domain
+        self._dm_lookup = self._demographics(self._domain_data('DM'))
+        self.datacube_df = self._build_partition(domain, measurements, self._dm_lookup)
+        self.rollups = None
+        self._summary = None
         return self.datacube_df
-    
-    def _process_vital_signs(self, dm_df: pd.DataFrame) -> List[Dict]:
-        """Process vital signs data"""
-        # Get VS data - handle both with and without sdtm_ prefix
-        vs_df = self.sdtm_data.get('VS', pd.DataFrame())
-        if vs_df.empty:
-            vs_df = self.sdtm_data.get('sdtm_vs', pd.DataFrame())
-        
-        observations = []
-        
-        for _, vs_record in vs_df.iterrows():
-            # Get corresponding DM record
-            dm_record = dm_df[dm_df['USUBJID'] == vs_record['USUBJID']]
-            if dm_record.empty:
-                continue
-            dm_record = dm_record.iloc[0]
-            
-            # Map test codes to test names
-            test_mapping = {
-                'SYSBP': 'Systolic BP',
-                'DIABP': 'Diastolic BP',
-                'PULSE': 'Pulse Rate',
-                'TEMP': 'Temperature',
-                'HEIGHT': 'Height',
-                'WEIGHT': 'Weight'
-            }
-            
-            test_name = test_mapping.get(vs_record['VSTESTCD'], vs_record['VSTESTCD'])
-            
-            observation = {
-                'subject': vs_record['USUBJID'],
-                'age': dm_record.get('AGE', None),
-                'sex': dm_record.get('SEX', None),
-                'race': dm_record.get('RACE', None),
-                'visit': vs_record.get('VISIT', None),
-                'test': test_name,
-                'result': vs_record.get('VSORRES', None),
-                'unit': vs_record.get('VSORRESU', None),
-                'arm': dm_record.get('ARM', None),
-                'date': vs_record.get('VSDTC', None)
-            }
-            observations.append(observation)
-        
-        return observations
-    
-    def _process_laboratory(self, dm_df: pd.DataFrame) -> List[Dict]:
-        """Process laboratory data"""
-        # Get LB data - handle both with and without sdtm_ prefix
-        lb_df = self.sdtm_data.get('LB', pd.DataFrame())
-        if lb_df.empty:
-            lb_df = self.sdtm_data.get('sdtm_lb', pd.DataFrame())
-        
-        observations = []
-        
-        for _, lb_record in lb_df.iterrows():
-            # Get corresponding DM record
-            dm_record = dm_df[dm_df['USUBJID'] == lb_record['USUBJID']]
-            if dm_record.empty:
-                continue
-            dm_record = dm_record.iloc[0]
-            
-            observation = {
-                'subject': lb_record['USUBJID'],
-                'age': dm_record.get('AGE', None),
-                'sex': dm_record.get('SEX', None),
-                'race': dm_record.get('RACE', None),
-                'visit': lb_record.get('VISIT', None),
-                'test': lb_record.get('LBTEST', lb_record['LBTESTCD']),
-                'result': lb_record.get('LBORRES', None),
-                'unit': lb_record.get('LBORRESU', None),
-                'arm': dm_record.get('ARM', None),
-                'date': lb_record.get('LBDTC', None)
-            }
-            observations.append(observation)
-        
-        return observations
-    
+
+    def build_datacube_parallel(
+        self,
+        workers: Optional[int] = None,
+        shards: Optional[int] = None,
+        rollups: Optional[Iterable[Sequence[str]]] = None,
+        **rollup_options,
+    ) -> pd.DataFrame:
+        """
+        Build the data cube and its rollups on several cores.
+
+        Measurement records and DM are sharded by a hash of USUBJID, so every
+        subject's records and its DM record land in the same shard. Each worker
+        process builds its shard of the cube exactly as build_datacube() does
+        and materialises the rollups for it; the shards are then concatenated
+        (in the original record order) and their rollups merged.
+
+        Args:
+            workers: Worker processes (default: CPU count); 1 builds in-process
+            shards: Number of shards (default: one per worker; hashing keeps
+                them evenly sized)
+            rollups: Dimension subsets to materialise (default: DEFAULT_ROLLUPS)
+            **rollup_options: Passed to CubeRollups
+
+        Returns:
+            The data cube, identical to build_datacube(); ``rollups`` is set too
+        """
+        if not self.config or not self.sdtm_data:
+            raise ValueError("Configuration and data must be loaded first")
+        domain, measurements = self._measurement_domain()
+        if measurements is None:
+            raise ValueError("No measurement domain (VS or LB) found in data")
+        dm_df = self._domain_data('DM')
+        if dm_df is None:
+            dm_df = pd.DataFrame(columns=[SUBJECT_VARIABLE])
+
+        workers = workers or os.cpu_count() or 1
+        shards = shards or workers
+        rollups = [tuple(dims) for dims in (rollups or DEFAULT_ROLLUPS)]
+        measurement_shards = partition_of(measurements[SUBJECT_VARIABLE], shards)
+        dm_shards = partition_of(dm_df[SUBJECT_VARIABLE], shards)
+        tasks = []
+        for shard in range(shards):
+            positions = np.flatnonzero(measurement_shards == shard)
+            if len(positions):
+                tasks.append((
+                    self.config, domain, measurements.iloc[positions], positions,
+                    dm_df[dm_shards == shard], rollups, rollup_options,
+                ))
+
+        if workers == 1 or len(tasks) <= 1:
+            results = [_build_shard(*task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_build_shard, *zip(*tasks)))
+
+        self._build_domain = domain
+        self._dm_lookup = self._demographics(dm_df)
+        if not results:
+            self.datacube_df = self._build_partition(domain, measurements.iloc[:0], self._dm_lookup)
+            self.rollups = CubeRollups(self.datacube_df, rollups, **rollup_options)
+        else:
+            order = np.argsort(np.concatenate([positions for _, positions, _ in results]), kind='stable')
+            cube = _concat_columnar([part for part, _, _ in results])
+            self.datacube_df = cube.take(order).reset_index(drop=True)
+            self.rollups = CubeRollups.merged([part_rollups for _, _, part_rollups in results])
+        self._summary = None
+        return self.datacube_df
+
+    def encode_series_keys(self, dimensions: Sequence[str] = SERIES_DIMENSIONS) -> Tuple[SeriesKeyCodec, np.ndarray]:
+        """
+        Integer series key of every observation of the built cube.
+
+        Returns:
+            (codec, int64 key per ``datacube_df`` row); use codec.key_values()
+            or codec.series_keys() to obtain ``keyValues`` strings
+        """
+        if self.datacube_df is None:
+            raise ValueError("Data cube must be built first")
+        codec = SeriesKeyCodec.from_frame(self.datacube_df, dimensions)
+        return codec, codec.encode(self.datacube_df)
+
+    def materialize_rollups(self, rollups: Optional[Iterable[Sequence[str]]] = None, **options) -> CubeRollups:
+        """
+        Materialise rollup aggregates of ``result`` over dimension subsets of the built cube.
+
+        Args:
+            rollups: Dimension subsets (default: cube_rollups.DEFAULT_ROLLUPS)
+            **options: Passed to CubeRollups (n_partitions, relative_accuracy, ...)
+        """
+        if self.datacube_df is None:
+            raise ValueError("Data cube must be built first")
+        self.rollups = CubeRollups(self.datacube_df, rollups or DEFAULT_ROLLUPS, **options)
+        self._summary = None
+        return self.rollups
+
+    def append_data(self, measurements: pd.DataFrame) -> pd.DataFrame:
+        """
+        Append measurement-domain records to the built cube.
+
+        The records are joined to the DM lookup of the last build; materialised
+        rollups are refreshed for the affected partitions only.
+
+        Returns:
+            The new data cube rows
+        """
+        if self.datacube_df is None:
+            raise ValueError("Data cube must be built first")
+        added = self._build_partition(self._build_domain, measurements, self._dm_lookup)
+        self.datacube_df = _concat_columnar([self.datacube_df, added])
+        if self.rollups is not None:
+            self.rollups.append(added)
+        self._summary = None
+        return added
+
+    def iter_datacube_chunks(
+        self,
+        source: str,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        domain: Optional[str] = None,
+        dm: Any = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Build the data cube partition by partition from a measurement file.
+
+        Only one partition of measurements is in memory at a time; each is
+        joined against an in-memory DM lookup exactly as build_datacube() does.
+
+        Args:
+            source: CSV, Parquet, Dataset-JSON (.json) or Dataset-JSON NDJSON
+                (.ndjson) file holding the measurement domain
+            chunksize: Measurement rows per partition
+            domain: Measurement domain (default: the first non-DM domain of
+                ``data_mapping``, else inferred from the --TESTCD column)
+            dm: DM data as a DataFrame or a file path (default: the DM
+                domain of the loaded example data)
+
+        Yields:
+            Data cube partitions with the build_datacube() columns
+        """
+        if not self.config:
+            raise ValueError("Configuration must be loaded first")
+        if isinstance(dm, (str, Path)):
+            dm = pd.concat(list(read_domain_chunks(dm, chunksize)), ignore_index=True)
+        elif dm is None:
+            dm = self._domain_data('DM')
+        if dm is not None:
+            dm = _subject_as_text(dm.copy())
+        demographics = self._demographics(dm)
+        domain = domain or next((d for d in self.data_mapping if d != 'DM'), None)
+
+        for chunk in read_domain_chunks(source, chunksize, domain):
+            if domain is None:
+                domain = _infer_domain(chunk)
+            yield self._build_partition(domain, chunk, demographics)
+
+    def build_datacube_chunked(
+        self,
+        source: str,
+        output: str,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        domain: Optional[str] = None,
+        dm: Any = None,
+        format: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Build the data cube out of core, appending each partition to a columnar file.
+
+        Memory is bounded by ``chunksize`` and the DM lookup, not by the size
+        of the study. ``datacube_df`` is left untouched.
+
+        Args:
+            source, chunksize, domain, dm: As for iter_datacube_chunks()
+            output: Output file
+            format: ``parquet`` or ``ipc`` (Arrow IPC file); inferred from the
+                output suffix by default
+
+        Returns:
+            Dict with ``output``, ``format``, ``rows`` and ``partitions``
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required for chunked data cube output. Install with: pip install 'define-json[arrow]'")
+        format = format or ('parquet' if Path(output).suffix.lower() in ('.parquet', '.pq') else 'ipc')
+        if format not in ('parquet', 'ipc'):
+            raise ValueError(f"Unsupported output format '{format}' (expected 'parquet' or 'ipc')")
+
+        schema = pa.schema([(c, pa.float64() if c in NUMERIC_COLUMNS else pa.string()) for c in OUTPUT_COLUMNS])
+        writer = pq.ParquetWriter(output, schema) if format == 'parquet' else pa.ipc.new_file(output, schema)
+        rows = partitions = 0
+        try:
+            for cube in self.iter_datacube_chunks(source, chunksize, domain, dm):
+                table = pa.Table.from_pandas(_conform_partition(cube), schema=schema, preserve_index=False)
+                writer.write_table(table)
+                rows += len(cube)
+                partitions += 1
+        finally:
+            writer.close()
+
+        print(f"✅ Wrote {rows} observations in {partitions} partitions to {output}")
+        return {'output': str(output), 'format': format, 'rows': rows, 'partitions': partitions}
+
+    def to_arrow(self) -> "pa.Table":
+        """
+        The built data cube as an Arrow table.
+
+        Numeric columns are shared with ``datacube_df`` without copying and
+        categorical columns become dictionary arrays over the same codes.
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        if self.datacube_df is None:
+            raise ValueError("Data cube must be built first")
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required for Arrow export. Install with: pip install 'define-json[arrow]'")
+        return pa.Table.from_pandas(self.datacube_df, preserve_index=False)
+
+    def to_parquet(self, path: str) -> None:
+        """Write the built data cube to Parquet, keeping categorical columns dictionary-encoded"""
+        pq.write_table(self.to_arrow(), path)
+
+    def _demographics(self, dm_df: Optional[pd.DataFrame]) -> pd.DataFrame:
+        """DM lookup: cube demographic columns keyed by subject, first record per subject"""
+        if dm_df is None:
+            dm_df = pd.DataFrame(columns=[SUBJECT_VARIABLE])
+        demographics = pd.DataFrame({'subject': dm_df[SUBJECT_VARIABLE]})
+        for var, column in self._mapped_variables('DM', '', DM_COLUMNS, dm_df.columns).items():
+            demographics[column] = dm_df[var] if var in dm_df.columns else None
+        demographics = demographics.drop_duplicates(subset='subject', keep='first')
+        # Encode the small lookup once; the merge carries the categories across
+        for column in demographics.columns.intersection(CATEGORICAL_COLUMNS).drop('subject'):
+            demographics[column] = demographics[column].astype('category')
+        return demographics
+
+    def _build_partition(self, domain: str, measurements: pd.DataFrame, demographics: pd.DataFrame) -> pd.DataFrame:
+        """Data cube rows for (a partition of) the measurement domain joined to the DM lookup"""
+        prefix = domain[:2]
+        domain_vars = self._mapped_variables(domain, prefix, DOMAIN_COLUMNS, measurements.columns)
+        # Units and dates travel with the result even when not mapped explicitly
+        for var in ('ORRESU', 'DTC'):
+            domain_vars.setdefault(prefix + var, DOMAIN_COLUMNS[var])
+
+        obs = pd.DataFrame({'subject': measurements[SUBJECT_VARIABLE], 'test': self._test_names(domain, measurements)})
+        for var, column in domain_vars.items():
+            obs[column] = measurements[var] if var in measurements.columns else None
+
+        cube = obs.merge(demographics, on='subject', how='inner', sort=False)
+        for column in OUTPUT_COLUMNS:
+            if column not in cube.columns:
+                cube[column] = None
+        return _columnar(cube[OUTPUT_COLUMNS].reset_index(drop=True))
+
+    def _domain_data(self, domain: str) -> Optional[pd.DataFrame]:
+        """DataFrame for a domain, stored either as ``VS`` or ``sdtm_vs``"""
+        for key in (domain, f"sdtm_{domain.lower()}"):
+            df = self.sdtm_data.get(key)
+            if isinstance(df, pd.DataFrame) and not df.empty:
+                return df
+        return None
+
+    def _measurement_domain(self) -> Tuple[Optional[str], Optional[pd.DataFrame]]:
+        """First domain of ``data_mapping`` (other than DM) with data, falling back to VS then LB"""
+        candidates = [d for d in self.data_mapping if d != 'DM'] + list(MEASUREMENT_DOMAINS)
+        for domain in candidates:
+            df = self._domain_data(domain)
+            if df is not None:
+                return domain, df
+        return None, None
+
+    def _mapped_variables(self, domain: str, prefix: str, columns: Dict[str, str], available) -> Dict[str, str]:
+        """SDTM variable -> cube column for the variables ``data_mapping`` lists for a domain (default: ``available``)"""
+        variables = {}
+        for name in (self.data_mapping.get(domain) or available):
+            stem = name[len(prefix):] if prefix and name.startswith(prefix) else name
+            column = columns.get(stem) or columns.get(name)
+            if column:
+                variables[name] = column
+        return variables
+
+    def _test_names(self, domain: str, measurements: pd.DataFrame) -> pd.Series:
+        """
+        Test label per measurement.
+
+        Codes mapped to an item in ``data_mapping`` take that item's name, then
+        the standard vital signs labels apply, then the domain's --TEST
+        column, and finally the test code itself.
+        """
+        prefix = domain[:2]
+        codes = measurements[prefix + 'TESTCD']
+        code_items = (self.data_mapping.get(domain) or {}).get(prefix + 'TESTCD') or {}
+        labels = {
+            code: self.items[item_id]['name']
+            for code, item_id in code_items.items()
+            if isinstance(self.items.get(item_id), dict) and 'name' in self.items[item_id]
+        }
+        names = codes.map({**STANDARD_TEST_NAMES, **labels})
+        if prefix + 'TEST' in measurements.columns:
+            names = names.fillna(measurements[prefix + 'TEST'])
+        return names.fillna(codes)
+
     def get_schema_info(self) -> Dict[str, Any]:
         """Get information about the schema transformation"""
         return {
@@ -170,25 +433,201 @@ class DataCubeEngine:
         }
     
     def get_analysis_summary(self) -> Dict[str, Any]:
-        """Get summary statistics for the data cube"""
+        """
+        Get summary statistics for the data cube.
+
+        Served from the materialised rollups (materialising the defaults on
+        first use) and cached until the cube changes; dimensions that custom
+        rollups do not cover are counted from the cube. Quantiles in
+        ``numeric_summary`` come from the rollup sketches and are within their
+        relative accuracy; every other figure is exact.
+        """
         if self.datacube_df is None:
             return {}
-        
-        summary = {
+        if self._summary is not None:
+            return self._summary
+
+        rollups = self.rollups or self.materialize_rollups()
+
+        def value_counts(dim: str) -> pd.Series:
+            if rollups.covers((dim,)):
+                return rollups.value_counts(dim)
+            counts = self.datacube_df[dim].value_counts(sort=False)
+            return counts[counts > 0].sort_values(ascending=False, kind='stable')
+
+        tests = value_counts('test')
+        self._summary = {
             'total_observations': len(self.datacube_df),
-            'unique_subjects': self.datacube_df['subject'].nunique(),
-            'unique_tests': self.datacube_df['test'].nunique(),
-            'tests': self.datacube_df['test'].value_counts().to_dict(),
-            'sex_distribution': self.datacube_df['sex'].value_counts().to_dict() if 'sex' in self.datacube_df.columns else {},
-            'arm_distribution': self.datacube_df['arm'].value_counts().to_dict() if 'arm' in self.datacube_df.columns else {},
-            'numeric_summary': {}
+            'unique_subjects': len(value_counts('subject')),
+            'unique_tests': len(tests),
+            'tests': tests.to_dict(),
+            'sex_distribution': value_counts('sex').to_dict(),
+            'arm_distribution': value_counts('arm').to_dict(),
+            'numeric_summary': rollups.describe()
         }
-        
-        # Add numeric summaries for result column
-        if 'result' in self.datacube_df.columns:
-            summary['numeric_summary'] = self.datacube_df['result'].describe().to_dict()
-        
-        return summary
+        return self._summary
+
+
+def read_domain_chunks(
+    path: str,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    domain: Optional[str] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Read an SDTM domain from disk in partitions of at most ``chunksize`` rows.
+
+    Supported inputs:
+    - ``.csv``: read incrementally with pandas
+    - ``.parquet``: read batch by batch (requires pyarrow)
+    - ``.ndjson``: Dataset-JSON NDJSON (metadata line with ``columns``, then
+      one row array per line), streamed line by line
+    - ``.json``: Dataset-JSON 1.0 (``itemGroupData`` with ``columns``/``items``
+      and ``records``/``itemData``) or 1.1 (``columns`` and ``rows``). The
+      JSON document is parsed whole; use NDJSON for bounded memory.
+
+    USUBJID is always read as text so subjects match DM regardless of format.
+
+    Args:
+        path: Input file
+        chunksize: Rows per partition
+        domain: ItemGroup to read from a multi-dataset Dataset-JSON file
+            (matched on its OID, name, domain or label)
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == '.csv':
+        for chunk in pd.read_csv(path, chunksize=chunksize, dtype={SUBJECT_VARIABLE: str}):
+            yield chunk
+    elif suffix in ('.parquet', '.pq'):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required to read Parquet files. Install with: pip install 'define-json[arrow]'")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield _subject_as_text(batch.to_pandas())
+    elif suffix == '.ndjson':
+        with open(path, 'r', encoding='utf-8') as f:
+            columns = _column_names(json.loads(f.readline()))
+            rows = []
+            for line in f:
+                if line.strip():
+                    rows.append(json.loads(line))
+                if len(rows) >= chunksize:
+                    yield _subject_as_text(pd.DataFrame(rows, columns=columns))
+                    rows = []
+            if rows:
+                yield _subject_as_text(pd.DataFrame(rows, columns=columns))
+    elif suffix == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            columns, rows = _dataset_json_table(json.load(f), domain)
+        for start in range(0, len(rows), chunksize):
+            yield _subject_as_text(pd.DataFrame(rows[start:start + chunksize], columns=columns))
+    else:
+        raise ValueError(f"Unsupported data file '{path}' (expected .csv, .parquet, .json or .ndjson)")
+
+
+def _column_names(metadata: Dict[str, Any]) -> List[str]:
+    columns = metadata.get('columns') or metadata.get('items') or []
+    return [c['name'] for c in columns]
+
+
+def _dataset_json_table(data: Dict[str, Any], domain: Optional[str]) -> Tuple[List[str], List[Any]]:
+    """Column names and row arrays of one dataset in a Dataset-JSON document"""
+    if 'rows' in data:  # Dataset-JSON 1.1
+        return _column_names(data), data['rows']
+    container = data.get('clinicalData') or data.get('referenceData') or {}
+    groups = container.get('itemGroupData') or {}
+    if not groups:
+        raise ValueError("No itemGroupData found in Dataset-JSON")
+    selected = next(iter(groups.values()))
+    if domain:
+        wanted = {domain, f"IG.{domain}"}
+        selected = next(
+            (group for oid, group in groups.items()
+             if oid in wanted or wanted & {group.get('name'), group.get('domain'), group.get('label')}),
+            None,
+        )
+        if selected is None:
+            raise ValueError(f"Dataset {domain} not found in Dataset-JSON")
+    rows = selected.get('records')
+    if rows is None:
+        rows = selected.get('itemData', [])
+    return _column_names(selected), rows
+
+
+def _subject_as_text(df: pd.DataFrame) -> pd.DataFrame:
+    if SUBJECT_VARIABLE in df.columns:
+        subjects = df[SUBJECT_VARIABLE]
+        df[SUBJECT_VARIABLE] = subjects.astype(str).where(subjects.notna())
+    return df
+
+
+def _infer_domain(df: pd.DataFrame) -> str:
+    """Domain of a measurement partition from its --TESTCD column"""
+    for column in df.columns:
+        if len(column) == 8 and column.endswith('TESTCD'):
+            return column[:2]
+    raise ValueError("Cannot infer the measurement domain: no --TESTCD column in data")
+
+
+def _columnar(cube: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parse numeric columns and dictionary-encode the rest.
+
+    Results that are not numbers (e.g. ``<0.5``) become NaN; the cube's
+    ``result`` is a measure, and the original text stays in the SDTM data.
+    """
+    for column in NUMERIC_COLUMNS:
+        cube[column] = pd.to_numeric(cube[column], errors='coerce')
+    for column in CATEGORICAL_COLUMNS:
+        if not isinstance(cube[column].dtype, pd.CategoricalDtype):
+            cube[column] = cube[column].astype('category')
+    return cube
+
+
+def _build_shard(
+    config: Dict[str, Any],
+    domain: str,
+    measurements: pd.DataFrame,
+    positions: np.ndarray,
+    dm_df: pd.DataFrame,
+    rollups: List[Tuple[str, ...]],
+    rollup_options: Dict[str, Any],
+) -> Tuple[pd.DataFrame, np.ndarray, CubeRollups]:
+    """Worker for build_datacube_parallel(): one shard of the cube, its record positions and rollups"""
+    engine = DataCubeEngine()
+    engine._apply_config(config)
+    demographics = engine._demographics(dm_df)
+    cube = engine._build_partition(domain, measurements, demographics)
+    # The inner join keeps, in order, the records whose subject is in DM
+    kept = positions[measurements[SUBJECT_VARIABLE].isin(demographics['subject']).to_numpy()]
+    return cube, kept, CubeRollups(cube, rollups, **rollup_options)
+
+
+def _concat_columnar(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate cube frames, unioning the categories of categorical columns"""
+    combined = pd.concat(frames, ignore_index=True)
+    for column in CATEGORICAL_COLUMNS:
+        if not isinstance(combined[column].dtype, pd.CategoricalDtype):
+            combined[column] = union_categoricals([f[column] for f in frames], sort_categories=True)
+    return combined
+
+
+def _conform_partition(cube: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast a partition to the fixed output schema so every partition appends to the same file.
+
+    Categories differ between partitions (and Arrow IPC files cannot replace
+    dictionaries), so text columns are written as plain strings.
+    """
+    cube = cube.copy()
+    for column in OUTPUT_COLUMNS:
+        if column in NUMERIC_COLUMNS:
+            cube[column] = cube[column].astype('float64')
+        else:
+            values = cube[column].astype('category')
+            # Text per category, with a trailing None that code -1 (missing) selects
+            labels = np.array([str(c) for c in values.cat.categories] + [None], dtype=object)
+            cube[column] = labels[values.cat.codes.to_numpy()]
+    return cube
 
 
 def load_example_config(example_type: str = 'vital_signs') -> DataCubeEngine:
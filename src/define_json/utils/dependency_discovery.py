@@ -0,0 +1,274 @@
+"""
+Functional-dependency discovery for data cube attribute attachment.
+
+Works on real observation data (a pandas DataFrame, or anything with a
+``to_pandas()`` method such as a pyarrow Table) instead of hand-built
+``slice_data`` dicts. For every candidate attribute it finds the minimal sets
+of dimensions that functionally determine it (X → A: rows agreeing on X always
+agree on A) and turns them into ``dimension_level`` / ``measure_level``
+attachment suggestions for a load_data_cube_config()-style configuration.
+
+Algorithm:
+- Every column is factorised once into integer codes (missing values are a
+  value of their own).
+- Partitions of the rows by a set of dimensions are refined level-wise from
+  the partition of its prefix, so each is one vectorised pass, and cached.
+- X → A holds iff refining the partition of X by A adds no groups.
+- Level-wise search (TANE-style) over dimension sets with two prunings:
+  supersets of a determinant found for A are skipped (only minimal
+  determinants are kept), and supersets of a key are skipped.
+- Large inputs are first checked on a random row sample. A dependency that
+  fails on the sample fails on the full data, so only the candidates that
+  survive the sample are verified against every row.
+
+Usage:
+    discovery = DependencyDiscovery(lb_df, dimensions=["USUBJID", "LBTESTCD", "VISITNUM"])
+    discovery.suggest_attachments(attributes=["STUDYID", "LBCAT", "LBSTRESU"], measures=["LBSTRESN"])
+"""
+
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+Partition = Tuple[np.ndarray, int]  # (group id per row, number of groups)
+
+
+def _to_frame(data: Any) -> pd.DataFrame:
+    if isinstance(data, pd.DataFrame):
+        return data
+    if hasattr(data, "to_pandas"):
+        return data.to_pandas()
+    raise TypeError(f"Expected a pandas DataFrame or Arrow table, got {type(data).__name__}")
+
+
+class DependencyDiscovery:
+    """
+    Functional-dependency discovery between cube dimensions and attributes.
+
+    Args:
+        data: Observation data (pandas DataFrame or pyarrow Table)
+        dimensions: Dimension columns, in DSD order
+        sample_size: Rows checked before verifying on the full data; inputs no
+            larger than this are checked directly
+        random_state: Seed for the row sample
+
+    Raises:
+        ValueError: If a dimension column is missing from the data
+    """
+
+    def __init__(
+        self,
+        data: Any,
+        dimensions: Sequence[str],
+        sample_size: int = 100_000,
+        random_state: int = 0,
+    ):
+        self.frame = _to_frame(data)
+        self.dimensions = list(dimensions)
+        self._require_columns(self.dimensions)
+        self.n_rows = len(self.frame)
+
+        self._codes: Dict[str, Tuple[np.ndarray, int]] = {}
+        self._sample: Optional[np.ndarray] = None
+        if self.n_rows > sample_size:
+            rng = np.random.default_rng(random_state)
+            self._sample = np.sort(rng.choice(self.n_rows, size=sample_size, replace=False))
+
+        # Partition caches for the sample (True) and the full data (False)
+        empty_full = (np.zeros(self.n_rows, dtype=np.int64), 1 if self.n_rows else 0)
+        self._partitions: Dict[bool, Dict[Tuple[str, ...], Partition]] = {False: {(): empty_full}, True: {}}
+        if self._sample is not None:
+            self._partitions[True][()] = (np.zeros(len(self._sample), dtype=np.int64), 1)
+
+    # ------------------------------------------------------------------
+    # Partitions
+    # ------------------------------------------------------------------
+
+    def _require_columns(self, columns: Iterable[str]) -> None:
+        missing = [c for c in columns if c not in self.frame.columns]
+        if missing:
+            raise ValueError(f"Columns not found in data: {', '.join(missing)}")
+
+    def _column(self, name: str, sample: bool) -> Tuple[np.ndarray, int]:
+        """Integer codes of a column (full or sampled) and its cardinality."""
+        if name not in self._codes:
+            codes, uniques = pd.factorize(self.frame[name], use_na_sentinel=False)
+            self._codes[name] = (codes.astype(np.int64, copy=False), len(uniques))
+        codes, cardinality = self._codes[name]
+        if sample and self._sample is not None:
+            return codes[self._sample], cardinality
+        return codes, cardinality
+
+    def _partition(self, columns: Tuple[str, ...], sample: bool) -> Partition:
+        """Partition of the rows by ``columns``, refined from its cached prefix."""
+        sample = sample and self._sample is not None
+        cache = self._partitions[sample]
+        cached = cache.get(columns)
+        if cached is not None:
+            return cached
+        parent_ids, _ = self._partition(columns[:-1], sample)
+        codes, cardinality = self._column(columns[-1], sample)
+        ids, uniques = pd.factorize(parent_ids * cardinality + codes)
+        partition = (ids.astype(np.int64, copy=False), len(uniques))
+        cache[columns] = partition
+        return partition
+
+    def _refines(self, lhs: Tuple[str, ...], rhs: str, sample: bool) -> bool:
+        """True if rows agreeing on ``lhs`` agree on ``rhs`` (in the sample or the full data)."""
+        ids, groups = self._partition(lhs, sample)
+        codes, cardinality = self._column(rhs, sample and self._sample is not None)
+        return len(pd.unique(ids * cardinality + codes)) == groups
+
+    def holds(self, lhs: Sequence[str], rhs: str) -> bool:
+        """Check the functional dependency ``lhs → rhs`` (sample first, then every row)."""
+        lhs = tuple(lhs)
+        self._require_columns(lhs + (rhs,))
+        if self._sample is not None and not self._refines(lhs, rhs, sample=True):
+            return False
+        return self._refines(lhs, rhs, sample=False)
+
+    def is_key(self, columns: Sequence[str]) -> bool:
+        """True if ``columns`` identify every row."""
+        columns = tuple(columns)
+        if self._sample is not None:
+            _, groups = self._partition(columns, sample=True)
+            if groups < len(self._sample):
+                return False
+        _, groups = self._partition(columns, sample=False)
+        return groups == self.n_rows
+
+    # ------------------------------------------------------------------
+    # Discovery
+    # ------------------------------------------------------------------
+
+    def minimal_determinants(self, attribute: str, max_lhs: Optional[int] = None) -> List[Tuple[str, ...]]:
+        """
+        Minimal dimension sets that functionally determine ``attribute``.
+
+        Returns ``[()]`` for a constant attribute. Sets are listed level by
+        level (smaller first) with dimensions in DSD order; a set that is a
+        key of the data is included only if nothing smaller determines the
+        attribute.
+        """
+        self._require_columns([attribute])
+        max_lhs = len(self.dimensions) if max_lhs is None else max_lhs
+        found: List[Tuple[str, ...]] = []
+        keys: List[Tuple[str, ...]] = []
+        for size in range(max_lhs + 1):
+            for lhs in combinations(self.dimensions, size):
+                members = set(lhs)
+                if any(members.issuperset(f) for f in found) or any(members.issuperset(k) for k in keys):
+                    continue
+                if size and self.is_key(lhs):
+                    keys.append(lhs)
+                    continue
+                if self.holds(lhs, attribute):
+                    found.append(lhs)
+        return found or keys[:1]
+
+    def analyze(
+        self,
+        attributes: Optional[Sequence[str]] = None,
+        measures: Sequence[str] = (),
+        max_lhs: Optional[int] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Classify each attribute's attachment level from the data.
+
+        Levels:
+        - ``dataset``: constant over all rows
+        - ``measure``: present exactly where one or more measures are present
+          (e.g. a unit that only exists alongside its result)
+        - ``dimension``: determined by a proper subset of the dimensions
+        - ``observation``: only the full key determines it
+
+        Args:
+            attributes: Candidate attribute columns (default: every column
+                that is neither a dimension nor a measure)
+            measures: Measure columns
+            max_lhs: Largest dimension set to consider
+
+        Returns:
+            Dict mapping attribute name to a report with ``level``,
+            ``varies_with`` (dimensions or measures it attaches to) and
+            ``determinants`` (all minimal determining dimension sets)
+        """
+        measures = list(measures)
+        self._require_columns(measures)
+        if attributes is None:
+            excluded = set(self.dimensions) | set(measures)
+            attributes = [c for c in self.frame.columns if c not in excluded]
+        self._require_columns(attributes)
+
+        measure_masks = {m: self.frame[m].notna().to_numpy() for m in measures}
+        report: Dict[str, Dict[str, Any]] = {}
+        for attribute in attributes:
+            determinants = self.minimal_determinants(attribute, max_lhs)
+            proper = [d for d in determinants if len(d) < len(self.dimensions) and not (d and self.is_key(d))]
+
+            if determinants == [()]:
+                report[attribute] = {"level": "dataset", "varies_with": [], "determinants": determinants}
+                continue
+
+            present = self.frame[attribute].notna().to_numpy()
+            attached_measures = [
+                m for m, mask in measure_masks.items()
+                if not present.all() and np.array_equal(present, mask)
+            ]
+            if attached_measures:
+                report[attribute] = {"level": "measure", "varies_with": attached_measures, "determinants": determinants}
+            elif proper:
+                report[attribute] = {"level": "dimension", "varies_with": list(proper[0]), "determinants": determinants}
+            else:
+                report[attribute] = {"level": "observation", "varies_with": list(self.dimensions), "determinants": determinants}
+        return report
+
+    def suggest_attachments(
+        self,
+        attributes: Optional[Sequence[str]] = None,
+        measures: Sequence[str] = (),
+        max_lhs: Optional[int] = None,
+    ) -> Dict[str, List[Any]]:
+        """
+        Suggest the ``attributes`` section of a data cube configuration.
+
+        Observation-level attributes are attached to the full dimension list,
+        which is how the configuration expresses observation attachment.
+
+        Returns:
+            Dict with ``dataset_level``, ``dimension_level`` and
+            ``measure_level`` entries in load_data_cube_config() format
+        """
+        suggestion: Dict[str, List[Any]] = {"dataset_level": [], "dimension_level": [], "measure_level": []}
+        for attribute, result in self.analyze(attributes, measures, max_lhs).items():
+            if result["level"] == "dataset":
+                suggestion["dataset_level"].append(attribute)
+            elif result["level"] == "measure":
+                suggestion["measure_level"].append({"variable": attribute, "attached_to": result["varies_with"]})
+            else:
+                suggestion["dimension_level"].append({"variable": attribute, "attached_to": result["varies_with"]})
+        return suggestion
+
+
+def suggest_attribute_attachments(
+    data: Any,
+    dimensions: Sequence[str],
+    attributes: Optional[Sequence[str]] = None,
+    measures: Sequence[str] = (),
+    sample_size: int = 100_000,
+) -> Dict[str, List[Any]]:
+    """
+    Suggest attribute attachments for a data cube configuration from observation data.
+
+    Convenience wrapper around DependencyDiscovery.suggest_attachments().
+    """
+    discovery = DependencyDiscovery(data, dimensions, sample_size=sample_size)
+    return discovery.suggest_attachments(attributes, measures)
+
+
+__all__ = [
+    "DependencyDiscovery",
+    "suggest_attribute_attachments",
+]
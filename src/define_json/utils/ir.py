@@ -6,9 +6,11 @@ canonical serialiser, and minimal Define-XML exporters — using generated/defin
 from __future__ import annotations
 
 import hashlib
+import io
 import json
+import weakref
 from pathlib import Path
-from typing import Dict, List, Tuple, Set, Optional, Any
+from typing import TYPE_CHECKING, Dict, List, Tuple, Set, Optional, Any
 from xml.etree import ElementTree as ET
 
 try:
@@ -19,24 +21,31 @@ try:
         WhereClause,
         Condition,
         RangeCheck,
-        CodeList,
         CodeListItem,
         ItemGroupType,
     )
 except Exception as exc:  # pragma: no cover
     raise ImportError("define_json.schema.define not available") from exc
 
+if TYPE_CHECKING:  # pragma: no cover
+    from .ir_store import CanonicalStore
+
 
 def load_mdv(json_path: Path) -> MetaDataVersion:
     """
-    Load MetaDataVersion from JSON file.
+    Load MetaDataVersion from JSON file or from a binary snapshot (see ir_snapshot).
     
     Args:
-        json_path: Path to JSON file containing MetaDataVersion data
+        json_path: Path to JSON file containing MetaDataVersion data, or to a
+            snapshot written by save_snapshot()
         
     Returns:
         MetaDataVersion instance
     """
+    from .ir_snapshot import is_snapshot, load_snapshot
+    if is_snapshot(json_path):
+        return load_snapshot(json_path)
+    
     with open(json_path, 'r', encoding='utf-8') as f:
         data = json.load(f)
     
@@ -114,7 +123,11 @@ def _canonical_condition_payload(cond: Condition, mdv: Optional[MetaDataVersion]
     return payload
 
 
-def _canonical_where_payload(where: WhereClause, mdv: Optional[MetaDataVersion] = None) -> Dict[str, Any]:
+def _canonical_where_payload(
+    where: WhereClause,
+    mdv: Optional[MetaDataVersion] = None,
+    conditions: Optional[Dict[str, Condition]] = None,
+) -> Dict[str, Any]:
     """
     Build canonical payload for WhereClause based on actual RangeCheck content.
     
@@ -122,15 +135,20 @@ def _canonical_where_payload(where: WhereClause, mdv: Optional[MetaDataVersion]
     and creates a canonical representation based on the actual content, not Condition OIDs.
     This ensures that WhereClauses with identical RangeCheck content are properly consolidated.
     
-    Handles both string OID references and Condition objects.
+    Handles both string OID references and Condition objects. String references
+    are resolved through ``conditions`` (OID -> Condition) when given, otherwise
+    by scanning ``mdv.conditions``.
     """
-    conditions = where.conditions or []
     all_range_checks: List[Dict[str, Any]] = []
     
-    for cond_ref in conditions:
+    for cond_ref in (where.conditions or []):
         # Resolve condition if it's a string OID
         if isinstance(cond_ref, str):
-            if mdv and mdv.conditions:
+            if conditions is not None:
+                cond = conditions.get(cond_ref)
+                if not cond:
+                    continue
+            elif mdv and mdv.conditions:
                 cond = next((c for c in mdv.conditions if c.OID == cond_ref), None)
                 if not cond:
                     # If condition not found, skip (or use empty)
@@ -170,6 +188,12 @@ def _canonical_where_payload(where: WhereClause, mdv: Optional[MetaDataVersion]
     return {"rangeChecks": all_range_checks}
 
 
+def _payload_digest(payload: Dict[str, Any]) -> str:
+    """SHA-256 hex digest of a canonical payload (sorted keys, compact separators)."""
+    data = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
 def _extract_meaningful_oid(where: WhereClause, mdv: Optional[MetaDataVersion] = None) -> Optional[str]:
     """
     Extract meaningful OID from WhereClause structure if possible.
@@ -184,7 +208,11 @@ def _extract_meaningful_oid(where: WhereClause, mdv: Optional[MetaDataVersion] =
     Returns:
         Meaningful OID string (e.g., "WC.VS.TEMP") or None if structure too complex
     """
-    payload = _canonical_where_payload(where, mdv)
+    return _meaningful_where_oid_from_payload(_canonical_where_payload(where, mdv))
+
+
+def _meaningful_where_oid_from_payload(payload: Dict[str, Any]) -> Optional[str]:
+    """Meaningful WhereClause OID (e.g. WC.VS.TEMP) from a canonical payload, or None."""
     range_checks = payload.get('rangeChecks', [])
     
     if not range_checks:
@@ -245,15 +273,21 @@ def canonicalise_whereclause(where: WhereClause, mdv: Optional[MetaDataVersion]
     Returns:
         Canonical OID string (meaningful if possible, otherwise hash-based)
     """
-    # Try to extract meaningful OID first
-    meaningful_oid = _extract_meaningful_oid(where, mdv)
+    return _canonical_where_oid_from_payload(_canonical_where_payload(where, mdv))
+
+
+def _canonical_where_oid_from_payload(payload: Dict[str, Any]) -> str:
+    """
+    Create canonical OID for WhereClause from its payload.
+    
+    Meaningful OID (e.g., WC.VS.TEMP) if possible, otherwise hash-based.
+    """
+    meaningful_oid = _meaningful_where_oid_from_payload(payload)
     if meaningful_oid:
         return meaningful_oid
     
     # Fallback to hash-based OID for complex structures
-    payload = _canonical_where_payload(where, mdv)
-    data = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
-    return f"WC.{hashlib.sha256(data).hexdigest()[:16]}"
+    return f"WC.{_payload_digest(payload)[:16]}"
 
 
 def _canonical_condition_oid(cond: Condition, mdv: Optional[MetaDataVersion] = None) -> str:
@@ -277,8 +311,7 @@ def _canonical_condition_oid_from_payload(payload: Dict[str, Any]) -> str:
     range_checks = payload.get("rangeChecks", [])
     if not range_checks:
         # Fallback to hash-based OID
-        data = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
-        return f"COND.{hashlib.sha256(data).hexdigest()[:16]}"
+        return f"COND.{_payload_digest(payload)[:16]}"
     
     # Extract domain and values from all RangeChecks
     domains = set()
@@ -302,8 +335,7 @@ def _canonical_condition_oid_from_payload(payload: Dict[str, Any]) -> str:
     # Must have exactly one domain
     if len(domains) != 1:
         # Fallback to hash-based OID
-        data = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
-        return f"COND.{hashlib.sha256(data).hexdigest()[:16]}"
+        return f"COND.{_payload_digest(payload)[:16]}"
     
     domain = list(domains)[0]
     
@@ -312,8 +344,7 @@ def _canonical_condition_oid_from_payload(payload: Dict[str, Any]) -> str:
     
     if not sorted_values:
         # Fallback to hash-based OID
-        data = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
-        return f"COND.{hashlib.sha256(data).hexdigest()[:16]}"
+        return f"COND.{_payload_digest(payload)[:16]}"
     
     # Build meaningful OID: COND.{domain}.{value1} or COND.{domain}.{value1}_{value2}...
     if len(sorted_values) == 1:
@@ -331,7 +362,11 @@ def _canonical_condition_oid_from_range_checks(range_checks: List[Dict[str, Any]
     Attempts to extract meaningful OID (e.g., COND.VS.TEMP) from structure,
     falls back to hash-based OID for complex structures.
     """
-    # Build payload from range checks
+    return _canonical_condition_oid_from_payload(_condition_payload_from_range_checks(range_checks))
+
+
+def _condition_payload_from_range_checks(range_checks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Canonical Condition payload for a list of RangeCheck dictionaries."""
     payload: Dict[str, Any] = {}
     canon_checks: List[Dict[str, Any]] = []
     for rc_data in range_checks:
@@ -343,15 +378,19 @@ def _canonical_condition_oid_from_range_checks(range_checks: List[Dict[str, Any]
     canon_checks.sort(key=lambda d: (d["item"], str(d["comparator"]), json.dumps(d["values"])))
     if canon_checks:
         payload["rangeChecks"] = canon_checks
-    
-    return _canonical_condition_oid_from_payload(payload)
+    return payload
 
 
-def build_condition_registry(mdv: MetaDataVersion) -> Dict[str, Condition]:
+def build_condition_registry(mdv: MetaDataVersion, store: Optional["CanonicalStore"] = None) -> Dict[str, Condition]:
     """
     Build canonical Condition registry and remap all references to canonical OIDs.
     
     This should be called BEFORE build_where_registry since WhereClauses reference Conditions.
+    
+    Args:
+        mdv: MetaDataVersion to consolidate in place
+        store: Optional CanonicalStore shared across studies; canonical OIDs are
+            looked up by payload digest and new payloads are interned
     """
     registry: Dict[str, Condition] = {}
     old_to_canonical: Dict[str, str] = {}
@@ -359,7 +398,11 @@ def build_condition_registry(mdv: MetaDataVersion) -> Dict[str, Condition]:
     # Canonicalise all Conditions and build mapping from old OID -> canonical OID
     for cond in (mdv.conditions or []):
         old_oid = cond.OID
-        canonical_oid = _canonical_condition_oid(cond, mdv)
+        payload = _canonical_condition_payload(cond, mdv)
+        if store is not None:
+            canonical_oid = store.intern_condition_payload(payload)
+        else:
+            canonical_oid = _canonical_condition_oid_from_payload(payload)
         
         if canonical_oid not in registry:
             # First Condition with this canonical OID - keep it
@@ -390,7 +433,61 @@ def build_condition_registry(mdv: MetaDataVersion) -> Dict[str, Condition]:
     return registry
 
 
-def build_where_registry(mdv: MetaDataVersion) -> Dict[str, WhereClause]:
+def _consolidated_where_clause(
+    mdv: MetaDataVersion,
+    canonical_wid: str,
+    payload: Dict[str, Any],
+    conditions_by_oid: Dict[str, Condition],
+    store: Optional["CanonicalStore"] = None,
+) -> Optional[WhereClause]:
+    """
+    Create the consolidated WhereClause for a canonical payload.
+    
+    The WhereClause references a single Condition holding all of the payload's
+    RangeChecks; that Condition is appended to ``mdv.conditions`` (and to
+    ``conditions_by_oid``) unless it already exists. Returns None for payloads
+    without RangeChecks.
+    """
+    range_checks = payload.get("rangeChecks", [])
+    if not range_checks:
+        return None
+    
+    cond_payload = _condition_payload_from_range_checks(range_checks)
+    if store is not None:
+        condition_oid = store.intern_condition_payload(cond_payload)
+    else:
+        condition_oid = _canonical_condition_oid_from_payload(cond_payload)
+    
+    # Check if Condition already exists, if not create it
+    if condition_oid not in conditions_by_oid:
+        # Create new Condition with all RangeChecks
+        new_range_checks = []
+        for rc_data in range_checks:
+            rc = RangeCheck.model_construct(
+                item=rc_data.get("item"),
+                comparator=rc_data.get("comparator"),
+                checkValues=rc_data.get("values", []),
+                softHard=rc_data.get("softHard"),
+            )
+            new_range_checks.append(rc)
+        
+        new_cond = Condition.model_construct(
+            OID=condition_oid,
+            rangeChecks=new_range_checks,
+        )
+        if mdv.conditions is None:
+            mdv.conditions = []
+        mdv.conditions.append(new_cond)
+        conditions_by_oid[condition_oid] = new_cond
+    
+    # Create consolidated WhereClause with single Condition reference
+    return WhereClause.model_construct(
+        OID=canonical_wid,
+        conditions=[condition_oid],
+    )
+
+
+def build_where_registry(mdv: MetaDataVersion, store: Optional["CanonicalStore"] = None) -> Dict[str, WhereClause]:
     """
     Build canonical WhereClause registry and remap all references to canonical OIDs.
     
@@ -398,16 +495,18 @@ def build_where_registry(mdv: MetaDataVersion) -> Dict[str, WhereClause]:
     Each consolidated WhereClause will have exactly one Condition containing all RangeChecks.
     
     Note: Conditions should be consolidated first via build_condition_registry().
+    
+    Args:
+        mdv: MetaDataVersion to consolidate in place
+        store: Optional CanonicalStore shared across studies; WhereClause and
+            Condition payloads are interned by digest
     """
     # First, collect all RangeChecks from each WhereClause to identify unique content
-    whereclause_payloads: Dict[str, Dict[str, Any]] = {}
+    conditions_by_oid: Dict[str, Condition] = {c.OID: c for c in (mdv.conditions or []) if c.OID}
     old_to_payload: Dict[str, Dict[str, Any]] = {}
     
     for wc in (mdv.whereClauses or []):
-        payload = _canonical_where_payload(wc, mdv)
-        payload_key = json.dumps(payload, sort_keys=True)
-        old_to_payload[wc.OID] = payload
-        whereclause_payloads[payload_key] = payload
+        old_to_payload[wc.OID] = _canonical_where_payload(wc, conditions=conditions_by_oid)
     
     # Build registry: one WhereClause per unique payload
     registry: Dict[str, WhereClause] = {}
@@ -422,42 +521,14 @@ def build_where_registry(mdv: MetaDataVersion) -> Dict[str, WhereClause]:
         
         # Get or create canonical OID for this payload
         if payload_key not in payload_to_canonical_oid:
-            canonical_wid = canonicalise_whereclause(wc, mdv)
+            if store is not None:
+                canonical_wid = store.intern_where_payload(payload)
+            else:
+                canonical_wid = _canonical_where_oid_from_payload(payload)
             payload_to_canonical_oid[payload_key] = canonical_wid
             
-            # Create a single Condition containing all RangeChecks from this WhereClause
-            range_checks = payload.get("rangeChecks", [])
-            if range_checks:
-                # Create Condition with all RangeChecks
-                condition_oid = _canonical_condition_oid_from_range_checks(range_checks, mdv)
-                
-                # Check if Condition already exists, if not create it
-                existing_cond = next((c for c in (mdv.conditions or []) if c.OID == condition_oid), None)
-                if not existing_cond:
-                    # Create new Condition with all RangeChecks
-                    new_range_checks = []
-                    for rc_data in range_checks:
-                        rc = RangeCheck.model_construct(
-                            item=rc_data.get("item"),
-                            comparator=rc_data.get("comparator"),
-                            checkValues=rc_data.get("values", []),
-                            softHard=rc_data.get("softHard"),
-                        )
-                        new_range_checks.append(rc)
-                    
-                    new_cond = Condition.model_construct(
-                        OID=condition_oid,
-                        rangeChecks=new_range_checks,
-                    )
-                    if mdv.conditions is None:
-                        mdv.conditions = []
-                    mdv.conditions.append(new_cond)
-                
-                # Create consolidated WhereClause with single Condition reference
-                consolidated_wc = WhereClause.model_construct(
-                    OID=canonical_wid,
-                    conditions=[condition_oid],
-                )
+            consolidated_wc = _consolidated_where_clause(mdv, canonical_wid, payload, conditions_by_oid, store)
+            if consolidated_wc is not None:
                 registry[canonical_wid] = consolidated_wc
         
         # Map old OID to canonical OID (for remapping applicableWhen)
@@ -508,7 +579,17 @@ def _is_value_list(ig: ItemGroup) -> bool:
     return str(ig_type) == "ValueList"
 
 
-def transform_value_lists_to_specialisation(mdv: MetaDataVersion) -> None:
+def _item_key(item: Item) -> Any:
+    """
+    Membership key for slice builders: the Item OID, or object identity if unset.
+    
+    Avoids Pydantic ``__eq__`` (a deep field-by-field comparison) in ``in`` checks.
+    """
+    oid = getattr(item, "OID", None)
+    return oid if oid else id(item)
+
+
+def transform_value_lists_to_specialisation(mdv: MetaDataVersion, store: Optional["CanonicalStore"] = None) -> None:
     """
     Transform ValueList-based structure to Dataset Specialisation shape.
     
@@ -540,6 +621,7 @@ def transform_value_lists_to_specialisation(mdv: MetaDataVersion) -> None:
     
     Args:
         mdv: MetaDataVersion to transform in-place
+        store: Optional CanonicalStore passed to the Condition/WhereClause registries
         
     Modifies:
         mdv.whereClauses - Duplicate WhereClauses consolidated, references updated
@@ -566,13 +648,16 @@ def transform_value_lists_to_specialisation(mdv: MetaDataVersion) -> None:
     if not mdv.itemGroups:
         return
     
+    # ItemGroups are restructured below; drop any cached IRIndex
+    invalidate_ir_index(mdv)
+    
     # First, consolidate unique Conditions based on their structure
     # This deduplicates Conditions with identical rangeChecks/conditions
-    build_condition_registry(mdv)
+    build_condition_registry(mdv, store=store)
     
     # Then, consolidate unique WhereClauses based on their structure
     # This deduplicates WhereClauses with identical conditions (now using consolidated Condition OIDs)
-    build_where_registry(mdv)
+    build_where_registry(mdv, store=store)
     
     # Track slices by WhereClause OID only (canonical: one slice per shared WhereClause)
     wc_oid_to_slice: Dict[str, ItemGroup] = {}
@@ -581,6 +666,8 @@ def transform_value_lists_to_specialisation(mdv: MetaDataVersion) -> None:
     domain_to_slice_oids: Dict[str, List[str]] = {}
     # Track domains for each WhereClause (for slice domain assignment)
     wc_oid_to_domains: Dict[str, Set[str]] = {}
+    # Membership keys of the items already placed in each slice
+    wc_oid_to_members: Dict[str, Set[Any]] = {}
     
     # Process all ValueLists
     for vl_ig in list(mdv.itemGroups or []):
@@ -642,6 +729,7 @@ def transform_value_lists_to_specialisation(mdv: MetaDataVersion) -> None:
                     new_slice.items = []
                     new_slice.slices = None  # Slices are leaf nodes, no slices
                     wc_oid_to_slice[wc_oid] = new_slice
+                    wc_oid_to_members[wc_oid] = set()
                     mdv.itemGroups.append(new_slice)
                     
                     # Track slice OID for domain's slices (all domains that use this WhereClause)
@@ -655,7 +743,9 @@ def transform_value_lists_to_specialisation(mdv: MetaDataVersion) -> None:
                 # which is correct - each slice represents one WhereClause context
                 if wc_oid_to_slice[wc_oid].items is None:
                     wc_oid_to_slice[wc_oid].items = []
-                if item not in wc_oid_to_slice[wc_oid].items:
+                item_key = _item_key(item)
+                if item_key not in wc_oid_to_members[wc_oid]:
+                    wc_oid_to_members[wc_oid].add(item_key)
                     wc_oid_to_slice[wc_oid].items.append(item)
         
         # Mark ValueList for removal after processing
@@ -686,6 +776,7 @@ def transform_value_lists_to_specialisation(mdv: MetaDataVersion) -> None:
 def build_canonical_slices(mdv: MetaDataVersion) -> None:
     """Build canonical slices: one ItemGroup per (domain, whereId)."""
     key_to_slice: Dict[Tuple[str, str], ItemGroup] = {}
+    key_to_members: Dict[Tuple[str, str], Set[Any]] = {}
     slice_oids_to_remove: Set[str] = set()
     
     # Merge pre-existing slices by (domain, whereId)
@@ -698,12 +789,20 @@ def build_canonical_slices(mdv: MetaDataVersion) -> None:
             wid = w[0] if isinstance(w[0], str) else str(w[0])
             key = (_domain_name_of_ig(ig), wid)
             if key in key_to_slice:
-                # Merge items into existing slice
-                key_to_slice[key].items = (key_to_slice[key].items or []) + (ig.items or [])
+                # Merge items not already present into existing slice
+                members = key_to_members[key]
+                merged = list(key_to_slice[key].items or [])
+                for it in (ig.items or []):
+                    item_key = _item_key(it)
+                    if item_key not in members:
+                        members.add(item_key)
+                        merged.append(it)
+                key_to_slice[key].items = merged
                 # Mark this duplicate slice for removal (by OID)
                 slice_oids_to_remove.add(ig.OID)
             else:
                 key_to_slice[key] = ig
+                key_to_members[key] = {_item_key(it) for it in (ig.items or [])}
 
     # Remove merged/empty slices
     if slice_oids_to_remove:
@@ -731,8 +830,17 @@ def build_canonical_slices(mdv: MetaDataVersion) -> None:
                     new_ig.applicableWhen = [wid]
                     new_ig.items = []
                     key_to_slice[key] = new_ig
+                    key_to_members[key] = set()
                     mdv.itemGroups.append(new_ig)
+                item_key = _item_key(it)
+                if item_key in key_to_members[key]:
+                    continue
+                key_to_members[key].add(item_key)
+                if key_to_slice[key].items is None:
+                    key_to_slice[key].items = []
                 key_to_slice[key].items.append(it)
+    
+    invalidate_ir_index(mdv)
 
 
 def enforce_slice_invariants(mdv: MetaDataVersion) -> None:
@@ -779,18 +887,88 @@ def register_variables(mdv: MetaDataVersion) -> Dict[str, Set[str]]:
     return mapping
 
 
-def project_valuelist_for_domain(mdv: MetaDataVersion, domain: str) -> Dict[str, List[Item]]:
-    """Project variable-first view: each variable with its contexts ordered by whereId."""
-    parents: Dict[str, Item] = {}
-    for ig in (mdv.itemGroups or []):
-        if _is_slice(ig) or _domain_name_of_ig(ig) != domain:
-            continue
-        for it in (ig.items or []):
-            parents[getattr(it, "name", "")] = it
-    var_to_items: Dict[str, List[Item]] = {k: [] for k in parents.keys()}
-    for ig in (mdv.itemGroups or []):
-        if not _is_slice(ig) or _domain_name_of_ig(ig) != domain:
-            continue
+class IRIndex:
+    """
+    Per-domain view of a MetaDataVersion, built in one pass over its ItemGroups.
+    
+    Maps each domain to its parent (non-slice) ItemGroups, its DatasetSpecialization
+    slices and its variables (parent Items by name), in document order. Obtain
+    one through get_ir_index(), which caches it per MDV; IR transforms that
+    restructure ItemGroups call invalidate_ir_index(). The cache only notices
+    a replaced or resized ItemGroup list, not items or groups edited in place,
+    so it is opt-in for callers that know the IR is not being edited.
+    """
+    
+    def __init__(self, mdv: MetaDataVersion):
+        self.parents: Dict[str, List[ItemGroup]] = {}
+        self.slices: Dict[str, List[ItemGroup]] = {}
+        self.variables: Dict[str, Dict[str, Item]] = {}
+        self._fingerprint = _ir_fingerprint(mdv)
+        for ig in (mdv.itemGroups or []):
+            dom = _domain_name_of_ig(ig)
+            if _is_slice(ig):
+                self.slices.setdefault(dom, []).append(ig)
+                continue
+            self.parents.setdefault(dom, []).append(ig)
+            variables = self.variables.setdefault(dom, {})
+            for it in (ig.items or []):
+                variables[getattr(it, "name", "")] = it
+    
+    @property
+    def domains(self) -> List[str]:
+        """Domains that have at least one parent ItemGroup, in document order."""
+        return list(self.parents.keys())
+    
+    def is_current(self, mdv: MetaDataVersion) -> bool:
+        """Cheap staleness check: the ItemGroup list must not have been replaced or resized."""
+        return self._fingerprint == _ir_fingerprint(mdv)
+
+
+def _ir_fingerprint(mdv: MetaDataVersion) -> Tuple[int, int]:
+    groups = mdv.itemGroups
+    return (id(groups), len(groups) if groups is not None else -1)
+
+
+# id(mdv) -> (weakref to mdv, index); entries are dropped when the MDV is collected
+_IR_INDEX_CACHE: Dict[int, Tuple[Any, IRIndex]] = {}
+
+
+def get_ir_index(mdv: MetaDataVersion) -> IRIndex:
+    """Return the cached IRIndex for ``mdv``, building it if missing or stale."""
+    key = id(mdv)
+    cached = _IR_INDEX_CACHE.get(key)
+    if cached is not None:
+        ref, index = cached
+        if ref() is mdv and index.is_current(mdv):
+            return index
+    index = IRIndex(mdv)
+    _IR_INDEX_CACHE[key] = (weakref.ref(mdv, lambda _ref, key=key: _IR_INDEX_CACHE.pop(key, None)), index)
+    return index
+
+
+def invalidate_ir_index(mdv: MetaDataVersion) -> None:
+    """Drop the cached IRIndex for ``mdv`` (call after restructuring its ItemGroups)."""
+    _IR_INDEX_CACHE.pop(id(mdv), None)
+
+
+def project_valuelist_for_domain(
+    mdv: MetaDataVersion, domain: str, index: Optional[IRIndex] = None, use_cache: bool = False
+) -> Dict[str, List[Item]]:
+    """
+    Project variable-first view: each variable with its contexts ordered by whereId.
+    
+    Args:
+        mdv: MetaDataVersion to project
+        domain: Domain to project
+        index: IRIndex of ``mdv`` to reuse (e.g. across domains); by default
+            ``mdv`` is scanned afresh
+        use_cache: Use the cached get_ir_index(mdv) instead of scanning;
+            only safe while ItemGroups and Items are not edited in place
+    """
+    if index is None:
+        index = get_ir_index(mdv) if use_cache else IRIndex(mdv)
+    var_to_items: Dict[str, List[Item]] = {k: [] for k in index.variables.get(domain, {})}
+    for ig in index.slices.get(domain, []):
         wid = (ig.applicableWhen or [""])[0]
         wid = wid if isinstance(wid, str) else str(wid)
         for it in (ig.items or []):
@@ -802,40 +980,126 @@ def project_valuelist_for_domain(mdv: MetaDataVersion, domain: str) -> Dict[str,
     return var_to_items
 
 
-def _sort_code_list_items(cl: CodeList) -> None:
-    if getattr(cl, "codeListItems", None) is not None:
-        cl.codeListItems.sort(key=lambda x: getattr(x, "codedValue", ""))
+def _canonical_json_dumps(obj: Any, default) -> str:
+    return json.dumps(obj, default=default, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
 
 
-def _sort_itemgroup_items(ig: ItemGroup) -> None:
-    if getattr(ig, "items", None) is not None:
-        ig.items.sort(key=lambda x: getattr(x, "name", ""))
+def _canonical_default_factory(mdv: MetaDataVersion):
+    """
+    Build the ``default`` hook used by the canonical serialiser.
+    
+    Instead of sorting the caller's lists in place, the hook returns a shallow
+    field dict per model with sorted *copies* of the lists that the canonical
+    form orders: items of top-level ItemGroups (by name) and codeListItems of
+    top-level CodeLists (by codedValue).
+    """
+    ig_ids = {id(ig) for ig in (mdv.itemGroups or [])}
+    cl_ids = {id(cl) for cl in (mdv.codeLists or [])}
+    
+    def _default(o: Any):
+        if not hasattr(o, "__dict__"):
+            return str(o)
+        d = {k: v for k, v in o.__dict__.items() if not k.startswith("_")}
+        if id(o) in ig_ids and d.get("items") is not None:
+            d["items"] = sorted(d["items"], key=lambda x: getattr(x, "name", ""))
+        if id(o) in cl_ids and d.get("codeListItems") is not None:
+            d["codeListItems"] = sorted(d["codeListItems"], key=lambda x: getattr(x, "codedValue", ""))
+        return d
+    
+    return _default
+
+
+def _canonical_mdv_view(mdv: MetaDataVersion) -> Dict[str, Any]:
+    """Shallow field dict of the MDV with its top-level lists in canonical order."""
+    view = {k: v for k, v in mdv.__dict__.items() if not k.startswith("_")}
+    if view.get("itemGroups") is not None:
+        view["itemGroups"] = sorted(
+            view["itemGroups"],
+            key=lambda g: (_domain_name_of_ig(g), getattr(g, "name", ""), str(getattr(g, "type", ""))),
+        )
+    if view.get("items") is not None:
+        view["items"] = sorted(view["items"], key=lambda x: getattr(x, "name", ""))
+    if view.get("codeLists") is not None:
+        view["codeLists"] = sorted(view["codeLists"], key=lambda x: getattr(x, "OID", ""))
+    if view.get("whereClauses") is not None:
+        view["whereClauses"] = sorted(view["whereClauses"], key=lambda x: getattr(x, "OID", ""))
+    return view
+
+
+def _iter_canonical_chunks(mdv: MetaDataVersion):
+    """
+    Yield the canonical JSON of ``mdv`` as text chunks.
+    
+    Top-level fields are emitted one at a time and list fields one element at a
+    time, so only a single element is ever encoded in memory. Each chunk goes
+    through the C-accelerated ``json.dumps``; the concatenation is identical to
+    dumping the whole sorted document in one call.
+    """
+    default = _canonical_default_factory(mdv)
+    view = _canonical_mdv_view(mdv)
+    yield "{"
+    for i, key in enumerate(sorted(view)):
+        value = view[key]
+        prefix = "," if i else ""
+        yield f"{prefix}{_canonical_json_dumps(key, default)}:"
+        if isinstance(value, (list, tuple)):
+            yield "["
+            for j, element in enumerate(value):
+                yield ("," if j else "") + _canonical_json_dumps(element, default)
+            yield "]"
+        else:
+            yield _canonical_json_dumps(value, default)
+    yield "}"
 
 
-def _sort_where_clauses(mdv: MetaDataVersion) -> None:
-    if getattr(mdv, "whereClauses", None) is not None:
-        mdv.whereClauses.sort(key=lambda x: getattr(x, "OID", ""))
+def write_canonical(mdv: MetaDataVersion, writer: Optional[Any] = None, buffer_size: int = 1 << 16) -> str:
+    """
+    Stream the canonical serialisation of ``mdv`` to ``writer`` and return its SHA-256.
+    
+    The input is not mutated. Output is written in UTF-8 blocks of roughly
+    ``buffer_size`` bytes, so the full document is never held in memory twice.
+    
+    Args:
+        mdv: MetaDataVersion to serialise
+        writer: Binary file-like object with ``write(bytes)``; None only hashes
+        buffer_size: Approximate size of each write in bytes
+        
+    Returns:
+        Hex SHA-256 digest of the canonical bytes
+    """
+    digest = hashlib.sha256()
+    pending: List[bytes] = []
+    pending_size = 0
+    for chunk in _iter_canonical_chunks(mdv):
+        data = chunk.encode("utf-8")
+        digest.update(data)
+        if writer is None:
+            continue
+        pending.append(data)
+        pending_size += len(data)
+        if pending_size >= buffer_size:
+            writer.write(b"".join(pending))
+            pending = []
+            pending_size = 0
+    if writer is not None and pending:
+        writer.write(b"".join(pending))
+    return digest.hexdigest()
 
 
-def serialize_canonical(mdv: MetaDataVersion) -> bytes:
-    for ig in (mdv.itemGroups or []):
-        _sort_itemgroup_items(ig)
-    if getattr(mdv, "itemGroups", None) is not None:
-        mdv.itemGroups.sort(key=lambda g: (_domain_name_of_ig(g), getattr(g, "name", ""), str(getattr(g, "type", ""))))
-    if getattr(mdv, "items", None) is not None:
-        mdv.items.sort(key=lambda x: getattr(x, "name", ""))
-    for cl in (mdv.codeLists or []):
-        _sort_code_list_items(cl)
-    if getattr(mdv, "codeLists", None) is not None:
-        mdv.codeLists.sort(key=lambda x: getattr(x, "OID", ""))
-    _sort_where_clauses(mdv)
+def canonical_digest(mdv: MetaDataVersion) -> str:
+    """SHA-256 of the canonical serialisation of ``mdv``, without materialising it."""
+    return write_canonical(mdv, None)
 
-    def _default(o: Any):
-        if hasattr(o, "__dict__"):
-            return {k: v for k, v in o.__dict__.items() if not k.startswith("_")}
-        return str(o)
 
-    return json.dumps(mdv, default=_default, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+def serialize_canonical(mdv: MetaDataVersion) -> bytes:
+    """
+    Canonical, deterministic JSON bytes for ``mdv`` (does not mutate the input).
+    
+    Use write_canonical() to stream to a file and canonical_digest() to hash.
+    """
+    buf = io.BytesIO()
+    write_canonical(mdv, buf)
+    return buf.getvalue()
 
 
 def export_define_xml_21(mdv: MetaDataVersion, domains: Optional[List[str]] = None) -> str:
@@ -888,13 +1152,17 @@ def export_define_xml_21(mdv: MetaDataVersion, domains: Optional[List[str]] = No
             })
 
     vld = ET.SubElement(root, "ValueListDefs")
+    index = IRIndex(mdv)  # one scan shared by every domain
+    projections: Dict[str, Dict[str, List[Item]]] = {}
     for ig in (mdv.itemGroups or []):
         if _is_slice(ig):
             continue
         dom = _domain_name_of_ig(ig)
         if domains_set and dom not in domains_set:
             continue
-        projection = project_valuelist_for_domain(mdv, dom)
+        if dom not in projections:
+            projections[dom] = project_valuelist_for_domain(mdv, dom, index=index)
+        projection = projections[dom]
         for var, entries in projection.items():
             if not entries:
                 continue
@@ -938,7 +1206,12 @@ __all__ = [
     "enforce_slice_invariants",
     "register_variables",
     "project_valuelist_for_domain",
+    "IRIndex",
+    "get_ir_index",
+    "invalidate_ir_index",
     "serialize_canonical",
+    "write_canonical",
+    "canonical_digest",
     "export_define_xml_21",
     "export_define_xml_10",
 ]
@@ -0,0 +1,263 @@
+"""
+Structural diff of two Define-JSON documents via Merkle trees.
+
+Each node of the canonical form (MetaDataVersion → ItemGroup → Item,
+CodeList → CodeListItem, WhereClause → Condition → RangeCheck, ...) gets a
+hash computed bottom-up from its own scalar fields and the hashes of its
+children. Two trees are compared top-down and only subtrees whose hashes
+differ are visited, so once the trees are built a diff costs time
+proportional to the number of changes rather than the size of the documents.
+
+Trees can be built once per version and reused for many diffs.
+
+Children are keyed among their siblings by OID, coded value or name; keyless
+children (RangeChecks, ...) are keyed by a digest of their content, so an
+insertion does not shift the keys of the siblings after it. Node kinds are
+schema class names whether a document was loaded as models or as a dict.
+"""
+
+import hashlib
+import typing
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel
+
+from ..schema import define as _schema
+from ..schema.define import MetaDataVersion
+from .ir import _canonical_default_factory, _canonical_json_dumps, _canonical_mdv_view
+
+# Fields tried, in order, to key a child node among its siblings
+_KEY_FIELDS = ("OID", "codedValue", "name")
+
+
+@dataclass
+class MerkleNode:
+    """A node of the canonical Merkle tree."""
+
+    path: str
+    kind: str
+    digest: str
+    scalar_digest: str
+    scalars: Dict[str, Any] = field(default_factory=dict)
+    children: Dict[str, "MerkleNode"] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        """Number of nodes in this subtree."""
+        return 1 + sum(len(child) for child in self.children.values())
+
+
+@dataclass
+class Change:
+    """A single change between two trees."""
+
+    op: str  # "added" | "removed" | "modified"
+    path: str
+    kind: str
+    fields: List[str] = field(default_factory=list)
+    before: Optional[Dict[str, Any]] = None
+    after: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"op": self.op, "path": self.path, "kind": self.kind}
+        if self.fields:
+            data["fields"] = self.fields
+        if self.before is not None:
+            data["before"] = self.before
+        if self.after is not None:
+            data["after"] = self.after
+        return data
+
+
+@dataclass
+class ChangeSet:
+    """Structured result of diffing two Merkle trees."""
+
+    changes: List[Change] = field(default_factory=list)
+
+    @property
+    def added(self) -> List[Change]:
+        return [c for c in self.changes if c.op == "added"]
+
+    @property
+    def removed(self) -> List[Change]:
+        return [c for c in self.changes if c.op == "removed"]
+
+    @property
+    def modified(self) -> List[Change]:
+        return [c for c in self.changes if c.op == "modified"]
+
+    def __len__(self) -> int:
+        return len(self.changes)
+
+    def __bool__(self) -> bool:
+        return bool(self.changes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "summary": {
+                "added": len(self.added),
+                "removed": len(self.removed),
+                "modified": len(self.modified),
+            },
+            "changes": [c.to_dict() for c in self.changes],
+        }
+
+
+def build_merkle_tree(doc: Union[MetaDataVersion, Dict[str, Any]]) -> MerkleNode:
+    """
+    Build a Merkle tree over the canonical form of a MetaDataVersion or Define-JSON dict.
+
+    Model inputs go through the same views as serialize_canonical, so two
+    documents with equal canonical bytes always have equal root hashes.
+    """
+    if isinstance(doc, dict):
+        default = _plain_default
+        fields = doc
+        kind = "MetaDataVersion"
+    else:
+        default = _canonical_default_factory(doc)
+        fields = _canonical_mdv_view(doc)
+        kind = type(doc).__name__
+    return _build_node(kind, "", fields, default)
+
+
+def diff_merkle(old: MerkleNode, new: MerkleNode) -> ChangeSet:
+    """Compare two Merkle trees top-down, descending only into differing subtrees."""
+    result = ChangeSet()
+    _diff_node(old, new, result.changes)
+    return result
+
+
+def diff_mdv(old: Union[MetaDataVersion, Dict[str, Any]], new: Union[MetaDataVersion, Dict[str, Any]]) -> ChangeSet:
+    """Build Merkle trees for two documents and diff them."""
+    return diff_merkle(build_merkle_tree(old), build_merkle_tree(new))
+
+
+def _plain_default(o: Any) -> Any:
+    if hasattr(o, "__dict__"):
+        return {k: v for k, v in o.__dict__.items() if not k.startswith("_")}
+    return str(o)
+
+
+def _is_node(value: Any) -> bool:
+    return isinstance(value, dict) or hasattr(value, "__dict__")
+
+
+def _node_fields(value: Any, default) -> Dict[str, Any]:
+    return value if isinstance(value, dict) else default(value)
+
+
+def _child_key(fields: Dict[str, Any], default) -> str:
+    for key_field in _KEY_FIELDS:
+        key = fields.get(key_field)
+        if isinstance(key, str) and key:
+            return key
+    content = _canonical_json_dumps(fields, default).encode("utf-8")
+    return f"#{hashlib.sha256(content).hexdigest()[:16]}"
+
+
+def _build_node(kind: str, path: str, fields: Dict[str, Any], default) -> MerkleNode:
+    scalars: Dict[str, Any] = {}
+    children: Dict[str, MerkleNode] = {}
+    for name in sorted(fields):
+        value = fields[name]
+        if isinstance(value, list) and value and all(_is_node(v) for v in value):
+            seen: Dict[str, int] = {}
+            for element in value:
+                element_fields = _node_fields(element, default)
+                key = _child_key(element_fields, default)
+                if key in seen:
+                    seen[key] += 1
+                    key = f"{key}#{seen[key]}"
+                else:
+                    seen[key] = 0
+                child_path = f"{path}/{name}[{key}]"
+                children[f"{name}[{key}]"] = _build_node(
+                    _kind_of(element, kind, name), child_path, element_fields, default
+                )
+        elif _is_node(value):
+            children[name] = _build_node(
+                _kind_of(value, kind, name), f"{path}/{name}", _node_fields(value, default), default
+            )
+        else:
+            scalars[name] = value
+
+    scalar_digest = hashlib.sha256(
+        f"{kind}\x00{_canonical_json_dumps(scalars, default)}".encode("utf-8")
+    ).hexdigest()
+    h = hashlib.sha256(scalar_digest.encode("ascii"))
+    for key in sorted(children):
+        h.update(b"\x00")
+        h.update(key.encode("utf-8"))
+        h.update(b"\x00")
+        h.update(children[key].digest.encode("ascii"))
+    return MerkleNode(
+        path=path or "/",
+        kind=kind,
+        digest=h.hexdigest(),
+        scalar_digest=scalar_digest,
+        scalars=scalars,
+        children=children,
+    )
+
+
+def _kind_of(value: Any, parent_kind: str, field_name: str) -> str:
+    """Class name of a child node; dicts are named after the schema type of their field."""
+    if not isinstance(value, dict):
+        return type(value).__name__
+    return _field_class_name(parent_kind, field_name) or field_name
+
+
+@lru_cache(maxsize=None)
+def _field_class_name(parent_kind: str, field_name: str) -> Optional[str]:
+    """Name of the model class held by ``parent_kind.field_name`` in the schema, if any."""
+    parent = getattr(_schema, parent_kind, None)
+    if not (isinstance(parent, type) and issubclass(parent, BaseModel)):
+        return None
+    info = parent.model_fields.get(field_name)
+    pending = [info.annotation] if info is not None else []
+    while pending:
+        annotation = pending.pop()
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            return annotation.__name__
+        pending.extend(typing.get_args(annotation))
+    return None
+
+
+def _diff_node(old: MerkleNode, new: MerkleNode, out: List[Change]) -> None:
+    if old.digest == new.digest:
+        return
+    if old.scalar_digest != new.scalar_digest:
+        names = sorted(
+            k for k in set(old.scalars) | set(new.scalars)
+            if old.scalars.get(k) != new.scalars.get(k)
+        )
+        out.append(Change(
+            op="modified",
+            path=new.path,
+            kind=new.kind,
+            fields=names,
+            before={k: old.scalars.get(k) for k in names},
+            after={k: new.scalars.get(k) for k in names},
+        ))
+    for key, old_child in old.children.items():
+        new_child = new.children.get(key)
+        if new_child is None:
+            out.append(Change(op="removed", path=old_child.path, kind=old_child.kind))
+        else:
+            _diff_node(old_child, new_child, out)
+    for key, new_child in new.children.items():
+        if key not in old.children:
+            out.append(Change(op="added", path=new_child.path, kind=new_child.kind))
+
+
+__all__ = [
+    "MerkleNode",
+    "Change",
+    "ChangeSet",
+    "build_merkle_tree",
+    "diff_merkle",
+    "diff_mdv",
+]
@@ -0,0 +1,578 @@
+"""
+Incremental IR session: keep the canonical registries live across small edits.
+
+The batch helpers in ``ir`` (build_condition_registry, build_where_registry,
+build_canonical_slices, register_variables) rebuild everything from scratch.
+IRSession runs them once and then maintains their results - Condition and
+WhereClause registries, the (domain, whereId) slice map, variable contexts and
+a reverse map from WhereClause OID to the objects whose ``applicableWhen``
+references it - so that each add/update/remove touches only the affected
+entries. Items and slices are found by OID, and the lists the session edits
+(``mdv.itemGroups``, ``mdv.whereClauses`` and the items of each group) keep
+the position of each element, so removals delete in place without scanning.
+
+Usage:
+    session = IRSession(mdv)
+    wid = session.add_where_clause(wc)
+    session.add_item(item, domain="VS")
+    session.update_where_clause(wid, edited_wc)
+    session.remove_item(item.OID)
+"""
+
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ..schema.define import Condition, Item, ItemGroup, MetaDataVersion, WhereClause
+from .ir import (
+    _canonical_condition_oid_from_payload,
+    _canonical_condition_payload,
+    _canonical_where_oid_from_payload,
+    _canonical_where_payload,
+    _consolidated_where_clause,
+    _domain_name_of_ig,
+    _is_slice,
+    _item_key,
+    _payload_digest,
+    build_canonical_slices,
+    build_condition_registry,
+    build_where_registry,
+    invalidate_ir_index,
+)
+
+DEFAULT_CONTEXT = "__DEFAULT__"
+
+SliceKey = Tuple[str, str]
+
+
+class _ListPositions:
+    """
+    Position of each element of a list that is only appended to and deleted from.
+
+    Elements keep the slot they were appended at; an element's index is its
+    slot minus the number of removed slots before it, found by bisection.
+    """
+
+    def __init__(self, items: List[Any]):
+        self.items = items
+        self._reset()
+
+    def _reset(self) -> None:
+        self._slots: Dict[int, int] = {id(obj): slot for slot, obj in enumerate(self.items)}
+        self._next = len(self.items)
+        self._removed: List[int] = []
+
+    def append(self, obj: Any) -> None:
+        self.items.append(obj)
+        self._slots[id(obj)] = self._next
+        self._next += 1
+
+    def index(self, obj: Any) -> int:
+        slot = self._slots.get(id(obj))
+        if slot is not None:
+            position = slot - bisect_left(self._removed, slot)
+            if position < len(self.items) and self.items[position] is obj:
+                return position
+        # The list was changed outside the session: re-index it
+        self._reset()
+        if id(obj) not in self._slots:
+            raise ValueError("Object is not in the list")
+        return self._slots[id(obj)]
+
+    def replace(self, old: Any, new: Any) -> None:
+        self.items[self.index(old)] = new
+        self._slots[id(new)] = self._slots.pop(id(old))
+
+    def remove(self, obj: Any) -> None:
+        del self.items[self.index(obj)]
+        insort(self._removed, self._slots.pop(id(obj)))
+        if len(self._removed) > len(self.items):
+            self._reset()
+
+
+class IRSession:
+    """
+    Canonical IR of one MetaDataVersion with incremental edit operations.
+
+    The constructor canonicalises ``mdv`` in place (Conditions, WhereClauses,
+    slices); afterwards edits should go through the session so that its
+    registries stay in sync with the document.
+
+    Args:
+        mdv: MetaDataVersion to canonicalise and edit in place
+        store: Optional CanonicalStore used to resolve canonical OIDs
+    """
+
+    def __init__(self, mdv: MetaDataVersion, store: Optional[Any] = None):
+        self.mdv = mdv
+        self.store = store
+
+        build_condition_registry(mdv, store=store)
+        self.where_clauses: Dict[str, WhereClause] = build_where_registry(mdv, store=store)
+        build_canonical_slices(mdv)
+
+        self.conditions: Dict[str, Condition] = {c.OID: c for c in (mdv.conditions or []) if c.OID}
+        self._condition_aliases: Dict[str, str] = {}
+        self._aliases: Dict[str, str] = {}
+        self._wid_by_digest: Dict[str, str] = {}
+        self._digest_by_wid: Dict[str, str] = {}
+        for wid, wc in self.where_clauses.items():
+            digest = _payload_digest(_canonical_where_payload(wc, conditions=self.conditions))
+            self._wid_by_digest[digest] = wid
+            self._digest_by_wid[wid] = digest
+
+        self._parents: Dict[str, List[ItemGroup]] = {}
+        self._groups: Dict[str, ItemGroup] = {}
+        self._items: Dict[str, Tuple[ItemGroup, Item]] = {}
+        self._positions: Dict[int, _ListPositions] = {}
+        self._slices: Dict[SliceKey, ItemGroup] = {}
+        self._slice_keys: Dict[str, SliceKey] = {}
+        self._slice_members: Dict[SliceKey, Dict[Any, Item]] = {}
+        self._slice_domains: Dict[str, Set[str]] = {}
+        self._referrers: Dict[str, Dict[int, Any]] = {}
+        self._contexts: Dict[str, Counter] = {}
+        self._presence: Counter = Counter()
+
+        for ig in (mdv.itemGroups or []):
+            if _is_slice(ig):
+                self._register_slice(ig)
+            else:
+                dom = _domain_name_of_ig(ig)
+                self._parents.setdefault(dom, []).append(ig)
+                if ig.OID:
+                    self._groups[ig.OID] = ig
+                self._reference(ig)
+                for it in (ig.items or []):
+                    self._register_parent_item(ig, it, place=False)
+        for it in (mdv.items or []):
+            self._reference(it)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def canonical_oid(self, oid: str) -> str:
+        """Resolve a (possibly superseded) WhereClause OID to its canonical OID."""
+        seen = set()
+        while oid in self._aliases and oid not in seen:
+            seen.add(oid)
+            oid = self._aliases[oid]
+        return oid
+
+    def referrers(self, where_oid: str) -> List[Any]:
+        """Objects whose applicableWhen references the given WhereClause."""
+        return list(self._referrers.get(self.canonical_oid(where_oid), {}).values())
+
+    def slice_for(self, domain: str, where_oid: str) -> Optional[ItemGroup]:
+        """The canonical slice for (domain, whereId), if any."""
+        return self._slices.get((domain, self.canonical_oid(where_oid)))
+
+    def contexts(self, domain: str, name: str) -> Set[str]:
+        """WhereClause contexts of one variable, as in register_variables()."""
+        counter = self._contexts.get(f"{domain}.{name}", Counter())
+        return {w for w, n in counter.items() if n > 0}
+
+    @property
+    def variables(self) -> Dict[str, Set[str]]:
+        """Variable → contexts mapping equivalent to register_variables(mdv)."""
+        return {
+            key: {w for w, n in self._contexts.get(key, Counter()).items() if n > 0}
+            for key, n in self._presence.items() if n > 0
+        }
+
+    # ------------------------------------------------------------------
+    # Conditions and WhereClauses
+    # ------------------------------------------------------------------
+
+    def add_condition(self, cond: Condition) -> str:
+        """Add a Condition, returning its canonical OID (existing Conditions are reused)."""
+        payload = _canonical_condition_payload(cond)
+        if self.store is not None:
+            oid = self.store.intern_condition_payload(payload)
+        else:
+            oid = _canonical_condition_oid_from_payload(payload)
+        if cond.OID and cond.OID != oid:
+            self._condition_aliases[cond.OID] = oid
+        if oid not in self.conditions:
+            cond.OID = oid
+            if self.mdv.conditions is None:
+                self.mdv.conditions = []
+            self.mdv.conditions.append(cond)
+            self.conditions[oid] = cond
+        return oid
+
+    def add_where_clause(self, wc: WhereClause) -> str:
+        """
+        Add a WhereClause, returning its canonical OID.
+
+        Structurally identical WhereClauses resolve to the existing canonical
+        entry. If ``wc.OID`` differs from the canonical OID it is recorded as
+        an alias and any references already using it are repointed.
+        """
+        wid = self._intern_where_clause(wc)
+        if wc.OID and wc.OID != wid:
+            self._aliases[wc.OID] = wid
+            if wc.OID in self._referrers:
+                self._move_references(wc.OID, wid)
+        return wid
+
+    def update_where_clause(self, oid: str, wc: WhereClause) -> str:
+        """
+        Replace the definition of a WhereClause, returning its new canonical OID.
+
+        References, slices and variable contexts of the old WhereClause are
+        moved to the new one; the old WhereClause is dropped.
+        """
+        old = self.canonical_oid(oid)
+        if old not in self.where_clauses:
+            raise ValueError(f"Unknown WhereClause {oid}")
+        new = self._intern_where_clause(wc)
+        if new == old:
+            return new
+        self._move_references(old, new)
+        self._drop_where_clause(old)
+        self._aliases.pop(new, None)
+        self._aliases[old] = new
+        return new
+
+    def remove_where_clause(self, oid: str, cascade: bool = False) -> None:
+        """
+        Remove a WhereClause.
+
+        Raises ValueError while it is still referenced, unless ``cascade`` is
+        set, in which case references are stripped and its slices removed.
+        """
+        wid = self.canonical_oid(oid)
+        if wid not in self.where_clauses:
+            raise ValueError(f"Unknown WhereClause {oid}")
+        refs = self._referrers.get(wid, {})
+        if refs and not cascade:
+            raise ValueError(f"WhereClause {wid} is referenced by {len(refs)} object(s)")
+        for dom in list(self._slice_domains.get(wid, ())):
+            slice_ig = self._slices.get((dom, wid))
+            if slice_ig is not None:
+                self._remove_slice_group(slice_ig)
+        for obj in list(self._referrers.pop(wid, {}).values()):
+            remaining = [w for w in (obj.applicableWhen or []) if w != wid]
+            obj.applicableWhen = remaining or None
+            if not remaining and self._is_parent_item(obj):
+                self._contexts.setdefault(self._var_key_of_parent(obj), Counter())[DEFAULT_CONTEXT] += 1
+        self._drop_where_clause(wid)
+
+    # ------------------------------------------------------------------
+    # Items
+    # ------------------------------------------------------------------
+
+    def add_item(self, item: Item, item_group_oid: Optional[str] = None, domain: Optional[str] = None) -> Item:
+        """
+        Add an Item to a parent ItemGroup and place it into its slices.
+
+        The parent is ``item_group_oid`` if given, otherwise the first parent
+        ItemGroup of ``domain``.
+        """
+        if item.OID and item.OID in self._items:
+            raise ValueError(f"Item {item.OID} already exists; use update_item()")
+        ig = self._parent_group(item_group_oid, domain)
+        self._canonicalise_applicable_when(item)
+        if ig.items is None:
+            ig.items = []
+        self._list(ig.items).append(item)
+        self._register_parent_item(ig, item, place=True)
+        return item
+
+    def update_item(self, item: Item) -> Item:
+        """Replace the Item with the same OID, keeping its position in its ItemGroup."""
+        entry = self._items.get(item.OID)
+        if entry is None:
+            raise ValueError(f"Unknown Item {item.OID}")
+        ig, old = entry
+        self._canonicalise_applicable_when(item)
+        self._unregister_parent_item(ig, old)
+        self._list(ig.items).replace(old, item)
+        self._register_parent_item(ig, item, place=True)
+        return item
+
+    def remove_item(self, oid: str) -> Item:
+        """Remove an Item from its ItemGroup and from every slice it was placed in."""
+        entry = self._items.get(oid)
+        if entry is None:
+            raise ValueError(f"Unknown Item {oid}")
+        ig, item = entry
+        self._unregister_parent_item(ig, item)
+        self._list(ig.items).remove(item)
+        return item
+
+    # ------------------------------------------------------------------
+    # Slices
+    # ------------------------------------------------------------------
+
+    def add_slice(self, slice_ig: ItemGroup) -> ItemGroup:
+        """
+        Add a DatasetSpecialization slice, merging it into an existing slice
+        with the same (domain, whereId). Returns the canonical slice.
+        """
+        when = slice_ig.applicableWhen or []
+        if len(when) != 1:
+            raise ValueError("Slice must have exactly one applicableWhereClause")
+        wid = self.canonical_oid(when[0] if isinstance(when[0], str) else str(when[0]))
+        if wid not in self.where_clauses:
+            raise ValueError(f"Unknown WhereClause {wid}")
+        slice_ig.applicableWhen = [wid]
+        key = (_domain_name_of_ig(slice_ig), wid)
+        existing = self._slices.get(key)
+        if existing is None:
+            if self.mdv.itemGroups is None:
+                self.mdv.itemGroups = []
+            self._list(self.mdv.itemGroups).append(slice_ig)
+            invalidate_ir_index(self.mdv)
+            self._register_slice(slice_ig)
+            return slice_ig
+        for it in (slice_ig.items or []):
+            self._add_to_slice(key, it)
+        return existing
+
+    def remove_slice(self, oid: str) -> ItemGroup:
+        """Remove a slice by OID."""
+        slice_ig = self._slices.get(self._slice_keys.get(oid))
+        if slice_ig is None:
+            raise ValueError(f"Unknown slice {oid}")
+        self._remove_slice_group(slice_ig)
+        return slice_ig
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _intern_where_clause(self, wc: WhereClause) -> str:
+        resolved = WhereClause.model_construct(
+            OID=wc.OID,
+            conditions=[
+                self._condition_aliases.get(c, c) if isinstance(c, str) else c
+                for c in (wc.conditions or [])
+            ],
+        )
+        payload = _canonical_where_payload(resolved, conditions=self.conditions)
+        digest = _payload_digest(payload)
+        wid = self._wid_by_digest.get(digest)
+        if wid is not None:
+            return wid
+        if self.store is not None:
+            wid = self.store.intern_where_payload(payload)
+        else:
+            wid = _canonical_where_oid_from_payload(payload)
+        consolidated = _consolidated_where_clause(self.mdv, wid, payload, self.conditions, self.store)
+        if consolidated is None:
+            raise ValueError(f"WhereClause {wc.OID} has no resolvable RangeChecks")
+        # A WhereClause superseded earlier may be live again: stop redirecting its OID
+        self._aliases.pop(wid, None)
+        self.where_clauses[wid] = consolidated
+        self._wid_by_digest[digest] = wid
+        self._digest_by_wid[wid] = digest
+        if self.mdv.whereClauses is None:
+            self.mdv.whereClauses = []
+        self._list(self.mdv.whereClauses).append(consolidated)
+        return wid
+
+    def _drop_where_clause(self, wid: str) -> None:
+        wc = self.where_clauses.pop(wid)
+        digest = self._digest_by_wid.pop(wid, None)
+        if digest is not None:
+            self._wid_by_digest.pop(digest, None)
+        if self.mdv.whereClauses:
+            self._list(self.mdv.whereClauses).remove(wc)
+
+    def _canonicalise_applicable_when(self, obj: Any) -> None:
+        if not obj.applicableWhen:
+            return
+        when = [self.canonical_oid(w if isinstance(w, str) else str(w)) for w in obj.applicableWhen]
+        for wid in when:
+            if wid not in self.where_clauses:
+                raise ValueError(f"Unknown WhereClause {wid}")
+        obj.applicableWhen = when
+
+    def _reference(self, obj: Any) -> None:
+        for wid in (getattr(obj, "applicableWhen", None) or []):
+            self._referrers.setdefault(wid, {})[id(obj)] = obj
+
+    def _unreference(self, obj: Any) -> None:
+        for wid in (getattr(obj, "applicableWhen", None) or []):
+            refs = self._referrers.get(wid)
+            if refs is not None:
+                refs.pop(id(obj), None)
+                if not refs:
+                    del self._referrers[wid]
+
+    def _move_references(self, old: str, new: str) -> None:
+        for obj in self._referrers.pop(old, {}).values():
+            obj.applicableWhen = list(dict.fromkeys(new if w == old else w for w in obj.applicableWhen))
+            self._referrers.setdefault(new, {})[id(obj)] = obj
+        for dom in list(self._slice_domains.pop(old, ())):
+            old_key, new_key = (dom, old), (dom, new)
+            slice_ig = self._slices.pop(old_key)
+            members = self._slice_members.pop(old_key)
+            self._slice_keys.pop(slice_ig.OID, None)
+            for it in (slice_ig.items or []):
+                self._count_context(dom, it, old, -1)
+            if new_key in self._slices:
+                for it in (slice_ig.items or []):
+                    self._add_to_slice(new_key, it)
+                self._unreference(slice_ig)
+                self._list(self.mdv.itemGroups).remove(slice_ig)
+                self._forget_list(slice_ig.items)
+                invalidate_ir_index(self.mdv)
+            else:
+                if slice_ig.OID == f"IG.{dom}.{old}":
+                    slice_ig.OID = f"IG.{dom}.{new}"
+                    slice_ig.name = f"{dom}_{new}"
+                self._slices[new_key] = slice_ig
+                self._slice_keys[slice_ig.OID] = new_key
+                self._slice_members[new_key] = members
+                self._slice_domains.setdefault(new, set()).add(dom)
+                for it in (slice_ig.items or []):
+                    self._count_context(dom, it, new, +1)
+
+    def _parent_group(self, item_group_oid: Optional[str], domain: Optional[str]) -> ItemGroup:
+        if item_group_oid is not None:
+            ig = self._groups.get(item_group_oid)
+            if ig is None:
+                raise ValueError(f"Unknown ItemGroup {item_group_oid}")
+            return ig
+        if domain is not None and self._parents.get(domain):
+            return self._parents[domain][0]
+        raise ValueError(f"No parent ItemGroup for domain {domain!r}")
+
+    def _list(self, items: List[Any]) -> _ListPositions:
+        """Position tracker of a list the session edits (built on first use)."""
+        positions = self._positions.get(id(items))
+        if positions is None or positions.items is not items:
+            positions = self._positions[id(items)] = _ListPositions(items)
+        return positions
+
+    def _forget_list(self, items: Optional[List[Any]]) -> None:
+        if items is not None:
+            self._positions.pop(id(items), None)
+
+    def _is_parent_item(self, obj: Any) -> bool:
+        entry = self._items.get(getattr(obj, "OID", None))
+        return entry is not None and entry[1] is obj
+
+    def _var_key_of_parent(self, item: Item) -> str:
+        ig = self._items[item.OID][0]
+        return f"{_domain_name_of_ig(ig)}.{getattr(item, 'name', '')}"
+
+    def _register_parent_item(self, ig: ItemGroup, item: Item, place: bool) -> None:
+        dom = _domain_name_of_ig(ig)
+        if item.OID:
+            self._items[item.OID] = (ig, item)
+        key = f"{dom}.{getattr(item, 'name', '')}"
+        self._presence[key] += 1
+        counter = self._contexts.setdefault(key, Counter())
+        if not item.applicableWhen:
+            counter[DEFAULT_CONTEXT] += 1
+        self._reference(item)
+        if place:
+            for wid in (item.applicableWhen or []):
+                self._add_to_slice((dom, wid), item, create=True)
+
+    def _unregister_parent_item(self, ig: ItemGroup, item: Item) -> None:
+        dom = _domain_name_of_ig(ig)
+        key = f"{dom}.{getattr(item, 'name', '')}"
+        self._presence[key] -= 1
+        if not item.applicableWhen:
+            self._contexts[key][DEFAULT_CONTEXT] -= 1
+        # Remove the item from every slice of its domain it was placed in
+        for wid in (item.applicableWhen or []):
+            self._remove_from_slice((dom, wid), item)
+        self._unreference(item)
+        self._items.pop(item.OID, None)
+
+    def _register_slice(self, slice_ig: ItemGroup) -> None:
+        dom = _domain_name_of_ig(slice_ig)
+        wid = (slice_ig.applicableWhen or [""])[0]
+        wid = wid if isinstance(wid, str) else str(wid)
+        key = (dom, wid)
+        self._slices[key] = slice_ig
+        self._slice_keys[slice_ig.OID] = key
+        self._slice_members[key] = {}
+        self._slice_domains.setdefault(wid, set()).add(dom)
+        self._reference(slice_ig)
+        items = list(slice_ig.items or [])
+        slice_ig.items = []
+        for it in items:
+            self._add_to_slice(key, it)
+
+    def _add_to_slice(self, key: SliceKey, item: Item, create: bool = False) -> None:
+        dom, wid = key
+        slice_ig = self._slices.get(key)
+        if slice_ig is None:
+            if not create:
+                raise ValueError(f"No slice for {dom}@{wid}")
+            slice_ig = ItemGroup.model_construct(
+                OID=f"IG.{dom}.{wid}",
+                name=f"{dom}_{wid}",
+                domain=dom,
+                type="DatasetSpecialization",
+            )
+            slice_ig.applicableWhen = [wid]
+            slice_ig.items = []
+            if self.mdv.itemGroups is None:
+                self.mdv.itemGroups = []
+            self._list(self.mdv.itemGroups).append(slice_ig)
+            invalidate_ir_index(self.mdv)
+            self._slices[key] = slice_ig
+            self._slice_keys[slice_ig.OID] = key
+            self._slice_members[key] = {}
+            self._slice_domains.setdefault(wid, set()).add(dom)
+            self._reference(slice_ig)
+        members = self._slice_members[key]
+        item_key = _item_key(item)
+        if item_key in members:
+            return
+        members[item_key] = item
+        if slice_ig.items is None:
+            slice_ig.items = []
+        self._list(slice_ig.items).append(item)
+        self._reference(item)
+        self._count_context(dom, item, wid, +1)
+
+    def _remove_from_slice(self, key: SliceKey, item: Item) -> None:
+        slice_ig = self._slices.get(key)
+        if slice_ig is None:
+            return
+        member = self._slice_members[key].pop(_item_key(item), None)
+        if member is None:
+            return
+        self._list(slice_ig.items).remove(member)
+        self._count_context(key[0], item, key[1], -1)
+        if not slice_ig.items:
+            self._remove_slice_group(slice_ig)
+
+    def _remove_slice_group(self, slice_ig: ItemGroup) -> None:
+        dom = _domain_name_of_ig(slice_ig)
+        wid = (slice_ig.applicableWhen or [""])[0]
+        key = (dom, wid)
+        for it in (slice_ig.items or []):
+            self._count_context(dom, it, wid, -1)
+        self._slices.pop(key, None)
+        if self._slice_keys.get(slice_ig.OID) == key:
+            del self._slice_keys[slice_ig.OID]
+        self._slice_members.pop(key, None)
+        domains = self._slice_domains.get(wid)
+        if domains is not None:
+            domains.discard(dom)
+            if not domains:
+                del self._slice_domains[wid]
+        self._unreference(slice_ig)
+        self._list(self.mdv.itemGroups).remove(slice_ig)
+        self._forget_list(slice_ig.items)
+        invalidate_ir_index(self.mdv)
+
+    def _count_context(self, dom: str, item: Item, wid: str, delta: int) -> None:
+        key = f"{dom}.{getattr(item, 'name', '')}"
+        self._presence[key] += delta
+        self._contexts.setdefault(key, Counter())[wid] += delta
+
+
+__all__ = [
+    "IRSession",
+]
@@ -0,0 +1,320 @@
+"""
+Compact binary snapshots of a loaded (typically canonicalised) MetaDataVersion.
+
+Re-reading a large Define-JSON means parsing JSON and re-validating every
+node with Pydantic. A snapshot stores the model tree in a compact binary body
+together with the SHA-256 of the schema module it was written with. When that
+hash matches the running schema, loading rebuilds the models directly from
+their stored field values and skips validation entirely; otherwise the tree is
+rebuilt as plain data and validated as usual.
+
+Encoding:
+- Each model class is described once by a *shape* (class name + field names);
+  instances are tuples ``(shape, fields_set_mask, pos, value, pos, value, ...)``
+  holding only non-None fields.
+- Identical strings (OIDs, names, codes) are interned before encoding so the
+  body stores each distinct string once and refers back to it.
+- The body is encoded with the stdlib ``marshal`` module (format 4), which is
+  decoded in C straight from the memory-mapped file. Only plain data (tuples,
+  lists, dicts, strings, numbers) is produced; class tags can only name models
+  and enums of ``define_json.schema.define``, and nothing from the file is
+  executed.
+
+marshal is only guaranteed to read what the same Python version wrote, and is
+not hardened against malicious input, so snapshots are a local cache: only
+load snapshots you wrote yourself. The header records the Python version that
+wrote the body; a snapshot from another version is never unmarshalled -
+load_snapshot() raises StaleSnapshotError and the caller rebuilds it from
+the source document with its own loading pipeline.
+
+File layout (little-endian):
+    magic "DJIRSNP1" | u16 version | u16 flags (writer's Python major << 8 | minor)
+    | 32-byte schema SHA-256 | u64 body offset | u64 body length | body
+"""
+
+import hashlib
+import marshal
+import mmap
+import struct
+import sys
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+from ..schema import define as _schema
+from ..schema.define import MetaDataVersion
+
+MAGIC = b"DJIRSNP1"
+FORMAT_VERSION = 1
+_MARSHAL_VERSION = 4
+
+_HEADER = struct.Struct("<8sHH32sQQ")
+
+# Python version of the marshal body, stored in the header's flags field
+_PYTHON_FLAGS = sys.version_info[0] << 8 | sys.version_info[1]
+
+# Tags for non-model values; model tuples start with a shape index >= 0
+_DATETIME = -1
+_ENUM = -2
+_DATE = -3
+_DECIMAL = -4
+_TIME = -5
+
+_SCHEMA_HASH: Optional[bytes] = None
+
+_object_setattr = object.__setattr__
+
+
+class StaleSnapshotError(ValueError):
+    """The snapshot was written by another Python version and must be rebuilt."""
+
+
+def schema_hash() -> bytes:
+    """SHA-256 of the generated schema module the running code validates against."""
+    global _SCHEMA_HASH
+    if _SCHEMA_HASH is None:
+        _SCHEMA_HASH = hashlib.sha256(Path(_schema.__file__).read_bytes()).digest()
+    return _SCHEMA_HASH
+
+
+def is_snapshot(path: Union[str, Path]) -> bool:
+    """True if ``path`` starts with the snapshot magic bytes."""
+    with open(path, "rb") as fh:
+        return fh.read(len(MAGIC)) == MAGIC
+
+
+def save_snapshot(mdv: MetaDataVersion, path: Union[str, Path]) -> None:
+    """
+    Write a binary snapshot of ``mdv`` to ``path``.
+
+    Args:
+        mdv: MetaDataVersion to snapshot (usually after canonicalisation)
+        path: Output file
+    """
+    encoder = _Encoder()
+    root = encoder.encode(mdv)
+    body = marshal.dumps((encoder.shapes, root), _MARSHAL_VERSION)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, _PYTHON_FLAGS, schema_hash(), _HEADER.size, len(body))
+    with open(path, "wb") as fh:
+        fh.write(header)
+        fh.write(body)
+
+
+def load_snapshot(path: Union[str, Path], validate: Optional[bool] = None) -> MetaDataVersion:
+    """
+    Load a MetaDataVersion from a binary snapshot.
+
+    Args:
+        path: Snapshot file written by save_snapshot()
+        validate: Force (True) or skip (False) Pydantic validation. By default
+            validation only runs when the embedded schema hash differs from
+            the running schema.
+
+    Raises:
+        StaleSnapshotError: If the snapshot was written by another Python
+            version; rebuild it from the source document
+        ValueError: If the file is not a valid snapshot
+    """
+    with open(path, "rb") as fh:
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            if len(buf) < _HEADER.size:
+                raise ValueError(f"{path} is not a Define-JSON IR snapshot")
+            magic, version, flags, digest, body_offset, body_len = _HEADER.unpack_from(buf, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a Define-JSON IR snapshot")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"Unsupported snapshot version {version} in {path}")
+            if flags != _PYTHON_FLAGS:
+                raise StaleSnapshotError(
+                    f"Snapshot {path} was written by Python {flags >> 8}.{flags & 0xFF}, "
+                    f"not {sys.version_info[0]}.{sys.version_info[1]}"
+                )
+            if body_offset + body_len > len(buf):
+                raise ValueError(f"Corrupt snapshot {path}: truncated body")
+            view = memoryview(buf)[body_offset:body_offset + body_len]
+            try:
+                shapes, root = marshal.loads(view)
+            except (EOFError, ValueError, TypeError) as exc:
+                raise ValueError(f"Corrupt snapshot {path}: {exc}") from exc
+            finally:
+                view.release()
+
+    if validate is None:
+        validate = digest != schema_hash()
+    decoder = _Decoder(shapes, as_models=not validate)
+    value = decoder.decode(root)
+    if validate:
+        return MetaDataVersion.model_validate(value)
+    if not isinstance(value, MetaDataVersion):
+        raise ValueError(f"Snapshot {path} does not contain a MetaDataVersion")
+    return value
+
+
+class _Encoder:
+    """Turns a model tree into marshal-able tuples, interning strings and shapes."""
+
+    def __init__(self):
+        self.shapes: List[Tuple[str, Tuple[str, ...]]] = []
+        self._shape_index: Dict[Tuple[str, Tuple[str, ...]], int] = {}
+        self._strings: Dict[str, str] = {}
+
+    def _intern(self, s: str) -> str:
+        return self._strings.setdefault(s, s)
+
+    def _shape(self, model: BaseModel) -> Tuple[int, Tuple[str, ...]]:
+        fields = tuple(model.__dict__)
+        key = (type(model).__name__, fields)
+        idx = self._shape_index.get(key)
+        if idx is None:
+            idx = len(self.shapes)
+            self._shape_index[key] = idx
+            self.shapes.append((self._intern(key[0]), tuple(self._intern(f) for f in fields)))
+        return idx, fields
+
+    def encode(self, value: Any) -> Any:
+        if value is None or value is True or value is False:
+            return value
+        if isinstance(value, Enum):
+            return (_ENUM, self._intern(type(value).__name__), self.encode(value.value))
+        if isinstance(value, str):
+            return self._intern(value if type(value) is str else str.__str__(value))
+        if isinstance(value, (int, float)):
+            return value
+        if isinstance(value, BaseModel):
+            idx, fields = self._shape(value)
+            fields_set = value.model_fields_set
+            mask = 0
+            encoded: List[Any] = [idx, 0]
+            for pos, name in enumerate(fields):
+                if name in fields_set:
+                    mask |= 1 << pos
+                field_value = value.__dict__[name]
+                if field_value is not None:
+                    encoded.append(pos)
+                    encoded.append(self.encode(field_value))
+            encoded[1] = mask
+            return tuple(encoded)
+        if isinstance(value, dict):
+            return {self._intern(str(k)): self.encode(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self.encode(v) for v in value]
+        if isinstance(value, datetime):
+            return (_DATETIME, value.isoformat())
+        if isinstance(value, date):
+            return (_DATE, value.isoformat())
+        if isinstance(value, time):
+            return (_TIME, value.isoformat())
+        if isinstance(value, Decimal):
+            return (_DECIMAL, str(value))
+        raise TypeError(f"Cannot snapshot value of type {type(value).__name__}")
+
+
+class _Decoder:
+    """Rebuilds models (or plain dicts for validation) from the decoded body."""
+
+    def __init__(self, shapes: List[Tuple[str, Tuple[str, ...]]], as_models: bool):
+        self.as_models = as_models
+        self._shapes: List[Tuple[Optional[type], str, Tuple[str, ...], Dict[str, Any]]] = []
+        self._field_sets: Dict[Tuple[int, int], FrozenSet[str]] = {}
+        for class_name, fields in shapes:
+            cls = _schema_class(class_name, BaseModel)
+            if as_models and cls is None:
+                raise ValueError(f"Unknown model class {class_name!r} in snapshot")
+            if as_models and not _supports_direct_construction(cls):
+                cls = None  # fall back to model_construct for this class
+            template = dict.fromkeys(fields)
+            self._shapes.append((cls, class_name, tuple(fields), template))
+
+    def _fields_set(self, shape: int, mask: int) -> FrozenSet[str]:
+        key = (shape, mask)
+        cached = self._field_sets.get(key)
+        if cached is None:
+            fields = self._shapes[shape][2]
+            cached = frozenset(name for pos, name in enumerate(fields) if mask >> pos & 1)
+            self._field_sets[key] = cached
+        return cached
+
+    def decode(self, value: Any) -> Any:
+        kind = type(value)
+        if kind is tuple:
+            tag = value[0]
+            if tag >= 0:
+                return self._model(value)
+            return self._special(value)
+        if kind is list:
+            decode = self.decode
+            return [decode(v) if type(v) in _CONTAINERS else v for v in value]
+        if kind is dict:
+            decode = self.decode
+            return {k: (decode(v) if type(v) in _CONTAINERS else v) for k, v in value.items()}
+        return value
+
+    def _model(self, value: tuple) -> Any:
+        shape = value[0]
+        cls, class_name, fields, template = self._shapes[shape]
+        fields_set = self._fields_set(shape, value[1])
+        decode = self.decode
+        values = template.copy()
+        for i in range(2, len(value), 2):
+            v = value[i + 1]
+            values[fields[value[i]]] = decode(v) if type(v) in _CONTAINERS else v
+        if not self.as_models:
+            return {k: values[k] for k in fields if k in fields_set}
+        if cls is None:
+            model_cls = _schema_class(class_name, BaseModel)
+            return model_cls.model_construct(_fields_set=set(fields_set), **values)
+        obj = cls.__new__(cls)
+        _object_setattr(obj, "__dict__", values)
+        _object_setattr(obj, "__pydantic_fields_set__", set(fields_set))
+        _object_setattr(obj, "__pydantic_extra__", None)
+        _object_setattr(obj, "__pydantic_private__", None)
+        return obj
+
+    def _special(self, value: tuple) -> Any:
+        tag = value[0]
+        if tag == _ENUM:
+            raw = self.decode(value[2])
+            enum_cls = _schema_class(value[1], Enum) if self.as_models else None
+            if enum_cls is None:
+                return raw
+            try:
+                return enum_cls(raw)
+            except ValueError:
+                return raw
+        if tag == _DATETIME:
+            return datetime.fromisoformat(value[1])
+        if tag == _DATE:
+            return date.fromisoformat(value[1])
+        if tag == _TIME:
+            return time.fromisoformat(value[1])
+        if tag == _DECIMAL:
+            return Decimal(value[1])
+        raise ValueError(f"Unknown snapshot tag {tag}")
+
+
+_CONTAINERS = (tuple, list, dict)
+
+
+def _schema_class(name: str, base: type) -> Optional[type]:
+    candidate = getattr(_schema, name, None)
+    if isinstance(candidate, type) and issubclass(candidate, base):
+        return candidate
+    return None
+
+
+def _supports_direct_construction(cls: type) -> bool:
+    """Models without private attributes or post-init hooks can be built from a field dict."""
+    return not getattr(cls, "__private_attributes__", None) and getattr(cls, "__pydantic_post_init__", None) is None
+
+
+__all__ = [
+    "save_snapshot",
+    "load_snapshot",
+    "is_snapshot",
+    "schema_hash",
+    "StaleSnapshotError",
+]
@@ -0,0 +1,275 @@
+"""
+Content-addressed store for canonical Conditions, RangeChecks and WhereClauses.
+
+A single store can be shared by many MetaDataVersions (e.g. a metadata library
+of hundreds of defines). Objects are keyed by the SHA-256 of their canonical
+payload - the same payload used by the IR registries to derive canonical OIDs -
+so a payload seen before resolves to its canonical OID without re-deriving it,
+and every distinct Condition/WhereClause/RangeCheck is stored exactly once.
+
+Readable OIDs (``COND.VS.TEMP``) do not capture the whole payload: ``VSTESTCD
+EQ TEMP`` and ``VSTESTCD NE TEMP`` derive the same one. An OID is unique
+within its kind in the store, so the payload interned later gets the derived
+OID with a digest suffix (``COND.VS.TEMP.1a2b3c4d``).
+
+Usage:
+    with CanonicalStore("library.sqlite") as store:
+        for mdv in defines:
+            build_condition_registry(mdv, store=store)
+            build_where_registry(mdv, store=store)
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from ..schema.define import Condition, MetaDataVersion, RangeCheck, WhereClause
+from .ir import (
+    _canonical_condition_oid_from_payload,
+    _canonical_condition_payload,
+    _canonical_where_oid_from_payload,
+    _canonical_where_payload,
+    _normalise_check_value,
+    _payload_digest,
+    _ref_to_string,
+)
+
+KIND_CONDITION = "condition"
+KIND_RANGE_CHECK = "rangeCheck"
+KIND_WHERE_CLAUSE = "whereClause"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS canonical_objects (
+    kind TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    oid TEXT,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (kind, digest)
+);
+DROP INDEX IF EXISTS canonical_objects_oid;
+CREATE UNIQUE INDEX IF NOT EXISTS canonical_objects_kind_oid ON canonical_objects (kind, oid);
+"""
+
+
+class CanonicalStore:
+    """
+    Persistent content-addressed store of canonical IR objects.
+
+    Backed by SQLite (in memory by default). Lookups go through an in-process
+    memo first, so repeated payloads within a session never touch the database.
+    Writes are committed on commit(), close() or when leaving a ``with`` block.
+
+    Args:
+        path: SQLite database file; None keeps the store in memory
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = Path(path) if path is not None else None
+        self._conn = sqlite3.connect(str(path) if path is not None else ":memory:")
+        self._conn.executescript(_SCHEMA)
+        self._memo: Dict[Tuple[str, str], str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # Interning
+    # ------------------------------------------------------------------
+
+    def intern_range_check(self, range_check: Union[RangeCheck, Dict[str, Any]]) -> str:
+        """Intern a RangeCheck and return its content digest (RangeChecks have no OID)."""
+        payload = _range_check_payload(range_check)
+        digest = _payload_digest(payload)
+        key = (KIND_RANGE_CHECK, digest)
+        if key in self._memo:
+            self.hits += 1
+            return digest
+        row = self._conn.execute(
+            "SELECT 1 FROM canonical_objects WHERE kind = ? AND digest = ?", key
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            self._insert(KIND_RANGE_CHECK, digest, None, payload)
+        else:
+            self.hits += 1
+        self._memo[key] = digest
+        return digest
+
+    def intern_condition(self, cond: Condition, mdv: Optional[MetaDataVersion] = None) -> str:
+        """Intern a Condition and return its canonical OID."""
+        return self.intern_condition_payload(_canonical_condition_payload(cond, mdv))
+
+    def intern_condition_payload(self, payload: Dict[str, Any]) -> str:
+        """Intern a canonical Condition payload and return its canonical OID."""
+        return self._intern(KIND_CONDITION, payload, _canonical_condition_oid_from_payload)
+
+    def intern_where_clause(self, where: WhereClause, mdv: Optional[MetaDataVersion] = None) -> str:
+        """Intern a WhereClause and return its canonical OID."""
+        return self.intern_where_payload(_canonical_where_payload(where, mdv))
+
+    def intern_where_payload(self, payload: Dict[str, Any]) -> str:
+        """Intern a canonical WhereClause payload and return its canonical OID."""
+        return self._intern(KIND_WHERE_CLAUSE, payload, _canonical_where_oid_from_payload)
+
+    def _intern(self, kind: str, payload: Dict[str, Any], derive_oid) -> str:
+        digest = _payload_digest(payload)
+        key = (kind, digest)
+        oid = self._memo.get(key)
+        if oid is not None:
+            self.hits += 1
+            return oid
+        row = self._conn.execute(
+            "SELECT oid FROM canonical_objects WHERE kind = ? AND digest = ?", key
+        ).fetchone()
+        if row is not None:
+            self.hits += 1
+            oid = row[0]
+        else:
+            self.misses += 1
+            oid = self._unique_oid(kind, derive_oid(payload), digest)
+            stored = dict(payload)
+            if "rangeChecks" in stored:
+                # RangeChecks are stored once and referenced by digest
+                stored["rangeChecks"] = [self.intern_range_check(rc) for rc in stored["rangeChecks"]]
+            self._insert(kind, digest, oid, stored)
+        self._memo[key] = oid
+        return oid
+
+    def _unique_oid(self, kind: str, oid: str, digest: str) -> str:
+        """``oid``, or ``oid`` with a digest suffix if another payload already holds it."""
+        for candidate in (oid, f"{oid}.{digest[:8]}", f"{oid}.{digest}"):
+            taken = self._conn.execute(
+                "SELECT 1 FROM canonical_objects WHERE kind = ? AND oid = ?", (kind, candidate)
+            ).fetchone()
+            if taken is None:
+                return candidate
+        raise ValueError(f"No free canonical OID for {kind} payload {digest}")
+
+    def _insert(self, kind: str, digest: str, oid: Optional[str], payload: Dict[str, Any]) -> None:
+        self._conn.execute(
+            "INSERT OR IGNORE INTO canonical_objects (kind, digest, oid, payload) VALUES (?, ?, ?, ?)",
+            (kind, digest, oid, json.dumps(payload, sort_keys=True, separators=(",", ":"))),
+        )
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def lookup(self, digest: str, kind: str = KIND_CONDITION) -> Optional[str]:
+        """Return the canonical OID stored for a payload digest, or None."""
+        row = self._conn.execute(
+            "SELECT oid FROM canonical_objects WHERE kind = ? AND digest = ?", (kind, digest)
+        ).fetchone()
+        return row[0] if row else None
+
+    def payload(self, oid: str, kind: str = KIND_CONDITION) -> Optional[Dict[str, Any]]:
+        """
+        Return the canonical payload for an OID, with RangeCheck digests expanded.
+
+        Returns None if the OID is unknown.
+        """
+        row = self._conn.execute(
+            "SELECT payload FROM canonical_objects WHERE kind = ? AND oid = ?", (kind, oid)
+        ).fetchone()
+        if row is None:
+            return None
+        payload = json.loads(row[0])
+        if "rangeChecks" in payload:
+            payload["rangeChecks"] = [self._range_check(d) for d in payload["rangeChecks"]]
+        return payload
+
+    def condition(self, oid: str) -> Optional[Condition]:
+        """Materialise a stored Condition by canonical OID, or None if unknown."""
+        payload = self.payload(oid, KIND_CONDITION)
+        if payload is None:
+            return None
+        range_checks = [
+            RangeCheck.model_construct(
+                item=rc.get("item"),
+                comparator=rc.get("comparator"),
+                checkValues=rc.get("values", []),
+                softHard=rc.get("softHard"),
+            )
+            for rc in payload.get("rangeChecks", [])
+        ]
+        return Condition.model_construct(
+            OID=oid,
+            rangeChecks=range_checks or None,
+            conditions=payload.get("conditions"),
+            operator=payload.get("operator"),
+        )
+
+    def _range_check(self, digest: str) -> Dict[str, Any]:
+        row = self._conn.execute(
+            "SELECT payload FROM canonical_objects WHERE kind = ? AND digest = ?",
+            (KIND_RANGE_CHECK, digest),
+        ).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def oids(self, kind: str = KIND_CONDITION) -> Iterator[str]:
+        """Iterate over stored canonical OIDs of the given kind."""
+        for (oid,) in self._conn.execute(
+            "SELECT DISTINCT oid FROM canonical_objects WHERE kind = ? ORDER BY oid", (kind,)
+        ):
+            yield oid
+
+    def stats(self) -> Dict[str, int]:
+        """Object counts per kind plus memo hit/miss counters."""
+        counts = {KIND_CONDITION: 0, KIND_RANGE_CHECK: 0, KIND_WHERE_CLAUSE: 0}
+        for kind, n in self._conn.execute("SELECT kind, COUNT(*) FROM canonical_objects GROUP BY kind"):
+            counts[kind] = n
+        counts["hits"] = self.hits
+        counts["misses"] = self.misses
+        return counts
+
+    def __contains__(self, oid: str) -> bool:
+        row = self._conn.execute(
+            "SELECT 1 FROM canonical_objects WHERE oid = ? LIMIT 1", (oid,)
+        ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM canonical_objects").fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def commit(self) -> None:
+        """Flush pending writes to the database."""
+        self._conn.commit()
+
+    def close(self) -> None:
+        """Commit and close the underlying connection."""
+        if self._conn is not None:
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self) -> "CanonicalStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def _range_check_payload(range_check: Union[RangeCheck, Dict[str, Any]]) -> Dict[str, Any]:
+    """Canonical payload for a RangeCheck model or an already-canonical RangeCheck dict."""
+    if isinstance(range_check, dict):
+        return range_check
+    values: List[Any] = [_normalise_check_value(v) for v in (range_check.checkValues or [])]
+    try:
+        values = sorted(values)
+    except TypeError:
+        values = sorted(json.dumps(v, sort_keys=True) for v in values)
+    return {
+        "item": _ref_to_string(getattr(range_check, "item", None)),
+        "comparator": getattr(range_check, "comparator", None),
+        "values": values,
+        "softHard": getattr(range_check, "softHard", None),
+    }
+
+
+__all__ = [
+    "CanonicalStore",
+]
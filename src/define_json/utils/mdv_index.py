@@ -0,0 +1,225 @@
+"""
+Constant-time lookups over a Define-JSON document.
+
+MDVIndex is built in a single pass over a Define-JSON dict or a
+MetaDataVersion model and answers the questions downstream code otherwise
+answers by scanning lists: items by OID and by (domain, name), ItemGroups by
+OID and domain, CodeLists, Methods, Comments, Conditions, and WhereClauses by
+the item and check value they test.
+
+Usage:
+    index = MDVIndex(json.load(open("define.json")))
+    index.item_by_name("VS", "VSORRES")
+    index.where_clauses_for("IT.VS.VSTESTCD", "TEMP")
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from ..schema.define import MetaDataVersion
+
+
+def get_field(obj: Any, key: str, default: Any = None) -> Any:
+    """Field access that works for both dicts and Pydantic models."""
+    if isinstance(obj, dict):
+        return obj.get(key, default)
+    return getattr(obj, key, default)
+
+
+def ref_oid(value: Any) -> Optional[str]:
+    """OID of a reference given as a string or as an inline object."""
+    if value is None or isinstance(value, str):
+        return value
+    return get_field(value, "OID")
+
+
+class MDVIndex:
+    """
+    One-pass index of a Define-JSON document (dict or MetaDataVersion).
+
+    Items nested in slices (ValueLists / DatasetSpecializations) are indexed
+    under the domain of their enclosing dataset. The index does not track
+    later edits to the document; rebuild it after modifying the structure.
+    """
+
+    def __init__(self, doc: Union[Dict[str, Any], MetaDataVersion]):
+        self.doc = doc
+        self.items: Dict[str, Any] = {}
+        self.items_by_name: Dict[Tuple[str, str], List[Any]] = {}
+        self.item_groups: Dict[str, Any] = {}
+        self.item_groups_by_domain: Dict[str, List[Any]] = {}
+        self.item_group_of_item: Dict[str, Any] = {}
+        self.code_lists: Dict[str, Any] = {}
+        self.conditions: Dict[str, Any] = {}
+        self.where_clauses: Dict[str, Any] = {}
+        self.methods: Dict[str, Any] = {}
+        self.comments: Dict[str, Any] = {}
+        self._where_by_item: Dict[str, List[str]] = {}
+        self._where_by_check: Dict[Tuple[str, str], List[str]] = {}
+
+        for it in (get_field(doc, "items") or []):
+            self._add_item(it, "", None)
+        for ig in (get_field(doc, "itemGroups") or []):
+            self._add_item_group(ig, None)
+        for cl in (get_field(doc, "codeLists") or []):
+            if get_field(cl, "OID"):
+                self.code_lists[get_field(cl, "OID")] = cl
+        for method in (get_field(doc, "methods") or []):
+            if get_field(method, "OID"):
+                self.methods[get_field(method, "OID")] = method
+        for cond in (get_field(doc, "conditions") or []):
+            if get_field(cond, "OID"):
+                self.conditions[get_field(cond, "OID")] = cond
+        self._add_comments(doc)
+        for wc in (get_field(doc, "whereClauses") or []):
+            self._add_where_clause(wc)
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "MDVIndex":
+        """Build an index from a Define-JSON file (no Pydantic validation)."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict) and "metaDataVersion" in data:
+            mdv = data["metaDataVersion"]
+            data = mdv[0] if isinstance(mdv, list) and mdv else mdv
+        return cls(data)
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def _add_item(self, it: Any, domain: str, ig: Any) -> None:
+        oid = get_field(it, "OID")
+        if oid:
+            self.items.setdefault(oid, it)
+            if ig is not None:
+                self.item_group_of_item.setdefault(oid, ig)
+        name = get_field(it, "name")
+        if name:
+            self.items_by_name.setdefault((domain, name), []).append(it)
+
+    def _add_item_group(self, ig: Any, parent_domain: Optional[str]) -> None:
+        if isinstance(ig, str):
+            return  # OID reference to a top-level ItemGroup
+        domain = get_field(ig, "domain") or parent_domain or get_field(ig, "name") or ""
+        oid = get_field(ig, "OID")
+        if oid:
+            self.item_groups.setdefault(oid, ig)
+        if parent_domain is None:
+            self.item_groups_by_domain.setdefault(domain, []).append(ig)
+        for it in (get_field(ig, "items") or []):
+            self._add_item(it, domain, ig)
+        for child in (get_field(ig, "slices") or []):
+            self._add_item_group(child, domain)
+
+    def _add_comments(self, doc: Any) -> None:
+        for comment in (get_field(doc, "comments") or []):
+            if not isinstance(comment, str) and get_field(comment, "OID"):
+                self.comments[get_field(comment, "OID")] = comment
+        supplemental = (get_field(doc, "_xmlMetadata") or {}).get("commentSupplemental") if isinstance(doc, dict) else None
+        if isinstance(supplemental, dict):
+            for oid, comment in supplemental.items():
+                self.comments.setdefault(oid, comment)
+        elif isinstance(supplemental, list):
+            for comment in supplemental:
+                if isinstance(comment, dict) and comment.get("OID"):
+                    self.comments.setdefault(comment["OID"], comment)
+
+    def _add_where_clause(self, wc: Any) -> None:
+        oid = get_field(wc, "OID")
+        if not oid:
+            return
+        self.where_clauses[oid] = wc
+        seen_items = set()
+        seen_checks = set()
+        for cond_ref in (get_field(wc, "conditions") or []):
+            cond = self.conditions.get(cond_ref) if isinstance(cond_ref, str) else cond_ref
+            if cond is None:
+                continue
+            for rc in (get_field(cond, "rangeChecks") or []):
+                item_oid = ref_oid(get_field(rc, "item"))
+                if not item_oid:
+                    continue
+                if item_oid not in seen_items:
+                    seen_items.add(item_oid)
+                    self._where_by_item.setdefault(item_oid, []).append(oid)
+                for value in (get_field(rc, "checkValues") or []):
+                    key = (item_oid, str(value))
+                    if key not in seen_checks:
+                        seen_checks.add(key)
+                        self._where_by_check.setdefault(key, []).append(oid)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def item(self, oid: str) -> Optional[Any]:
+        """Item by OID (top-level, dataset or slice item)."""
+        return self.items.get(oid)
+
+    def item_by_name(self, domain: str, name: str) -> Optional[Any]:
+        """First Item named ``name`` in ``domain``, falling back to top-level Items."""
+        matches = self.items_by_name.get((domain, name)) or self.items_by_name.get(("", name))
+        return matches[0] if matches else None
+
+    def items_named(self, domain: str, name: str) -> List[Any]:
+        """All Items named ``name`` in ``domain`` (e.g. a parent and its value-level items)."""
+        return list(self.items_by_name.get((domain, name), []))
+
+    def item_group(self, oid: str) -> Optional[Any]:
+        return self.item_groups.get(oid)
+
+    def item_groups_for(self, domain: str) -> List[Any]:
+        """Top-level ItemGroups of a domain, in document order."""
+        return list(self.item_groups_by_domain.get(domain, []))
+
+    def parent_item_group(self, item_oid: str) -> Optional[Any]:
+        """ItemGroup that (first) contains the Item."""
+        return self.item_group_of_item.get(item_oid)
+
+    def code_list(self, oid: str) -> Optional[Any]:
+        return self.code_lists.get(oid)
+
+    def method(self, oid: str) -> Optional[Any]:
+        return self.methods.get(oid)
+
+    def comment(self, oid: str) -> Optional[Any]:
+        return self.comments.get(oid)
+
+    def condition(self, oid: str) -> Optional[Any]:
+        return self.conditions.get(oid)
+
+    def where_clause(self, oid: str) -> Optional[Any]:
+        return self.where_clauses.get(oid)
+
+    def where_clauses_for(self, item_oid: str, value: Optional[Any] = None) -> List[str]:
+        """OIDs of WhereClauses testing ``item_oid`` (optionally against ``value``)."""
+        if value is None:
+            return list(self._where_by_item.get(item_oid, []))
+        return list(self._where_by_check.get((item_oid, str(value)), []))
+
+    @property
+    def domains(self) -> List[str]:
+        return list(self.item_groups_by_domain.keys())
+
+    def iter_items(self) -> Iterator[Any]:
+        return iter(self.items.values())
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "itemGroups": len(self.item_groups),
+            "items": len(self.items),
+            "codeLists": len(self.code_lists),
+            "methods": len(self.methods),
+            "comments": len(self.comments),
+            "conditions": len(self.conditions),
+            "whereClauses": len(self.where_clauses),
+        }
+
+
+__all__ = [
+    "MDVIndex",
+    "get_field",
+    "ref_oid",
+]
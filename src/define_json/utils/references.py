@@ -0,0 +1,294 @@
+"""
+Reverse-reference index and unreferenced-object pruning for Define-JSON.
+
+ReferenceIndex walks a Define-JSON dict or MetaDataVersion once and records,
+for every OID, which objects refer to it and through which field. Referrers
+are the nearest enclosing object with an OID; entries of the OID-keyed
+supplemental maps under ``_xmlMetadata`` (``conditionSupplemental``,
+``standardSupplemental``, ...) count as the object named by their key.
+
+prune_unreferenced() uses the index to drop CodeLists, Methods, Comments,
+WhereClauses and Conditions nothing points at. Removal cascades (a Condition
+used only by a dropped WhereClause goes too) and runs in time linear in the
+number of references.
+
+Usage:
+    index = ReferenceIndex(data)
+    index.referrers("CL.NY")          # ['IT.DM.SEX', ...]
+    removed = prune_unreferenced(data)
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from pydantic import BaseModel
+
+from ..schema.define import MetaDataVersion
+from .mdv_index import get_field
+
+# Fields whose string (or list-of-string) values are OID references
+REFERENCE_FIELDS = frozenset({
+    "codeList", "codeListOID",
+    "method", "methodOID", "analysisMethod",
+    "comment", "comments", "commentOID",
+    "applicableWhen", "whereClause", "whereClauseOID", "conditions",
+    "item", "itemOID", "valueListOID",
+    "leafID", "archiveLocationID",
+    "standardOID", "sourceResourceOID",
+    "wasDerivedFrom",
+})
+
+# Top-level collections whose members can be pruned, and their kind names
+PRUNABLE_COLLECTIONS = {
+    "codeLists": "codeList",
+    "methods": "method",
+    "comments": "comment",
+    "whereClauses": "whereClause",
+    "conditions": "condition",
+}
+
+# _xmlMetadata maps keyed by the OID of a prunable object
+_SUPPLEMENTAL_BY_KIND = {
+    "codeList": "codeListSupplemental",
+    "method": "methodSupplemental",
+    "comment": "commentSupplemental",
+    "whereClause": "conditionSupplemental",
+}
+
+_COLLECTION_KINDS = {
+    "itemGroups": "itemGroup",
+    "slices": "itemGroup",
+    "items": "item",
+    "analyses": "analysis",
+    "displays": "display",
+    "standards": "standard",
+    "resources": "resource",
+    "dictionaries": "dictionary",
+    **PRUNABLE_COLLECTIONS,
+}
+
+Reference = Tuple[str, str, str]  # (referrer OID, referrer kind, field)
+
+
+class ReferenceIndex:
+    """
+    One-pass reverse-reference index of a Define-JSON document.
+
+    ``definitions`` maps the OID of every prunable object (CodeList, Method,
+    Comment, WhereClause, Condition) to its kind. The index does not track
+    later edits; rebuild it after modifying the document.
+    """
+
+    def __init__(self, doc: Union[Dict[str, Any], MetaDataVersion]):
+        self.doc = doc
+        self.definitions: Dict[str, str] = {}
+        self._referrers: Dict[str, List[Reference]] = {}
+        self._outgoing: Dict[str, Set[str]] = {}
+
+        root_oid = get_field(doc, "OID") or ""
+        for key, kind in PRUNABLE_COLLECTIONS.items():
+            for obj in (get_field(doc, key) or []):
+                if not isinstance(obj, str) and get_field(obj, "OID"):
+                    self.definitions[get_field(obj, "OID")] = kind
+        supplemental = _xml_metadata(doc).get("commentSupplemental")
+        if isinstance(supplemental, dict):
+            for oid in supplemental:
+                self.definitions.setdefault(oid, "comment")
+
+        self._walk(doc, root_oid, "metaDataVersion")
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def _add(self, target: str, owner: str, owner_kind: str, field: str) -> None:
+        if not target or target == owner:
+            return
+        self._referrers.setdefault(target, []).append((owner, owner_kind, field))
+        self._outgoing.setdefault(owner, set()).add(target)
+
+    def _walk(self, node: Any, owner: str, owner_kind: str) -> None:
+        fields = node if isinstance(node, dict) else node.__dict__
+        oid = fields.get("OID")
+        if isinstance(oid, str) and oid:
+            owner = oid
+        for field, value in fields.items():
+            if value is None or field == "OID":
+                continue
+            if field == "_xmlMetadata":
+                self._walk_metadata(value)
+                continue
+            if field in REFERENCE_FIELDS:
+                if isinstance(value, str):
+                    self._add(value, owner, owner_kind, field)
+                    continue
+                if isinstance(value, list) and value and all(isinstance(v, str) for v in value):
+                    for v in value:
+                        self._add(v, owner, owner_kind, field)
+                    continue
+            kind = _COLLECTION_KINDS.get(field, owner_kind)
+            if isinstance(value, list):
+                for v in value:
+                    if _is_node(v):
+                        self._walk(v, owner, kind)
+            elif _is_node(value):
+                self._walk(value, owner, kind)
+
+    def _walk_metadata(self, metadata: Any) -> None:
+        """Walk ``_xmlMetadata``: entries of OID-keyed maps are owned by their key."""
+        if not isinstance(metadata, dict):
+            return
+        for name, section in metadata.items():
+            if not isinstance(section, dict) or name in ("namespaces", "_odmMetadata"):
+                continue
+            for key, entry in section.items():
+                if not isinstance(entry, dict):
+                    continue
+                if key.startswith("_"):
+                    # Nested map, e.g. itemGroupSupplemental._itemOriginMetadata
+                    for sub_key, sub_entry in entry.items():
+                        if isinstance(sub_entry, dict):
+                            self._walk(sub_entry, sub_key, name)
+                else:
+                    self._walk(entry, key, name)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def references_to(self, oid: str) -> List[Reference]:
+        """All (referrer OID, referrer kind, field) triples pointing at ``oid``."""
+        return list(self._referrers.get(oid, []))
+
+    def referrers(self, oid: str, field: Optional[str] = None, kind: Optional[str] = None) -> List[str]:
+        """Distinct OIDs of objects referring to ``oid``, optionally filtered by field or referrer kind."""
+        seen: Dict[str, None] = {}
+        for owner, owner_kind, owner_field in self._referrers.get(oid, []):
+            if field is not None and owner_field != field:
+                continue
+            if kind is not None and owner_kind != kind:
+                continue
+            seen.setdefault(owner, None)
+        return list(seen)
+
+    def references_from(self, oid: str) -> Set[str]:
+        """OIDs referenced by the object ``oid`` (including its supplemental metadata)."""
+        return set(self._outgoing.get(oid, ()))
+
+    def is_referenced(self, oid: str) -> bool:
+        return bool(self._referrers.get(oid))
+
+    def referenced_by_field(self, fields: Iterable[str], kind: Optional[str] = None) -> Set[str]:
+        """Every OID referenced through one of ``fields`` (optionally only from referrers of ``kind``)."""
+        wanted = set(fields)
+        return {
+            target
+            for target, refs in self._referrers.items()
+            if any(f in wanted and (kind is None or k == kind) for _, k, f in refs)
+        }
+
+    def unreferenced(self, kinds: Optional[Iterable[str]] = None) -> List[str]:
+        """OIDs of definitions (of the given kinds) that nothing refers to."""
+        wanted = set(kinds) if kinds is not None else None
+        return [
+            oid for oid, kind in self.definitions.items()
+            if (wanted is None or kind in wanted) and not self._referrers.get(oid)
+        ]
+
+
+def prune_unreferenced(
+    doc: Union[Dict[str, Any], MetaDataVersion],
+    kinds: Optional[Iterable[str]] = None,
+    keep: Optional[Iterable[str]] = None,
+    index: Optional[ReferenceIndex] = None,
+) -> Dict[str, List[str]]:
+    """
+    Remove unreferenced CodeLists, Methods, Comments, WhereClauses and Conditions in place.
+
+    Removal cascades: dropping an object releases the references it held, so
+    e.g. a Condition used only by an unreferenced WhereClause is removed too.
+    Supplemental ``_xmlMetadata`` entries of removed objects are dropped.
+
+    Args:
+        doc: Define-JSON dict or MetaDataVersion (modified in place)
+        kinds: Kinds to prune (default: all of codeList, method, comment,
+            whereClause, condition)
+        keep: OIDs that must never be removed
+        index: Prebuilt ReferenceIndex for ``doc``
+
+    Returns:
+        Removed OIDs grouped by kind
+    """
+    index = index or ReferenceIndex(doc)
+    wanted = set(kinds) if kinds is not None else set(PRUNABLE_COLLECTIONS.values())
+    protected = set(keep or ())
+
+    # Count distinct referrers per target, then release references of removed objects
+    counts: Dict[str, int] = {
+        oid: len({owner for owner, _, _ in index._referrers.get(oid, [])})
+        for oid in index.definitions
+    }
+    removed: Dict[str, List[str]] = {}
+    removed_oids: Set[str] = set()
+    worklist = [
+        oid for oid, kind in index.definitions.items()
+        if kind in wanted and counts[oid] == 0 and oid not in protected
+    ]
+    while worklist:
+        oid = worklist.pop()
+        if oid in removed_oids:
+            continue
+        removed_oids.add(oid)
+        removed.setdefault(index.definitions[oid], []).append(oid)
+        for target in index._outgoing.get(oid, ()):
+            if target not in counts:
+                continue
+            counts[target] -= 1
+            if (counts[target] == 0 and index.definitions[target] in wanted
+                    and target not in protected and target not in removed_oids):
+                worklist.append(target)
+
+    if removed_oids:
+        _remove_definitions(doc, removed_oids, removed)
+    for oids in removed.values():
+        oids.sort()
+    return removed
+
+
+def _is_node(value: Any) -> bool:
+    return isinstance(value, (dict, BaseModel))
+
+
+def _xml_metadata(doc: Any) -> Dict[str, Any]:
+    metadata = doc.get("_xmlMetadata") if isinstance(doc, dict) else None
+    return metadata if isinstance(metadata, dict) else {}
+
+
+def _remove_definitions(doc: Any, oids: Set[str], removed: Dict[str, List[str]]) -> None:
+    for key in PRUNABLE_COLLECTIONS:
+        collection = get_field(doc, key)
+        if not collection:
+            continue
+        kept = [
+            obj for obj in collection
+            if isinstance(obj, str) or get_field(obj, "OID") not in oids
+        ]
+        if len(kept) == len(collection):
+            continue
+        if isinstance(doc, dict):
+            doc[key] = kept
+        else:
+            setattr(doc, key, kept)
+
+    metadata = _xml_metadata(doc)
+    for kind, section_name in _SUPPLEMENTAL_BY_KIND.items():
+        section = metadata.get(section_name)
+        if isinstance(section, dict):
+            for oid in removed.get(kind, ()):
+                section.pop(oid, None)
+
+
+__all__ = [
+    "ReferenceIndex",
+    "prune_unreferenced",
+    "REFERENCE_FIELDS",
+]
@@ -3,21 +3,28 @@ SDMX data cube utilities for Define-JSON IR.
 
 Provides:
 - Policy-driven classification of Items into Dimension/Measure/Attribute roles
-- DataStructureDefinition building
+- DataStructureDefinition building (single domain or many domains in one pass)
 - WhereClause → GroupKey derivation
-- Attribute relationship inference
+- Attribute relationship inference (vectorised with pandas when available)
 """
 
 from pathlib import Path
-from typing import Dict, Any, Tuple, List, Set, Optional
+from typing import Dict, Any, Iterable, Tuple, List, Set, Optional, Union
 from datetime import datetime
-import yaml
 import logging
 
+try:
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+    pd = None
+
 from ..schema.define import (
     MetaDataVersion,
     ItemGroup,
     Item,
+    CubeComponent,
     Dimension,
     Measure,
     DataAttribute,
@@ -28,6 +35,7 @@ from ..schema.define import (
     GroupKey,
     Comparator,
 )
+from .config_loader import load_yaml
 
 logger = logging.getLogger(__name__)
 
@@ -64,18 +72,17 @@ def load_data_cube_config(path: Path) -> Dict[str, Any]:
     if not path.exists():
         raise ValueError(f"Data cube configuration file not found: {path}")
     
-    with open(path, 'r') as f:
-        config = yaml.safe_load(f)
-    
-    # Validate required fields
+    return load_yaml(path, validator=_validate_data_cube_config)
+
+
+def _validate_data_cube_config(config: Dict[str, Any]) -> None:
+    """Check the required fields of a data cube configuration."""
     if "domain" not in config:
         raise ValueError("Configuration must specify 'domain'")
     if "dimensions" not in config:
         raise ValueError("Configuration must specify 'dimensions' list")
     if "measures" not in config:
         raise ValueError("Configuration must specify 'measures' list")
-    
-    return config
 
 
 # Backward compatibility alias
@@ -134,10 +141,67 @@ def classify_item_role(variable_name: str, config: Dict[str, Any]) -> str:
     )
 
 
+class _DSDItemIndex:
+    """
+    Name and OID lookups shared by DSD builds over one MetaDataVersion.
+    
+    Built once: Items by name (top-level Items first, then ItemGroup Items in
+    document order), the first ItemGroup of each domain, and the OIDs already
+    present in mdv.items so components are added to it at most once.
+    Components of earlier DSDs are never resolved as source Items.
+    """
+    
+    def __init__(self, mdv: MetaDataVersion):
+        self.by_name: Dict[str, Item] = {}
+        for item in mdv.items or []:
+            if item.name and not isinstance(item, CubeComponent):
+                self.by_name.setdefault(item.name, item)
+        self.domain_groups: Dict[str, ItemGroup] = {}
+        for ig in mdv.itemGroups or []:
+            if ig.domain:
+                self.domain_groups.setdefault(ig.domain, ig)
+            for item in ig.items or []:
+                if isinstance(item, Item) and item.name:
+                    self.by_name.setdefault(item.name, item)
+        self.top_level_oids: Set[str] = {it.OID for it in mdv.items or []}
+    
+    def add_top_level(self, mdv: MetaDataVersion, component: Any) -> None:
+        """Append a component to mdv.items unless an object with its OID is already there."""
+        if component.OID in self.top_level_oids:
+            return
+        if mdv.items is None:
+            mdv.items = []
+        mdv.items.append(component)
+        self.top_level_oids.add(component.OID)
+
+
+def _dsd_component_specs(config: Dict[str, Any]) -> List[Tuple[Any, str, str, str, Optional[str]]]:
+    """(component class, OID prefix, kind label, variable, attachment role) in DSD order."""
+    specs: List[Tuple[Any, str, str, str, Optional[str]]] = []
+    for dim_name in config.get("dimensions", []):
+        specs.append((Dimension, "DIM", "Dimension", dim_name, None))
+    for measure_name in config.get("measures", []):
+        specs.append((Measure, "MEAS", "Measure", measure_name, None))
+    
+    attributes = config.get("attributes", {})
+    for attr_name in attributes.get("dataset_level", []):
+        specs.append((DataAttribute, "ATTR", "Attribute", attr_name, "Dataset"))
+    for level, prefix in (("dimension_level", "Dimension"), ("measure_level", "Measure")):
+        for attr_spec in attributes.get(level, []):
+            if not isinstance(attr_spec, dict):
+                continue
+            attached_to = attr_spec.get("attached_to", [])
+            # Encode attachment info in the role
+            specs.append((DataAttribute, "ATTR", "Attribute", attr_spec.get("variable"),
+                          f"{prefix}:{','.join(attached_to)}"))
+    return specs
+
+
 def build_dsd_for_domain(
     mdv: MetaDataVersion,
     domain: str,
-    config: Dict[str, Any]
+    config: Dict[str, Any],
+    index: Optional[_DSDItemIndex] = None,
 ) -> ItemGroup:
     """
     Build DataStructureDefinition for a domain using configuration-driven classification.
@@ -151,6 +215,8 @@ def build_dsd_for_domain(
         mdv: MetaDataVersion containing Items and ItemGroups
         domain: Domain code (e.g., "LB")
         config: Data cube configuration dictionary from load_data_cube_config()
+        index: Lookup index shared across domains (see build_dsds); built
+            from mdv when omitted
         
     Returns:
         ItemGroup with itemGroupType="DataCube" representing the DSD
@@ -163,14 +229,10 @@ def build_dsd_for_domain(
             f"Configuration domain '{config['domain']}' does not match requested domain '{domain}'"
         )
     
-    # Find the domain ItemGroup
-    domain_group = None
-    for ig in mdv.itemGroups or []:
-        if ig.domain == domain:
-            domain_group = ig
-            break
+    index = index or _DSDItemIndex(mdv)
     
-    if not domain_group:
+    # Find the domain ItemGroup
+    if domain not in index.domain_groups:
         raise ValueError(f"Domain '{domain}' not found in MetaDataVersion")
     
     # Build DSD ItemGroup using model_construct to handle required fields
@@ -184,147 +246,61 @@ def build_dsd_for_domain(
         items=[]
     )
     
-    # Helper: Find Item by name in MDV (check both top-level items and ItemGroup items)
-    def find_item_by_name(name: str) -> Optional[Item]:
-        # First check top-level items
-        for item in mdv.items or []:
-            if item.name == name:
-                return item
-        # Then check items in ItemGroups (especially the domain ItemGroup)
-        for ig in mdv.itemGroups or []:
-            if ig.items:
-                for item in ig.items:
-                    if isinstance(item, Item) and item.name == name:
-                        return item
-        return None
-    
-    # Add Dimension components
-    for dim_name in config.get("dimensions", []):
-        item = find_item_by_name(dim_name)
+    for component_cls, prefix, label, name, role in _dsd_component_specs(config):
+        item = index.by_name.get(name)
         if not item:
-            logger.warning(f"Dimension '{dim_name}' not found in Items, skipping")
+            logger.warning(f"{label} '{name}' not found in Items, skipping")
             continue
         
-        dimension = Dimension.model_construct(
-            OID=f"DIM.{domain}.{dim_name}",
-            name=dim_name,
-            label=item.label or dim_name,
+        fields = dict(
+            OID=f"{prefix}.{domain}.{name}",
+            name=name,
+            label=item.label or name,
             dataType=item.dataType,
             item=item.OID,  # Reference to the original Item (required)
             lastUpdated=datetime.now()  # Required field
         )
-        # Add Dimension directly to DSD items (inlined)
-        dsd.items.append(dimension)
+        if role is not None:
+            fields["role"] = role  # Attachment level
+        component = component_cls.model_construct(**fields)
+        # Add the component directly to DSD items (inlined)
+        dsd.items.append(component)
         
-        # Also add the Dimension to MDV top-level items for global access
-        if not any(it.OID == dimension.OID for it in mdv.items or []):
-            mdv.items.append(dimension)
+        # Also add it to MDV top-level items for global access
+        index.add_top_level(mdv, component)
     
-    # Add Measure components
-    for measure_name in config.get("measures", []):
-        item = find_item_by_name(measure_name)
-        if not item:
-            logger.warning(f"Measure '{measure_name}' not found in Items, skipping")
-            continue
-        
-        measure = Measure.model_construct(
-            OID=f"MEAS.{domain}.{measure_name}",
-            name=measure_name,
-            label=item.label or measure_name,
-            dataType=item.dataType,
-            item=item.OID,  # Reference to the original Item (required)
-            lastUpdated=datetime.now()  # Required field
-        )
-        # Add Measure directly to DSD items (inlined)
-        dsd.items.append(measure)
-        
-        # Also add the Measure to MDV top-level items for global access
-        if not any(it.OID == measure.OID for it in mdv.items or []):
-            mdv.items.append(measure)
+    return dsd
+
+
+def build_dsds(
+    mdv: MetaDataVersion,
+    configs: Union[Dict[str, Dict[str, Any]], Iterable[Dict[str, Any]]],
+) -> Dict[str, ItemGroup]:
+    """
+    Build DataStructureDefinitions for many domains in one pass.
     
-    # Add Attribute components
-    attributes = config.get("attributes", {})
+    The name/OID index is built once and shared, so the cost grows linearly
+    with the number of Items plus components rather than with their product.
+    Components added to mdv.items for one domain are never picked up as
+    source Items for the next, and rebuilding does not duplicate them.
     
-    # Dataset-level attributes
-    for attr_name in attributes.get("dataset_level", []):
-        item = find_item_by_name(attr_name)
-        if not item:
-            logger.warning(f"Attribute '{attr_name}' not found in Items, skipping")
-            continue
-        
-        attribute = DataAttribute.model_construct(
-            OID=f"ATTR.{domain}.{attr_name}",
-            name=attr_name,
-            label=item.label or attr_name,
-            dataType=item.dataType,
-            item=item.OID,  # Reference to the original Item (required)
-            role="Dataset",  # Attachment level
-            lastUpdated=datetime.now()  # Required field
-        )
-        # Add Attribute directly to DSD items (inlined)
-        dsd.items.append(attribute)
-        
-        # Also add to MDV top-level items for global access
-        if not any(it.OID == attribute.OID for it in mdv.items or []):
-            mdv.items.append(attribute)
-    
-    # Dimension-level attributes
-    for attr_spec in attributes.get("dimension_level", []):
-        if not isinstance(attr_spec, dict):
-            continue
-        attr_name = attr_spec.get("variable")
-        attached_to = attr_spec.get("attached_to", [])
-        
-        item = find_item_by_name(attr_name)
-        if not item:
-            logger.warning(f"Attribute '{attr_name}' not found in Items, skipping")
-            continue
-        
-        attribute = DataAttribute.model_construct(
-            OID=f"ATTR.{domain}.{attr_name}",
-            name=attr_name,
-            label=item.label or attr_name,
-            dataType=item.dataType,
-            item=item.OID,
-            role=f"Dimension:{','.join(attached_to)}",  # Encode attachment info
-            lastUpdated=datetime.now()  # Required field
-        )
-        # Add Attribute directly to DSD items (inlined)
-        dsd.items.append(attribute)
-        
-        # Also add to MDV top-level items for global access
-        if not any(it.OID == attribute.OID for it in mdv.items or []):
-            mdv.items.append(attribute)
-    
-    # Measure-level attributes
-    for attr_spec in attributes.get("measure_level", []):
-        if not isinstance(attr_spec, dict):
-            continue
-        attr_name = attr_spec.get("variable")
-        attached_to = attr_spec.get("attached_to", [])
-        
-        item = find_item_by_name(attr_name)
-        if not item:
-            logger.warning(f"Attribute '{attr_name}' not found in Items, skipping")
-            continue
+    Args:
+        mdv: MetaDataVersion containing Items and ItemGroups
+        configs: Data cube configurations, either a list or a mapping of
+            domain → configuration
         
-        attribute = DataAttribute.model_construct(
-            OID=f"ATTR.{domain}.{attr_name}",
-            name=attr_name,
-            label=item.label or attr_name,
-            dataType=item.dataType,
-            item=item.OID,
-            role=f"Measure:{','.join(attached_to)}",  # Encode attachment info
-            lastUpdated=datetime.now()  # Required field
-        )
-        # Add Attribute directly to DSD items (inlined)
-        dsd.items.append(attribute)
+    Returns:
+        DSD ItemGroups keyed by domain, in configuration order
         
-        # Also add to MDV top-level items for global access
-        if not any(it.OID == attribute.OID for it in mdv.items or []):
-            mdv.items.append(attribute)
-    
-    return dsd
+    Raises:
+        ValueError: If a configured domain is not found in the MetaDataVersion
+    """
+    config_list = list(configs.values()) if isinstance(configs, dict) else list(configs)
+    index = _DSDItemIndex(mdv)
+    return {
+        config["domain"]: build_dsd_for_domain(mdv, config["domain"], config, index=index)
+        for config in config_list
+    }
 
 
 def validate_dsd_completeness(
@@ -358,12 +334,12 @@ def validate_dsd_completeness(
     missing_oids = all_variable_oids - classified_oids
     
     # Convert OIDs to names for better error messages
-    missing_names = []
-    for oid in missing_oids:
-        for item in mdv.items or []:
-            if item.OID == oid:
-                missing_names.append(item.name or oid)
-                break
+    items_by_oid = {item.OID: item for item in reversed(mdv.items or [])}
+    missing_names = [
+        items_by_oid[oid].name or oid
+        for oid in missing_oids
+        if oid in items_by_oid
+    ]
     
     is_complete = len(missing_names) == 0
     return is_complete, missing_names
@@ -371,80 +347,139 @@ def validate_dsd_completeness(
 
 # Phase 2: WhereClause → GroupKey Derivation
 
-def is_clean_whereclause(
-    where_clause: WhereClause,
-    dsd: ItemGroup,
-    mdv: MetaDataVersion
-) -> bool:
+class _GroupKeyContext:
     """
-    Check if a WhereClause is "clean" (derivable to GroupKey).
+    Lookups shared by WhereClause → GroupKey derivation against one DSD.
     
-    A clean WhereClause:
-    - Has exactly ONE condition (single AND group, no OR logic)
-    - All RangeChecks use EQ comparator
-    - All RangeChecks reference Dimension Items (not Measures/Attributes)
-    - All RangeChecks have single checkValue (not multi-value)
+    Built once per DSD/MetaDataVersion pair: Conditions by OID, the Item OIDs
+    behind the DSD's Dimensions, the Item → Dimension map and the Dimensions
+    in DSD order.
+    """
     
-    Args:
-        where_clause: WhereClause to validate
-        dsd: DataStructureDefinition to check dimension membership
-        mdv: MetaDataVersion for Item lookups
-        
-    Returns:
-        True if WhereClause is clean (derivable), False otherwise
+    def __init__(self, dsd: ItemGroup, mdv: MetaDataVersion):
+        self.dsd = dsd
+        self.conditions: Dict[str, Condition] = {}
+        for cond in reversed(mdv.conditions or []):
+            self.conditions[cond.OID] = cond  # first definition wins, as with next(...)
+        self.ordered_dimensions: List[Dimension] = [c for c in dsd.items or [] if isinstance(c, Dimension)]
+        self.item_to_dimension: Dict[str, Dimension] = {}
+        for component in self.ordered_dimensions:
+            if hasattr(component, 'item'):
+                self.item_to_dimension[component.item] = component
+        self.dimension_item_oids: Set[str] = set(self.item_to_dimension)
+
+
+def _classify_whereclause(
+    where_clause: WhereClause,
+    context: _GroupKeyContext
+) -> Tuple[Optional[Condition], Optional[str]]:
+    """
+    Return (condition, None) for a clean WhereClause, or (None, reason) otherwise.
+    
+    See is_clean_whereclause() for the rules.
     """
     if not where_clause.conditions:
-        return False
+        return None, "no_conditions"
     
     # Must have exactly one condition (no OR logic between conditions)
     if len(where_clause.conditions) > 1:
         logger.debug(f"WhereClause {where_clause.OID} has multiple conditions (OR logic), not derivable")
-        return False
+        return None, "multiple_conditions"
     
     # Resolve condition if it's a string OID
     cond_ref = where_clause.conditions[0]
     if isinstance(cond_ref, str):
-        if mdv.conditions:
-            condition = next((c for c in mdv.conditions if c.OID == cond_ref), None)
-            if not condition:
-                return False
-        else:
-            return False
+        condition = context.conditions.get(cond_ref)
+        if not condition:
+            return None, "unresolved_condition"
     else:
         condition = cond_ref
     
     # Condition must not have nested conditions (no complex logic)
     if condition.conditions and len(condition.conditions) > 0:
         logger.debug(f"WhereClause {where_clause.OID} has nested conditions, not derivable")
-        return False
+        return None, "nested_conditions"
     
     # Check all RangeChecks
     if not condition.rangeChecks:
-        return False
-    
-    # Get dimension Item OIDs from DSD
-    dimension_item_oids = set()
-    for component in dsd.items or []:
-        if isinstance(component, Dimension) and hasattr(component, 'item'):
-            dimension_item_oids.add(component.item)
+        return None, "no_range_checks"
     
     for rc in condition.rangeChecks:
         # Must use EQ comparator
         if rc.comparator != Comparator.EQ:
             logger.debug(f"RangeCheck uses {rc.comparator}, not EQ - not derivable")
-            return False
+            return None, "non_eq_comparator"
         
         # Must reference a Dimension Item
-        if rc.item not in dimension_item_oids:
+        if rc.item not in context.dimension_item_oids:
             logger.debug(f"RangeCheck references non-dimension item {rc.item} - not derivable")
-            return False
+            return None, "non_dimension_item"
         
         # Must have exactly one checkValue
         if not rc.checkValues or len(rc.checkValues) != 1:
             logger.debug(f"RangeCheck has multiple checkValues - not derivable")
-            return False
+            return None, "multi_value_check"
+    
+    return condition, None
+
+
+def _groupkey_from_condition(
+    where_clause: WhereClause,
+    condition: Condition,
+    context: _GroupKeyContext
+) -> Optional[GroupKey]:
+    """Build the GroupKey of a clean WhereClause from its resolved condition."""
+    # Extract dimension values from RangeChecks
+    dimension_values = {}  # Dimension OID → value
+    for rc in condition.rangeChecks:
+        dim_component = context.item_to_dimension.get(rc.item)
+        if dim_component is not None:
+            dimension_values[dim_component.OID] = rc.checkValues[0]
+    
+    # Build keyValues string: ordered by dimension order in DSD
+    # Format: "value1.value2.value3"
+    key_parts = [
+        dimension_values[dim.OID]
+        for dim in context.ordered_dimensions
+        if dim.OID in dimension_values
+    ]
+    
+    if not key_parts:
+        logger.warning(f"No dimension values extracted from {where_clause.OID}")
+        return None
+    
+    # describedBy references the DSD itself (the DataStructureDefinition ItemGroup)
+    # This associates the GroupKey with the cube structure
+    return GroupKey.model_construct(
+        keyValues=".".join(key_parts),
+        describedBy=context.dsd.OID  # Reference to DSD ItemGroup
+    )
+
+
+def is_clean_whereclause(
+    where_clause: WhereClause,
+    dsd: ItemGroup,
+    mdv: MetaDataVersion
+) -> bool:
+    """
+    Check if a WhereClause is "clean" (derivable to GroupKey).
+    
+    A clean WhereClause:
+    - Has exactly ONE condition (single AND group, no OR logic)
+    - All RangeChecks use EQ comparator
+    - All RangeChecks reference Dimension Items (not Measures/Attributes)
+    - All RangeChecks have single checkValue (not multi-value)
     
-    return True
+    Args:
+        where_clause: WhereClause to validate
+        dsd: DataStructureDefinition to check dimension membership
+        mdv: MetaDataVersion for Item lookups
+        
+    Returns:
+        True if WhereClause is clean (derivable), False otherwise
+    """
+    condition, _ = _classify_whereclause(where_clause, _GroupKeyContext(dsd, mdv))
+    return condition is not None
 
 
 def derive_groupkey_from_whereclause(
@@ -462,74 +497,58 @@ def derive_groupkey_from_whereclause(
     - Single checkValue per RangeCheck
     
     Args:
-        where_clause: WhereClause to derive from
-        dsd: DataStructureDefinition defining the cube dimensions
-        mdv: MetaDataVersion for Item lookups
+        where_clause: WhereClause to convert
+        dsd: DataStructureDefinition with Dimension components
+        mdv: MetaDataVersion for lookups
         
     Returns:
         GroupKey instance if derivable, None if not clean
     """
-    # Check if WhereClause is clean
-    if not is_clean_whereclause(where_clause, dsd, mdv):
+    context = _GroupKeyContext(dsd, mdv)
+    condition, _ = _classify_whereclause(where_clause, context)
+    if condition is None:
         return None
+    return _groupkey_from_condition(where_clause, condition, context)
+
+
+def derive_groupkeys(
+    where_clauses: Optional[Iterable[WhereClause]],
+    dsd: ItemGroup,
+    mdv: MetaDataVersion
+) -> Tuple[Dict[str, GroupKey], Dict[str, str]]:
+    """
+    Derive GroupKeys for many WhereClauses against one DSD.
     
-    # Resolve condition if it's a string OID
-    cond_ref = where_clause.conditions[0]
-    if isinstance(cond_ref, str):
-        if mdv.conditions:
-            condition = next((c for c in mdv.conditions if c.OID == cond_ref), None)
-            if not condition:
-                return None
-        else:
-            return None
-    else:
-        condition = cond_ref
-    
-    # Build map: Item OID → Dimension component
-    item_to_dimension = {}
-    for component in dsd.items or []:
-        if isinstance(component, Dimension) and hasattr(component, 'item'):
-            item_to_dimension[component.item] = component
-    
-    # Extract dimension values from RangeChecks
-    # We need to maintain order according to DSD dimension order
-    dimension_values = {}  # Dimension OID → value
-    dimension_oids_used = []  # Track which dimensions are constrained
-    
-    for rc in condition.rangeChecks:
-        if rc.item in item_to_dimension:
-            dim_component = item_to_dimension[rc.item]
-            dimension_values[dim_component.OID] = rc.checkValues[0]
-            dimension_oids_used.append(dim_component.OID)
-    
-    # Build keyValues string: ordered by dimension order in DSD
-    # Format: "value1.value2.value3"
-    ordered_dimensions = [comp for comp in dsd.items if isinstance(comp, Dimension)]
-    key_parts = []
-    described_by_dims = []
-    
-    for dim in ordered_dimensions:
-        if dim.OID in dimension_values:
-            key_parts.append(dimension_values[dim.OID])
-            described_by_dims.append(dim.OID)
-    
-    if not key_parts:
-        logger.warning(f"No dimension values extracted from {where_clause.OID}")
-        return None
-    
-    keyValues_str = ".".join(key_parts)
-    
-    # Create GroupKey
-    # describedBy should reference the DSD itself (the DataStructureDefinition ItemGroup)
-    # This associates the GroupKey with the cube structure
-    describedBy_ref = dsd.OID
-    
-    groupkey = GroupKey.model_construct(
-        keyValues=keyValues_str,
-        describedBy=describedBy_ref  # Reference to DSD ItemGroup
-    )
+    Condition and Dimension lookups are built once, so the whole batch runs
+    in time linear in the number of WhereClauses, Conditions and DSD
+    components.
     
-    return groupkey
+    Args:
+        where_clauses: WhereClauses to convert (None: all of mdv.whereClauses)
+        dsd: DataStructureDefinition with Dimension components
+        mdv: MetaDataVersion for lookups
+        
+    Returns:
+        Tuple of (groupkeys, rejected)
+        - groupkeys: WhereClause OID → GroupKey for every clean WhereClause
+        - rejected: WhereClause OID → reason it is not derivable (e.g.
+          "multiple_conditions", "non_eq_comparator", "non_dimension_item")
+    """
+    if where_clauses is None:
+        where_clauses = mdv.whereClauses or []
+    context = _GroupKeyContext(dsd, mdv)
+    groupkeys: Dict[str, GroupKey] = {}
+    rejected: Dict[str, str] = {}
+    for wc in where_clauses:
+        condition, reason = _classify_whereclause(wc, context)
+        if condition is not None:
+            groupkey = _groupkey_from_condition(wc, condition, context)
+            if groupkey is not None:
+                groupkeys[wc.OID] = groupkey
+                continue
+            reason = "no_dimension_values"
+        rejected[wc.OID] = reason
+    return groupkeys, rejected
 
 
 # Phase 3: Attribute Relationship Inference
@@ -662,6 +681,124 @@ def analyze_attribute_variance(
     }
 
 
+def _slice_rows(slices: List[ItemGroup], slice_data: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+    """Data rows of the slices that have data, keyed by WhereClause OID in slice order."""
+    rows: Dict[str, Dict[str, str]] = {}
+    for slice_ig in slices:
+        if not slice_ig.applicableWhen:
+            continue
+        wc_oid = slice_ig.applicableWhen[0]
+        if wc_oid in slice_data:
+            rows[wc_oid] = slice_data[wc_oid]
+    return rows
+
+
+# Placeholder distinguishing a present None value from a missing key when factorising
+_NONE_VALUE = object()
+
+
+def _factorize_column(rows: List[Dict[str, Any]], name: str, keep_none: bool):
+    """Integer codes for one column; missing values (and None unless keep_none) become NaN."""
+    values = []
+    for data in rows:
+        if name not in data:
+            values.append(None)
+        else:
+            value = data[name]
+            values.append(_NONE_VALUE if value is None and keep_none else value)
+    codes, _ = pd.factorize(pd.Series(values, dtype=object))
+    return pd.Series(codes, dtype="float64").where(codes >= 0)
+
+
+def analyze_attribute_variances(
+    attribute_names: List[str],
+    slices: List[ItemGroup],
+    slice_data: Dict[str, Dict[str, str]],
+    dsd: ItemGroup,
+    mdv: MetaDataVersion
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Analyze how several attributes vary across slices, all in one pass.
+    
+    Produces the same report as analyze_attribute_variance() for each
+    attribute. With pandas installed the slice data is turned into a frame of
+    categorical codes once and every attribute is classified together from
+    grouped-uniqueness counts (one groupby per dimension); without pandas it
+    falls back to analyzing the attributes one at a time.
+    
+    Args:
+        attribute_names: Names of the attributes to analyze
+        slices: List of ItemGroup slices (type=DatasetSpecialization)
+        slice_data: Dict mapping WhereClause OID to attribute/dimension values
+        dsd: DataStructureDefinition containing dimensions
+        mdv: MetaDataVersion for lookups
+        
+    Returns:
+        Dict mapping attribute name to its variance report
+    """
+    if not PANDAS_AVAILABLE:
+        return {
+            name: analyze_attribute_variance(name, slices, slice_data, dsd, mdv)
+            for name in attribute_names
+        }
+    
+    dimension_names = [c.name for c in dsd.items or [] if isinstance(c, Dimension)]
+    rows = list(_slice_rows(slices, slice_data).values())
+    
+    # One frame of codes per role: attributes keep present-but-None values,
+    # dimensions treat None like a missing value
+    attr_frame = pd.DataFrame(
+        {name: _factorize_column(rows, name, keep_none=True) for name in attribute_names},
+        index=pd.RangeIndex(len(rows)),
+    )
+    dim_frame = pd.DataFrame(
+        {name: _factorize_column(rows, name, keep_none=False) for name in dimension_names},
+        index=pd.RangeIndex(len(rows)),
+    )
+    
+    present = attr_frame.notna().any() if len(rows) else pd.Series(False, index=attr_frame.columns)
+    unique_counts = attr_frame.nunique()
+    
+    # For each dimension: does each attribute take several values overall (across
+    # groups) and is it single-valued inside every group of that dimension?
+    varies_with: Dict[str, List[str]] = {name: [] for name in attribute_names}
+    for dim_name in dimension_names:
+        has_dim = dim_frame[dim_name].notna()
+        if not has_dim.any():
+            continue
+        attrs_with_dim = attr_frame[has_dim]
+        across = attrs_with_dim.nunique() > 1
+        within = (attrs_with_dim.groupby(dim_frame.loc[has_dim, dim_name]).nunique() > 1).any()
+        for name in attribute_names:
+            if across[name] and not within[name]:
+                varies_with[name].append(dim_name)
+    
+    report: Dict[str, Dict[str, Any]] = {}
+    for name in attribute_names:
+        if not present[name]:
+            logger.warning(f"No data found for attribute {name}")
+            report[name] = {"level": "unknown", "varies_with": [], "reason": "no_data"}
+        elif unique_counts[name] == 1:
+            first = attr_frame[name].first_valid_index()
+            report[name] = {
+                "level": "dataset",
+                "varies_with": [],
+                "constant_value": rows[first][name]
+            }
+        elif varies_with[name]:
+            report[name] = {
+                "level": "dimension",
+                "varies_with": varies_with[name]
+            }
+        else:
+            report[name] = {
+                "level": "observation",
+                "varies_with": dimension_names,  # Varies with full key
+                "reason": "no_clear_dimension_relationship"
+            }
+    return report
+
+
 def infer_attribute_relationships(
     dsd: ItemGroup,
     slices: List[ItemGroup],
@@ -687,9 +824,11 @@ def infer_attribute_relationships(
     # Find all DataAttribute components in DSD
     attributes = [item for item in dsd.items or [] if isinstance(item, DataAttribute)]
     
+    # Analyze variance for all attributes together
+    variances = analyze_attribute_variances([attr.name for attr in attributes], slices, slice_data, dsd, mdv)
+    
     for attr in attributes:
-        # Analyze variance for this attribute
-        variance = analyze_attribute_variance(attr.name, slices, slice_data, dsd, mdv)
+        variance = variances[attr.name]
         
         report[attr.name] = variance
         
@@ -715,15 +854,68 @@ def infer_attribute_relationships(
     return report
 
 
+def _configured_attribute_names(config: Dict[str, Any]) -> List[str]:
+    """Attribute variables named anywhere in a configuration's attributes section."""
+    attributes = config.get("attributes", {})
+    names = list(attributes.get("dataset_level", []))
+    for level in ("dimension_level", "measure_level"):
+        for attr_spec in attributes.get(level, []):
+            if isinstance(attr_spec, dict) and attr_spec.get("variable"):
+                names.append(attr_spec["variable"])
+    return list(dict.fromkeys(names))
+
+
+def suggest_attribute_config(
+    data: Any,
+    config: Dict[str, Any],
+    attributes: Optional[List[str]] = None,
+    sample_size: int = 100_000,
+) -> Dict[str, Any]:
+    """
+    Re-derive a configuration's attribute attachments from observation data.
+    
+    Runs functional-dependency discovery (see utils.dependency_discovery)
+    between the configured dimensions and each attribute, and returns a copy
+    of the configuration whose ``attributes`` section holds the suggested
+    dataset/dimension/measure-level attachments.
+    
+    Args:
+        data: Observation data (pandas DataFrame or pyarrow Table)
+        config: Data cube configuration from load_data_cube_config()
+        attributes: Attribute columns to place (default: those already named
+            in the configuration)
+        sample_size: Rows checked before verifying on the full data
+        
+    Returns:
+        New configuration dictionary
+        
+    Raises:
+        ImportError: If pandas is not installed
+    """
+    if not PANDAS_AVAILABLE:
+        raise ImportError("pandas is required for attribute discovery from data")
+    from .dependency_discovery import DependencyDiscovery
+    
+    discovery = DependencyDiscovery(data, config["dimensions"], sample_size=sample_size)
+    names = attributes if attributes is not None else _configured_attribute_names(config)
+    suggested = dict(config)
+    suggested["attributes"] = discovery.suggest_attachments(names, config.get("measures", []))
+    return suggested
+
+
 __all__ = [
     "load_data_cube_config",
     "load_sdmx_policy",  # Backward compatibility alias
     "classify_item_role",
     "build_dsd_for_domain",
+    "build_dsds",
     "validate_dsd_completeness",
     "is_clean_whereclause",
     "derive_groupkey_from_whereclause",
+    "derive_groupkeys",
     "analyze_attribute_variance",
+    "analyze_attribute_variances",
     "infer_attribute_relationships",
+    "suggest_attribute_config",
 ]
 
@@ -0,0 +1,186 @@
+"""
+Vectorised SeriesKey / GroupKey encoding of data cube observations.
+
+A SeriesKey's ``keyValues`` joins one value per dimension with dots
+(``SUBJ001.WEEK 2.HGB``). Building, grouping on and joining such strings per
+observation is costly for millions of rows. SeriesKeyCodec instead gives every
+row a single int64: the mixed-radix number whose digits are the categorical
+codes of the row's dimension values (digit 0 is a missing value), with the
+first dimension most significant, so integer order is dimension-wise order.
+
+Strings are only built on demand, and then once per distinct key:
+key_values() for ``keyValues`` strings and series_keys() for SeriesKey models.
+project() re-encodes keys onto a subset of the dimensions (a GroupKey's
+dimensions) with integer arithmetic alone.
+
+Usage:
+    codec = SeriesKeyCodec.from_frame(cube, ["subject", "visit", "test"])
+    keys = codec.encode(cube)                      # one int64 per observation
+    cube.groupby(keys)["result"].mean()
+    codec.key_values(np.unique(keys))              # ['001.SCREENING.Glucose', ...]
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..schema.define import SeriesKey
+
+_MAX_KEY = np.iinfo(np.int64).max
+
+
+class SeriesKeyCodec:
+    """
+    Mixed-radix integer codec for the dimension values of observations.
+
+    Args:
+        dimensions: Dimension columns, in key (DSD) order
+        categories: Known values per dimension; a value's code is its position
+
+    Raises:
+        OverflowError: If the key space does not fit in int64
+    """
+
+    def __init__(self, dimensions: Sequence[str], categories: Mapping[str, Sequence[Any]]):
+        self.dimensions = list(dimensions)
+        self.categories: Dict[str, pd.Index] = {d: pd.Index(categories[d]) for d in self.dimensions}
+        radices = [len(self.categories[d]) + 1 for d in self.dimensions]  # digit 0 = missing
+
+        size = 1
+        strides = []
+        for radix in reversed(radices):
+            strides.append(size)
+            size *= radix
+        if size - 1 > _MAX_KEY:
+            raise OverflowError(f"Key space of {size} series does not fit in a 64-bit integer")
+        self.size = size
+        self.radices = np.array(radices, dtype=np.int64)
+        self.strides = np.array(strides[::-1], dtype=np.int64)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, dimensions: Sequence[str]) -> "SeriesKeyCodec":
+        """Codec over the values present in ``frame`` (a categorical column's categories, else its sorted values)."""
+        categories = {}
+        for dim in dimensions:
+            values = frame[dim]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                categories[dim] = values.cat.categories
+            else:
+                categories[dim] = pd.Index(pd.unique(values.dropna())).sort_values()
+        return cls(dimensions, categories)
+
+    # ------------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------------
+
+    def _codes(self, values: pd.Series, dim: str) -> np.ndarray:
+        categories = self.categories[dim]
+        if isinstance(values.dtype, pd.CategoricalDtype) and values.cat.categories.equals(categories):
+            return values.cat.codes.to_numpy().astype(np.int64)
+        codes = categories.get_indexer(values)
+        unknown = (codes < 0) & values.notna().to_numpy()
+        if unknown.any():
+            sample = ", ".join(map(str, pd.unique(values[unknown])[:5]))
+            raise ValueError(f"Values of '{dim}' not known to the codec: {sample}")
+        return codes.astype(np.int64)
+
+    def encode(self, frame: pd.DataFrame) -> np.ndarray:
+        """Series key (int64) of every row of ``frame``."""
+        keys = np.zeros(len(frame), dtype=np.int64)
+        for dim, stride in zip(self.dimensions, self.strides):
+            keys += (self._codes(frame[dim], dim) + 1) * stride
+        return keys
+
+    def encode_key_values(self, key_values: Sequence[str]) -> np.ndarray:
+        """
+        Series keys of dot-joined ``keyValues`` strings (empty parts are missing values).
+
+        Raises:
+            ValueError: If a string does not have one part per dimension (values
+                containing dots cannot be parsed) or names an unknown value
+        """
+        strings = pd.Series(key_values, dtype=object)
+        uniques, inverse = np.unique(strings.to_numpy(dtype=str), return_inverse=True)
+        parts = pd.Series(uniques).str.split(".", expand=True)
+        if parts.shape[1] != len(self.dimensions) or parts.isna().any().any():
+            raise ValueError(f"keyValues must have {len(self.dimensions)} dot-separated parts")
+        frame = pd.DataFrame({
+            dim: parts[i].where(parts[i] != "", None).map(self._parser(dim), na_action="ignore")
+            for i, dim in enumerate(self.dimensions)
+        })
+        return self.encode(frame)[inverse]
+
+    def _parser(self, dim: str):
+        """Map a keyValues part back to the category it was printed from."""
+        labels = {str(c): c for c in self.categories[dim]}
+        return lambda text: labels.get(text, text)
+
+    # ------------------------------------------------------------------
+    # Decoding
+    # ------------------------------------------------------------------
+
+    def digits(self, keys: np.ndarray) -> np.ndarray:
+        """Per-dimension codes of ``keys`` as an (n, dimensions) array; -1 is missing."""
+        keys = np.asarray(keys, dtype=np.int64)
+        return (keys[:, None] // self.strides) % self.radices - 1
+
+    def decode(self, keys: np.ndarray) -> pd.DataFrame:
+        """Dimension values of ``keys`` as categorical columns."""
+        digits = self.digits(keys)
+        return pd.DataFrame({
+            dim: pd.Categorical.from_codes(digits[:, i], categories=self.categories[dim])
+            for i, dim in enumerate(self.dimensions)
+        })
+
+    def key_values(self, keys: np.ndarray, missing: str = "") -> np.ndarray:
+        """Dot-joined ``keyValues`` string per key, built once per distinct key."""
+        uniques, inverse = np.unique(np.asarray(keys, dtype=np.int64), return_inverse=True)
+        digits = self.digits(uniques)
+        columns = []
+        for i, dim in enumerate(self.dimensions):
+            labels = np.array([str(c) for c in self.categories[dim]] + [missing], dtype=object)
+            columns.append(labels[digits[:, i]])  # code -1 selects the trailing missing label
+        joined = np.array([".".join(parts) for parts in zip(*columns)], dtype=object)
+        return joined[inverse]
+
+    def series_keys(self, keys: np.ndarray, described_by: Optional[str] = None) -> List[SeriesKey]:
+        """One SeriesKey per distinct key, in key order."""
+        uniques = np.unique(np.asarray(keys, dtype=np.int64))
+        return [
+            SeriesKey.model_construct(keyValues=key_values, describedBy=described_by)
+            for key_values in self.key_values(uniques)
+        ]
+
+    # ------------------------------------------------------------------
+    # Group keys
+    # ------------------------------------------------------------------
+
+    def project(self, keys: np.ndarray, dimensions: Sequence[str]) -> Tuple["SeriesKeyCodec", np.ndarray]:
+        """
+        Re-encode keys onto a subset of the dimensions (e.g. those of a GroupKey).
+
+        Returns:
+            (codec over ``dimensions``, key per input key)
+        """
+        positions = [self.dimensions.index(d) for d in dimensions]
+        codec = SeriesKeyCodec(dimensions, {d: self.categories[d] for d in dimensions})
+        digits = self.digits(keys)[:, positions] + 1
+        return codec, digits @ codec.strides
+
+    def in_group(self, keys: np.ndarray, values: Mapping[str, Any]) -> np.ndarray:
+        """Mask of keys whose dimension values equal every entry of ``values``."""
+        keys = np.asarray(keys, dtype=np.int64)
+        mask = np.ones(len(keys), dtype=bool)
+        for dim, value in values.items():
+            i = self.dimensions.index(dim)
+            position = self.categories[dim].get_indexer([value])[0]
+            if position < 0:
+                return np.zeros(len(keys), dtype=bool)
+            mask &= (keys // self.strides[i]) % self.radices[i] == position + 1
+        return mask
+
+
+__all__ = [
+    "SeriesKeyCodec",
+]
@@ -4,6 +4,7 @@ Comprehensive tests for Define-XML ↔ Define-JSON conversion and roundtrip vali
 Tests both conversion directions and validates semantic equivalence.
 """
 
+import os
 import unittest
 import tempfile
 import json
@@ -20,6 +21,13 @@ try:
 except ImportError:
     CONVERTERS_AVAILABLE = False
 
+try:
+    from define_json.converters.html_generator import (
+        DefineHTMLGenerator, LXML_AVAILABLE, compiled_xslt, clear_xslt_cache
+    )
+except ImportError:
+    LXML_AVAILABLE = False
+
 
 class TestDefineConversion(unittest.TestCase):
     """Test Define-XML ↔ Define-JSON conversion functionality."""
@@ -332,5 +340,184 @@ class TestDefineConversion(unittest.TestCase):
         self.assertEqual(len(wc_with_conditions), len(where_clauses), "All WhereClauses should have conditions")
 
 
+class TestHTMLGeneration(unittest.TestCase):
+    """Test XSL-based HTML generation and batch conversion."""
+    
+    def setUp(self):
+        if not LXML_AVAILABLE:
+            self.skipTest("lxml not available")
+        self.generator = DefineHTMLGenerator()
+        if not self.generator.default_xsl_path:
+            self.skipTest("Bundled XSL stylesheet not found")
+        self.temp_dir = Path(tempfile.mkdtemp())
+    
+    def test_compiled_xslt_is_cached_per_mtime(self):
+        """The stylesheet is compiled once and recompiled only when it changes."""
+        xsl_copy = self.temp_dir / 'define2-1.xsl'
+        xsl_copy.write_bytes(self.generator.default_xsl_path.read_bytes())
+        clear_xslt_cache()
+        
+        first = compiled_xslt(xsl_copy)
+        self.assertIs(compiled_xslt(str(xsl_copy)), first)
+        
+        stat = xsl_copy.stat()
+        os.utime(xsl_copy, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertIsNot(compiled_xslt(xsl_copy), first)
+    
+    def test_json_to_html_in_memory(self):
+        """json_to_html needs no intermediate XML file unless one is asked for."""
+        json_path = Path('data/defineV21-SDTM.json')
+        if not json_path.exists():
+            self.skipTest(f"Test JSON file not found: {json_path}")
+        
+        in_memory = self.generator.json_to_html(json_path, self.temp_dir / 'memory.html')
+        self.assertTrue(in_memory['success'], in_memory['errors'])
+        self.assertNotIn('xml_path', in_memory)
+        self.assertFalse((self.temp_dir / 'memory.xml').exists())
+        
+        kept = self.generator.json_to_html(json_path, self.temp_dir / 'kept.html', keep_temp_xml=True)
+        self.assertTrue(kept['success'], kept['errors'])
+        self.assertEqual(kept['xml_path'], self.temp_dir / 'kept.xml')
+        
+        # Same HTML either way, and the kept XML is what convert_file writes
+        self.assertEqual(
+            (self.temp_dir / 'memory.html').read_bytes(),
+            (self.temp_dir / 'kept.html').read_bytes()
+        )
+        DefineJSONToXMLConverter().convert_file(json_path, self.temp_dir / 'direct.xml')
+        self.assertEqual(
+            (self.temp_dir / 'kept.xml').read_bytes(),
+            (self.temp_dir / 'direct.xml').read_bytes()
+        )
+    
+    def test_native_html(self):
+        """The native renderer covers every section, with one anchor per OID and no dangling links."""
+        from urllib.parse import unquote
+        from lxml import html
+        
+        json_path = Path('data/defineV21-ADaM.json')
+        if not json_path.exists():
+            self.skipTest(f"Test JSON file not found: {json_path}")
+        output_path = self.temp_dir / 'native.html'
+        result = self.generator.json_to_native_html(json_path, output_path)
+        self.assertTrue(result['success'], result['errors'])
+        
+        page = html.parse(str(output_path))
+        ids = page.xpath('//@id')
+        self.assertEqual(len(ids), len(set(ids)))
+        for section in ('study', 'datasets', 'codelists', 'methods', 'comments', 'analysis-results'):
+            self.assertIn(section, ids)
+        # Datasets, variables, value lists, codelists, methods, comments and ARM by OID
+        for oid in ('IG.ADSL', 'IT.ADSL.AGE', 'VL.ADQSADAS.AVAL', 'CL.AGEGR1',
+                    'MT.ADQSADAS.AVISIT', 'COM.ADSL', 'RD.Table_14-3.01', 'AR.Table_14-3.01.R.2'):
+            self.assertIn(oid, ids)
+        targets = [unquote(href[1:]) for href in page.xpath('//a/@href') if href.startswith('#')]
+        self.assertTrue(targets)
+        self.assertEqual([t for t in targets if t not in set(ids)], [])
+        
+        # Value-level rows show their where clause
+        where = page.xpath('//*[@id="VL.ADQSADAS.AVAL"]//tr[2]/td[1]')[0].text_content()
+        self.assertIn('PARAMCD IN (ACITM01', where)
+    
+    def test_split_html(self):
+        """Split output writes an index plus parts, and only rewrites parts whose content changed."""
+        import re
+        from define_json.converters.html_renderer import DefineHTMLRenderer
+        
+        json_path = Path('data/defineV21-ADaM.json')
+        if not json_path.exists():
+            self.skipTest(f"Test JSON file not found: {json_path}")
+        output_path = self.temp_dir / 'split' / 'define.html'
+        
+        first = self.generator.json_to_native_html(json_path, output_path, split=True)
+        self.assertTrue(first['success'], first['errors'])
+        parts_dir = first['parts_dir']
+        self.assertEqual(parts_dir, output_path.parent / 'define_parts')
+        self.assertEqual(first['written'], first['parts'])
+        self.assertEqual(len(list(parts_dir.glob('*.js'))), first['parts'] + 1)  # parts and search index
+        
+        # Every link target is either in the index or mapped to a part file
+        index = output_path.read_text(encoding='utf-8')
+        manifest = json.loads(re.search(
+            r'<script type="application/json" id="define-parts">(.*?)</script>', index
+        ).group(1))
+        for key in ('IG.ADSL', 'IT.ADSL.AGE', 'CL.AGEGR1', 'MT.ADQSADAS.AVISIT', 'RD.Table_14-3.01'):
+            self.assertIn(key, manifest['anchors'])
+        self.assertNotIn('id="IT.ADSL.AGE"', index)
+        for part_file in manifest['parts'].values():
+            self.assertTrue((output_path.parent / part_file).exists())
+        
+        # Regeneration leaves unchanged parts alone
+        second = self.generator.json_to_native_html(json_path, output_path, split=True)
+        self.assertEqual((second['written'], second['unchanged']), (0, first['parts']))
+        
+        # Changing one codelist rewrites only its part and drops the stale file
+        with open(json_path) as f:
+            doc = json.load(f)
+        doc['codeLists'][0]['codeListItems'][0]['codedValue'] = 'CHANGED'
+        third = DefineHTMLRenderer(doc).render_split(output_path)
+        self.assertEqual((third['written'], third['unchanged']), (1, first['parts'] - 1))
+        self.assertEqual(len(list(parts_dir.glob('*.js'))), first['parts'] + 1)
+    
+    def test_search_index(self):
+        """The search index finds variables, terms and methods, and links to anchors on the page."""
+        json_path = Path('data/defineV21-ADaM.json')
+        if not json_path.exists():
+            self.skipTest(f"Test JSON file not found: {json_path}")
+        output_path = self.temp_dir / 'define.html'
+        
+        result = self.generator.json_to_native_html(json_path, output_path)
+        self.assertTrue(result['success'], result['errors'])
+        self.assertEqual(result['search_path'], self.temp_dir / 'define.search.js')
+        script = result['search_path'].read_text(encoding='utf-8')
+        self.assertTrue(script.startswith('defineSearch.loaded({'))
+        html = output_path.read_text(encoding='utf-8')
+        self.assertIn('data-index="define.search.js"', html)
+        
+        from define_json.converters.html_renderer import DefineHTMLRenderer
+        index = DefineHTMLRenderer.from_file(json_path).search_index()
+        self.assertIn(('IT.ADSL.AGE', 'ADSL.AGE — Age'), index.search('adsl age'))
+        self.assertIn(('CL.AGEGR1N', '1 = <65 (Age Group (N))'), index.search('<65'))
+        # Terms live in per-codelist tables, not as documents with their own titles
+        self.assertEqual(len(index), len(index.docs) + sum(len(cl[2]) for cl in index.code_lists))
+        self.assertNotIn('1 = <65 (Age Group (N))', script)
+        self.assertIn('MT.ADQSADAS.AVISIT', [anchor for anchor, _ in index.search('avis')])
+        for anchor in index.anchors:
+            self.assertIn(f' id="{anchor}"', html)
+        
+        self.generator.json_to_native_html(json_path, self.temp_dir / 'plain.html', search=False)
+        self.assertFalse((self.temp_dir / 'plain.search.js').exists())
+        self.assertNotIn('define-search', (self.temp_dir / 'plain.html').read_text(encoding='utf-8'))
+    
+    def test_batch_convert(self):
+        """batch_convert converts every file, in-process and on a pool, with timings."""
+        input_dir = self.temp_dir / 'in'
+        input_dir.mkdir()
+        for name in ('defineV21-SDTM.json', 'defineV21-ADaM.json'):
+            source = Path('data') / name
+            if not source.exists():
+                self.skipTest(f"Test JSON file not found: {source}")
+            (input_dir / name).write_bytes(source.read_bytes())
+        (input_dir / 'broken.json').write_text('{not json')
+        
+        for workers in (1, 2):
+            output_dir = self.temp_dir / f'out{workers}'
+            results = self.generator.batch_convert(input_dir, output_dir, max_workers=workers)
+            
+            self.assertEqual(results['total'], 3)
+            self.assertEqual(results['successful'], 2)
+            self.assertEqual(results['failed'], 1)
+            self.assertEqual(results['workers'], 0 if workers == 1 else workers)
+            self.assertGreater(results['elapsed'], 0)
+            for file_result in results['files']:
+                self.assertGreaterEqual(file_result['seconds'], 0)
+                if file_result['input'].name == 'broken.json':
+                    self.assertEqual(file_result['status'], 'failed')
+                    self.assertTrue(file_result['errors'])
+                else:
+                    self.assertEqual(file_result['status'], 'success')
+                    self.assertIn('<html', file_result['output'].read_text(encoding='utf-8').lower())
+
+
 if __name__ == '__main__':
     unittest.main()
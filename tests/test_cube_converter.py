@@ -176,3 +176,43 @@ class TestCubeConfigConverter:
         assert len(vs_comps) > 0
         assert vs_dsd is not None
 
+
+
+class TestConfigLoader:
+    """Test the shared, cached YAML loader"""
+
+    def test_cached_copies_and_invalidation(self, tmp_path):
+        """Each load returns a fresh copy; editing the file invalidates the cache"""
+        import os
+        from define_json.utils.config_loader import load_yaml
+
+        path = tmp_path / 'cube.yaml'
+        path.write_text("domain: LB\ndimensions: [USUBJID]\n")
+        first = load_yaml(path)
+        first['domain'] = 'changed'
+        assert load_yaml(path) == {'domain': 'LB', 'dimensions': ['USUBJID']}
+
+        path.write_text("domain: VS\ndimensions: [USUBJID, VSTESTCD]\n")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert load_yaml(path)['domain'] == 'VS'
+
+    def test_validator_and_disk_cache(self, tmp_path):
+        """Rejected configs raise on every load; accepted ones are reused from disk"""
+        from define_json.utils.config_loader import load_yaml, clear_config_cache
+        from define_json.utils.sdmx import load_data_cube_config
+
+        bad = tmp_path / 'bad.yaml'
+        bad.write_text("dimensions: [USUBJID]\n")
+        for _ in range(2):
+            with pytest.raises(ValueError, match="domain"):
+                load_data_cube_config(bad)
+
+        cache_dir = tmp_path / 'cache'
+        good = tmp_path / 'good.yaml'
+        good.write_text("domain: LB\n")
+        assert load_yaml(good, cache_dir=cache_dir) == {'domain': 'LB'}
+        assert len(list(cache_dir.iterdir())) == 1
+
+        clear_config_cache()
+        assert load_yaml(good, cache_dir=cache_dir) == {'domain': 'LB'}
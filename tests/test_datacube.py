@@ -9,6 +9,7 @@ import numpy as np
 from pathlib import Path
 import sys
 import tempfile
+import json
 import matplotlib.pyplot as plt
 import seaborn as sns
 from io import StringIO
@@ -21,10 +22,14 @@ logger = logging.getLogger(__name__)
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 try:
-    from define_json.utils.datacube_engine import DataCubeEngine, load_example_config, get_available_examples
+    from define_json.utils.datacube_engine import (
+        DataCubeEngine, load_example_config, get_available_examples, read_domain_chunks, PYARROW_AVAILABLE
+    )
+    from define_json.utils.cube_rollups import CubeRollups
     DATACUBE_AVAILABLE = True
 except ImportError:
     DATACUBE_AVAILABLE = False
+    PYARROW_AVAILABLE = False
     logger.warning("DataCube engine not available. Tests will be skipped.")
 
 class TestDataCubeEngine(unittest.TestCase):
@@ -139,7 +144,210 @@ class TestDataCubeEngine(unittest.TestCase):
         self.assertGreaterEqual(quality_report['validity'], 0.9, "Data validity below 90%")
         
         print("✅ Clinical data quality assessment complete")
-    
+
+    @unittest.skipUnless(DATACUBE_AVAILABLE, "DataCube engine not available")
+    def test_build_datacube_joins_demographics(self):
+        """Test the DM join: first DM record wins, unmatched subjects are dropped."""
+        engine = load_example_config('laboratory')
+        engine.sdtm_data = {
+            'sdtm_dm': pd.DataFrame([
+                {'USUBJID': '001', 'AGE': 45, 'SEX': 'M', 'RACE': 'WHITE', 'ARM': 'A'},
+                {'USUBJID': '001', 'AGE': 99, 'SEX': 'F', 'RACE': 'ASIAN', 'ARM': 'B'},
+                {'USUBJID': '002', 'AGE': 32, 'SEX': 'F', 'RACE': 'ASIAN', 'ARM': 'B'},
+            ]),
+            'sdtm_lb': pd.DataFrame([
+                {'USUBJID': '002', 'LBTESTCD': 'HGB', 'LBORRES': 12.1, 'VISIT': 'WEEK 1'},
+                {'USUBJID': '003', 'LBTESTCD': 'HGB', 'LBORRES': 13.0, 'VISIT': 'WEEK 1'},
+                {'USUBJID': '001', 'LBTESTCD': 'GLUC', 'LBORRES': 95, 'VISIT': 'WEEK 1'},
+            ]),
+        }
+
+        datacube_df = engine.build_datacube()
+
+        self.assertEqual(list(datacube_df['subject']), ['002', '001'])
+        self.assertEqual(list(datacube_df['age']), [32, 45])
+        # Mapped test codes take the configured item name; others keep their code
+        self.assertEqual(list(datacube_df['test']), ['Hemoglobin', 'GLUC'])
+        self.assertTrue(datacube_df['unit'].isna().all())
+
+    @unittest.skipUnless(DATACUBE_AVAILABLE, "DataCube engine not available")
+    def test_datacube_columnar_storage(self):
+        """Test that dimensions and attributes are categorical and results numeric."""
+        engine = load_example_config('laboratory')
+        lb_df = engine.sdtm_data['sdtm_lb']
+        lb_df['LBORRES'] = ['<5'] + list(lb_df['LBORRES'].iloc[1:])
+        datacube_df = engine.build_datacube()
+
+        for column in ('subject', 'sex', 'race', 'visit', 'test', 'unit', 'arm', 'date'):
+            self.assertIsInstance(datacube_df[column].dtype, pd.CategoricalDtype, column)
+        self.assertTrue(pd.api.types.is_float_dtype(datacube_df['result']))
+        self.assertTrue(pd.isna(datacube_df['result'].iloc[0]))
+        self.assertEqual(datacube_df['result'].iloc[1], 88)
+
+    @unittest.skipUnless(DATACUBE_AVAILABLE, "DataCube engine not available")
+    def test_rollups_match_direct_aggregation(self):
+        """Test rollup aggregates against pandas, including appends to a subset of partitions."""
+        rng = np.random.default_rng(0)
+        n = 20000
+        cube = pd.DataFrame({
+            'subject': pd.Categorical(rng.choice([f'S{i:03d}' for i in range(200)], n)),
+            'test': pd.Categorical(rng.choice(['HGB', 'WBC', 'PLAT'], n)),
+            'visit': pd.Categorical(rng.choice(['WEEK 1', 'WEEK 2'], n)),
+            'arm': pd.Categorical(rng.choice(['A', 'B'], n)),
+            'sex': pd.Categorical(rng.choice(['F', 'M'], n)),
+            'result': np.where(rng.random(n) < 0.05, np.nan, rng.normal(50, 10, n)),
+        })
+        half = cube.iloc[:n // 2]
+        appended = cube.iloc[n // 2:]
+        appended = appended[appended['subject'].isin(['S001', 'S002'])]
+        everything = pd.concat([half, appended], ignore_index=True)
+
+        rollups = CubeRollups(half, n_partitions=8)
+        refreshed = rollups.append(appended)
+        self.assertLessEqual(len(refreshed), 2)
+
+        expected = everything.groupby(['test', 'visit'], observed=True)['result'].agg(['size', 'count', 'mean', 'std', 'min', 'max'])
+        stats = rollups.stats(('visit', 'test')).reorder_levels(['test', 'visit']).sort_index()
+        np.testing.assert_array_equal(stats['rows'], expected['size'])
+        np.testing.assert_array_equal(stats['count'], expected['count'])
+        np.testing.assert_allclose(stats[['mean', 'std', 'min', 'max']], expected[['mean', 'std', 'min', 'max']])
+
+        medians = rollups.quantiles(('test',), [0.5])['50%']
+        exact = everything.groupby('test', observed=True)['result'].median()
+        np.testing.assert_allclose(medians, exact, rtol=0.02)
+
+    @unittest.skipUnless(DATACUBE_AVAILABLE, "DataCube engine not available")
+    def test_analysis_summary_served_from_rollups(self):
+        """Test the cached summary and its refresh when data is appended."""
+        engine = load_example_config('laboratory')
+        datacube_df = engine.build_datacube()
+        summary = engine.get_analysis_summary()
+
+        self.assertIs(engine.get_analysis_summary(), summary)
+        self.assertEqual(summary['tests'], datacube_df['test'].value_counts().to_dict())
+        self.assertEqual(summary['numeric_summary']['mean'], datacube_df['result'].mean())
+
+        engine.append_data(engine.sdtm_data['sdtm_lb'])
+        self.assertEqual(engine.get_analysis_summary()['total_observations'], 2 * len(datacube_df))
+        self.assertEqual(engine.get_analysis_summary()['tests'], {'Glucose': 6})
+        self.assertIsInstance(engine.datacube_df['test'].dtype, pd.CategoricalDtype)
+
+    @unittest.skipUnless(DATACUBE_AVAILABLE, "DataCube engine not available")
+    def test_analysis_summary_with_custom_rollups(self):
+        """Test the summary when the materialised rollups do not cover its dimensions."""
+        engine = load_example_config('vital_signs')
+        engine.build_datacube()
+        expected = engine.get_analysis_summary()
+
+        engine.materialize_rollups([('test', 'visit')])
+        summary = engine.get_analysis_summary()
+        self.assertEqual(summary, expected)
+
+        engine.build_datacube_parallel(workers=2, shards=2, rollups=[('test', 'visit')])
+        summary = engine.get_analysis_summary()
+        self.assertEqual(summary['unique_subjects'], expected['unique_subjects'])
+        self.assertEqual(summary['sex_distribution'], expected['sex_distribution'])
+        self.assertEqual(summary['arm_distribution'], expected['arm_distribution'])
+        self.assertAlmostEqual(summary['numeric_summary']['mean'], expected['numeric_summary']['mean'])
+
+    @unittest.skipUnless(DATACUBE_AVAILABLE, "DataCube engine not available")
+    def test_parallel_build_matches_serial_build(self):
+        """Test the sharded multi-process build against build_datacube."""
+        engine = load_example_config('vital_signs')
+        expected = engine.build_datacube()
+        expected_summary = engine.get_analysis_summary()
+
+        datacube_df = engine.build_datacube_parallel(workers=2, shards=3)
+
+        pd.testing.assert_frame_equal(datacube_df, expected)
+        summary = engine.get_analysis_summary()
+        self.assertEqual(summary['tests'], expected_summary['tests'])
+        for key, value in expected_summary['numeric_summary'].items():
+            self.assertAlmostEqual(summary['numeric_summary'][key], value)
+
+    @unittest.skipUnless(DATACUBE_AVAILABLE, "DataCube engine not available")
+    def test_series_keys(self):
+        """Test integer series keys of cube observations."""
+        engine = load_example_config('vital_signs')
+        datacube_df = engine.build_datacube()
+        codec, keys = engine.encode_series_keys()
+
+        self.assertEqual(len(keys), len(datacube_df))
+        expected = (datacube_df['subject'].astype(str) + '.' + datacube_df['visit'].astype(str)
+                    + '.' + datacube_df['test'].astype(str))
+        self.assertEqual(list(codec.key_values(keys)), list(expected))
+
+    @unittest.skipUnless(DATACUBE_AVAILABLE and PYARROW_AVAILABLE, "pyarrow not available")
+    def test_datacube_arrow_export(self):
+        """Test Arrow export keeps categorical columns dictionary-encoded."""
+        import pyarrow as pa
+        engine = load_example_config('laboratory')
+        engine.build_datacube()
+        table = engine.to_arrow()
+        self.assertEqual(table.num_rows, len(engine.datacube_df))
+        self.assertTrue(pa.types.is_dictionary(table.schema.field('test').type))
+
+    @unittest.skipUnless(DATACUBE_AVAILABLE, "DataCube engine not available")
+    def test_chunked_build_matches_in_memory_build(self):
+        """Test that partitioned builds from CSV and Dataset-JSON NDJSON match build_datacube."""
+        engine = load_example_config('laboratory')
+        expected = engine.build_datacube()
+        lb_df = engine.sdtm_data['sdtm_lb']
+
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = Path(tmp) / 'lb.csv'
+            lb_df.to_csv(csv_path, index=False)
+            ndjson_path = Path(tmp) / 'lb.ndjson'
+            with open(ndjson_path, 'w') as f:
+                f.write(json.dumps({'columns': [{'name': c} for c in lb_df.columns]}) + '\n')
+                for row in lb_df.itertuples(index=False):
+                    f.write(json.dumps(list(row)) + '\n')
+
+            for path in (csv_path, ndjson_path):
+                partitions = list(engine.iter_datacube_chunks(str(path), chunksize=2))
+                self.assertEqual(len(partitions), (len(lb_df) + 1) // 2)
+                combined = pd.concat(partitions, ignore_index=True).astype(expected.dtypes.to_dict())
+                pd.testing.assert_frame_equal(combined, expected)
+
+    @unittest.skipUnless(DATACUBE_AVAILABLE, "DataCube engine not available")
+    def test_read_dataset_json_in_chunks(self):
+        """Test partitioned reading of a Dataset-JSON file."""
+        sizes = [len(chunk) for chunk in read_domain_chunks('examples/sample_dataset_lb.json', chunksize=5, domain='LB')]
+        self.assertEqual(sizes, [5, 5, 2])
+        with self.assertRaisesRegex(ValueError, "Dataset VS not found"):
+            next(read_domain_chunks('examples/sample_dataset_lb.json', chunksize=5, domain='VS'))
+
+    @unittest.skipUnless(DATACUBE_AVAILABLE, "DataCube engine not available")
+    def test_missing_subjects_stay_missing(self):
+        """Test that subject identifiers are read as text without turning gaps into 'nan'."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'lb.ndjson'
+            with open(path, 'w') as f:
+                f.write(json.dumps({'columns': [{'name': 'USUBJID'}, {'name': 'LBORRES'}]}) + '\n')
+                f.write(json.dumps(['STUDY-1001', '5.1']) + '\n')
+                f.write(json.dumps([None, '4.8']) + '\n')
+            chunk = next(read_domain_chunks(path))
+
+        self.assertEqual(chunk['USUBJID'].iloc[0], 'STUDY-1001')
+        self.assertTrue(pd.isna(chunk['USUBJID'].iloc[1]))
+
+    @unittest.skipUnless(DATACUBE_AVAILABLE and PYARROW_AVAILABLE, "pyarrow not available")
+    def test_chunked_build_writes_parquet(self):
+        """Test the out-of-core build appends every partition to one Parquet file."""
+        engine = load_example_config('laboratory')
+        expected = engine.build_datacube()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = Path(tmp) / 'lb.csv'
+            engine.sdtm_data['sdtm_lb'].to_csv(csv_path, index=False)
+            output = Path(tmp) / 'cube.parquet'
+            result = engine.build_datacube_chunked(str(csv_path), str(output), chunksize=2)
+            written = pd.read_parquet(output)
+
+        self.assertEqual(result['rows'], len(expected))
+        self.assertEqual(list(written['subject']), list(expected['subject']))
+        self.assertEqual(list(written['result']), list(expected['result'].astype(float)))
+
     def _print_clinical_summary(self, domain_name: str, df: pd.DataFrame):
         """Print clinical summary of the datacube."""
         print(f"\n📋 {domain_name} Clinical Summary:")
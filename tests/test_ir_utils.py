@@ -5,6 +5,7 @@ These tests define what "canonical" means through TDD with golden fixtures.
 """
 
 import json
+import struct
 import pytest
 from pathlib import Path
 from typing import Dict, Any
@@ -17,11 +18,23 @@ from define_json.utils.ir import (
     enforce_slice_invariants,
     register_variables,
     project_valuelist_for_domain,
+    get_ir_index,
+    invalidate_ir_index,
     serialize_canonical,
+    write_canonical,
+    canonical_digest,
     export_define_xml_21,
     export_define_xml_10,
     transform_value_lists_to_specialisation,
+    build_condition_registry,
 )
+from define_json.utils.ir_store import CanonicalStore
+from define_json.utils.ir_diff import build_merkle_tree, diff_merkle, diff_mdv
+from define_json.utils.ir_session import IRSession
+from define_json.utils.ir_snapshot import save_snapshot, load_snapshot, StaleSnapshotError
+from define_json.utils.mdv_index import MDVIndex
+from define_json.utils.references import ReferenceIndex, prune_unreferenced
+from define_json.schema.define import Condition, Item, ItemGroup, RangeCheck, WhereClause
 
 try:
     from define_json.converters.xml_to_json import DefineXMLToJSONConverter
@@ -129,6 +142,290 @@ class TestWhereClauseRegistry:
                     assert wc_oid in registry, f"Item {it.name} references non-canonical WhereClause {wc_oid}"
 
 
+class TestCanonicalStore:
+    """Content-addressed store must return the same canonical OIDs across MDVs."""
+
+    def test_store_matches_registry_without_store(self):
+        """Registries built with a store must produce the same canonical OIDs."""
+        plain = load_mdv(FIXTURES_DIR / "unnormalised_where.json")
+        stored = load_mdv(FIXTURES_DIR / "unnormalised_where.json")
+        
+        expected = build_where_registry(plain)
+        with CanonicalStore() as store:
+            actual = build_where_registry(stored, store=store)
+        
+        assert sorted(actual) == sorted(expected)
+        assert [c.OID for c in stored.conditions] == [c.OID for c in plain.conditions]
+
+    def test_store_interns_across_mdvs(self):
+        """Interning the same define twice must hit the store and add nothing."""
+        store = CanonicalStore()
+        mdv1 = load_mdv(FIXTURES_DIR / "minimal_ir.json")
+        build_condition_registry(mdv1, store=store)
+        build_where_registry(mdv1, store=store)
+        size = len(store)
+        misses = store.misses
+        
+        mdv2 = load_mdv(FIXTURES_DIR / "minimal_ir.json")
+        build_condition_registry(mdv2, store=store)
+        build_where_registry(mdv2, store=store)
+        
+        assert len(store) == size, "Identical payloads must be stored once"
+        assert store.misses == misses, "Second define must be served from the store"
+        assert [wc.OID for wc in mdv2.whereClauses] == [wc.OID for wc in mdv1.whereClauses]
+        store.close()
+
+    def test_store_disambiguates_colliding_oids(self):
+        """Payloads deriving the same readable OID must get distinct OIDs and keep their own content."""
+        def payload(comparator):
+            return {"rangeChecks": [{"item": "IT.VS.VSTESTCD", "comparator": comparator, "values": ["TEMP"]}]}
+        
+        with CanonicalStore() as store:
+            eq_oid = store.intern_condition_payload(payload("EQ"))
+            ne_oid = store.intern_condition_payload(payload("NE"))
+            
+            assert eq_oid == "COND.VS.TEMP"
+            assert ne_oid.startswith("COND.VS.TEMP.") and ne_oid != eq_oid
+            assert store.intern_condition_payload(payload("NE")) == ne_oid
+            assert store.condition(eq_oid).rangeChecks[0].comparator == "EQ"
+            assert store.condition(ne_oid).rangeChecks[0].comparator == "NE"
+    
+    def test_store_persists_to_disk(self, tmp_path):
+        """A file-backed store must resolve previously interned payloads after reopening."""
+        db = tmp_path / "canonical.sqlite"
+        mdv = load_mdv(FIXTURES_DIR / "minimal_ir.json")
+        with CanonicalStore(db) as store:
+            registry = build_where_registry(mdv, store=store)
+        
+        with CanonicalStore(db) as store:
+            for wc_oid, wc in registry.items():
+                assert wc_oid in store
+                for cond_oid in wc.conditions:
+                    restored = store.condition(cond_oid)
+                    assert restored is not None
+                    assert restored.rangeChecks, "Stored Condition must keep its RangeChecks"
+
+
+class TestMerkleDiff:
+    """Merkle diff must report exactly the changed subtrees."""
+
+    def test_identical_documents_have_no_changes(self):
+        mdv1 = load_mdv(FIXTURES_DIR / "valuelist_test.json")
+        mdv2 = load_mdv(FIXTURES_DIR / "valuelist_test.json")
+        
+        tree1 = build_merkle_tree(mdv1)
+        tree2 = build_merkle_tree(mdv2)
+        
+        assert tree1.digest == tree2.digest
+        assert not diff_merkle(tree1, tree2)
+
+    def test_root_hash_ignores_canonical_ordering(self):
+        """Reordering lists that the canonical form sorts must not change the root hash."""
+        mdv1 = load_mdv(FIXTURES_DIR / "valuelist_test.json")
+        mdv2 = load_mdv(FIXTURES_DIR / "valuelist_test.json")
+        mdv2.itemGroups[0].items.reverse()
+        
+        assert build_merkle_tree(mdv1).digest == build_merkle_tree(mdv2).digest
+
+    def test_reports_modified_removed_and_added(self):
+        old = load_mdv(FIXTURES_DIR / "valuelist_test.json")
+        new = load_mdv(FIXTURES_DIR / "valuelist_test.json")
+        ig = new.itemGroups[0]
+        changed = ig.items[0]
+        changed.name = "RENAMED"
+        removed = ig.items.pop(1)
+        
+        changes = diff_mdv(old, new)
+        
+        assert len(changes.modified) == 1
+        assert changes.modified[0].fields == ["name"]
+        assert changes.modified[0].path.endswith(f"items[{changed.OID}]")
+        assert len(changes.removed) == 1
+        assert changes.removed[0].path.endswith(f"items[{removed.OID}]")
+        
+        reverse = diff_mdv(new, old)
+        assert len(reverse.added) == 1
+        assert reverse.added[0].path.endswith(f"items[{removed.OID}]")
+
+    def test_kinds_do_not_depend_on_input_type(self):
+        mdv = load_mdv(FIXTURES_DIR / "valuelist_test.json")
+        
+        def kinds(node, out):
+            out[node.path] = node.kind
+            for child in node.children.values():
+                kinds(child, out)
+            return out
+        
+        from_model = kinds(build_merkle_tree(mdv), {})
+        from_dict = kinds(build_merkle_tree(mdv.model_dump(mode="json", exclude_none=True)), {})
+        shared = from_model.keys() & from_dict.keys()
+        
+        assert any("/itemGroups[" in path for path in shared)
+        assert {path: from_model[path] for path in shared} == {path: from_dict[path] for path in shared}
+        assert "ItemGroup" in from_dict.values() and "RangeCheck" in from_dict.values()
+
+    def test_inserting_keyless_child_does_not_modify_siblings(self):
+        old = load_mdv(FIXTURES_DIR / "valuelist_test.json")
+        new = load_mdv(FIXTURES_DIR / "valuelist_test.json")
+        cond = new.conditions[0]
+        cond.rangeChecks.insert(0, RangeCheck(comparator="NE", checkValues=["X"], item="IT.VS.VSTESTCD"))
+        
+        changes = diff_mdv(old, new)
+        
+        assert not changes.modified and not changes.removed
+        assert [c.kind for c in changes.added] == ["RangeCheck"]
+
+
+class TestIRSession:
+    """Incremental session edits must keep registries equal to a full rebuild."""
+
+    def _session(self):
+        mdv = load_mdv(FIXTURES_DIR / "minimal_ir.json")
+        return mdv, IRSession(mdv)
+
+    def _add_severe_clause(self, session):
+        session.add_condition(Condition(
+            OID="COND.NEW",
+            rangeChecks=[RangeCheck(comparator="EQ", checkValues=["SEVERE"], item="IT.AE.AESEV")],
+        ))
+        return session.add_where_clause(WhereClause(OID="WC.NEW", conditions=["COND.NEW"]))
+
+    def test_session_matches_batch_pipeline(self):
+        mdv, session = self._session()
+        
+        assert session.variables == register_variables(mdv)
+        enforce_slice_invariants(mdv)
+
+    def test_add_item_creates_slice_and_context(self):
+        mdv, session = self._session()
+        wid = self._add_severe_clause(session)
+        
+        item = Item(OID="IT.AE.AEX", name="AEX", dataType="text", applicableWhen=["WC.NEW"])
+        session.add_item(item, domain="AE")
+        
+        assert item.applicableWhen == [wid], "Aliased WhereClause OID must be canonicalised"
+        assert session.slice_for("AE", wid).items == [item]
+        assert session.variables == register_variables(mdv)
+        enforce_slice_invariants(mdv)
+
+    def test_update_where_clause_moves_references(self):
+        mdv, session = self._session()
+        wid = self._add_severe_clause(session)
+        item = Item(OID="IT.AE.AEX", name="AEX", dataType="text", applicableWhen=[wid])
+        session.add_item(item, domain="AE")
+        
+        session.add_condition(Condition(
+            OID="COND.MILD",
+            rangeChecks=[RangeCheck(comparator="EQ", checkValues=["MILD"], item="IT.AE.AESEV")],
+        ))
+        new_wid = session.update_where_clause(wid, WhereClause(OID=wid, conditions=["COND.MILD"]))
+        
+        assert new_wid != wid
+        assert item.applicableWhen == [new_wid]
+        assert session.slice_for("AE", wid) is session.slice_for("AE", new_wid)
+        assert wid not in {wc.OID for wc in mdv.whereClauses}
+        assert session.variables == register_variables(mdv)
+
+    def _add_clause(self, session, value):
+        session.add_condition(Condition(
+            OID=f"COND.{value}",
+            rangeChecks=[RangeCheck(comparator="EQ", checkValues=[value], item="IT.AE.AESEV")],
+        ))
+        return WhereClause(OID=f"WC.{value}", conditions=[f"COND.{value}"])
+
+    def test_readded_where_clause_is_not_redirected(self):
+        mdv, session = self._session()
+        severe = session.add_where_clause(self._add_clause(session, "SEVERE"))
+        mild = session.update_where_clause(severe, self._add_clause(session, "MILD"))
+        
+        again = session.add_where_clause(self._add_clause(session, "SEVERE"))
+        assert again == severe
+        item = Item(OID="IT.AE.AEX", name="AEX", dataType="text", applicableWhen=[again])
+        session.add_item(item, domain="AE")
+        
+        assert item.applicableWhen == [severe]
+        assert session.slice_for("AE", severe).items == [item]
+        assert session.slice_for("AE", mild) is None
+        assert session.variables == register_variables(mdv)
+
+    def test_reverse_update_does_not_create_alias_cycle(self):
+        mdv, session = self._session()
+        severe = session.add_where_clause(self._add_clause(session, "SEVERE"))
+        item = Item(OID="IT.AE.AEX", name="AEX", dataType="text", applicableWhen=[severe])
+        session.add_item(item, domain="AE")
+        
+        mild = session.update_where_clause(severe, self._add_clause(session, "MILD"))
+        back = session.update_where_clause(mild, self._add_clause(session, "SEVERE"))
+        
+        assert back == severe
+        assert session.canonical_oid(severe) == severe
+        assert session.canonical_oid(mild) == severe
+        assert item.applicableWhen == [severe]
+        assert session.slice_for("AE", severe).items == [item]
+        assert session.variables == register_variables(mdv)
+
+    def test_remove_item_and_referenced_where_clause(self):
+        mdv, session = self._session()
+        wid = mdv.whereClauses[0].OID
+        
+        with pytest.raises(ValueError):
+            session.remove_where_clause(wid)
+        
+        session.remove_item("IT.AE.AESEV")
+        assert session.slice_for("AE", wid) is None, "Empty slice must be dropped"
+        assert session.variables == register_variables(mdv)
+        
+        session.remove_where_clause(wid, cascade=True)
+        assert not mdv.whereClauses
+
+    def test_item_positions_and_slice_lookup_follow_edits(self):
+        mdv, session = self._session()
+        wid = self._add_severe_clause(session)
+        ig = session._parent_group(None, "AE")
+        first = Item(OID="IT.AE.AEX", name="AEX", dataType="text")
+        second = Item(OID="IT.AE.AEY", name="AEY", dataType="text", applicableWhen=[wid])
+        session.add_item(first, domain="AE")
+        session.add_item(second, domain="AE")
+        
+        session.remove_item("IT.AE.AEX")
+        assert ig.items[-1] is second and first not in ig.items
+        replacement = Item(OID="IT.AE.AEY", name="AEY", dataType="integer", applicableWhen=[wid])
+        session.update_item(replacement)
+        assert ig.items[-1] is replacement and first not in ig.items
+        
+        session.add_condition(Condition(
+            OID="COND.MILD",
+            rangeChecks=[RangeCheck(comparator="EQ", checkValues=["MILD"], item="IT.AE.AESEV")],
+        ))
+        new_wid = session.update_where_clause(wid, WhereClause(OID=wid, conditions=["COND.MILD"]))
+        slice_ig = session.slice_for("AE", new_wid)
+        assert session.remove_slice(slice_ig.OID) is slice_ig
+        assert session.slice_for("AE", new_wid) is None
+        with pytest.raises(ValueError):
+            session.remove_slice(slice_ig.OID)
+
+    def test_removals_keep_document_order(self):
+        mdv, session = self._session()
+        wid = self._add_severe_clause(session)
+        ig = session._parent_group(None, "AE")
+        added = [
+            session.add_item(Item(OID=f"IT.AE.X{i}", name=f"X{i}", dataType="text", applicableWhen=[wid]), domain="AE")
+            for i in range(8)
+        ]
+        slice_ig = session.slice_for("AE", wid)
+        for i in (3, 0, 7, 4):
+            session.remove_item(f"IT.AE.X{i}")
+        kept = [added[i] for i in (1, 2, 5, 6)]
+        assert [it for it in ig.items if it.OID.startswith("IT.AE.X")] == kept
+        assert [it.OID for it in slice_ig.items] == [it.OID for it in kept]
+
+        # Lists edited outside the session are re-indexed on the next removal
+        ig.items.insert(0, Item(OID="IT.AE.OUTSIDE", name="OUTSIDE", dataType="text"))
+        session.remove_item("IT.AE.X5")
+        assert [it.OID for it in ig.items if it.OID.startswith("IT.AE.X")] == ["IT.AE.X1", "IT.AE.X2", "IT.AE.X6"]
+        assert ig.items[0].OID == "IT.AE.OUTSIDE"
+
+
 class TestCanonicalSlices:
     """Slice building must create one ItemGroup per (domain, whereId)."""
 
@@ -201,6 +498,21 @@ class TestCanonicalSlices:
                 assert it.applicableWhen[0] == slice_wc_oid, "Item context must match slice context"
 
 
+    def test_rebuilding_slices_does_not_duplicate_items(self):
+        """Slice membership is tracked by OID, so rebuilding must be idempotent."""
+        mdv = load_mdv(FIXTURES_DIR / "minimal_ir.json")
+        
+        build_where_registry(mdv)
+        build_canonical_slices(mdv)
+        before = {ig.OID: [it.OID for it in ig.items] for ig in mdv.itemGroups if ig.type == "DatasetSpecialization"}
+        
+        build_canonical_slices(mdv)
+        after = {ig.OID: [it.OID for it in ig.items] for ig in mdv.itemGroups if ig.type == "DatasetSpecialization"}
+        
+        assert after == before
+        enforce_slice_invariants(mdv)
+
+
 class TestSliceInvariants:
     """Slice invariant checks must fail fast on malformed structures."""
 
@@ -330,6 +642,57 @@ class TestValueListProjection:
                 assert where_oids == sorted(where_oids), f"{var} entries not ordered by whereId"
 
 
+class TestIRIndex:
+    """IRIndex must be built once per MDV and dropped when the IR is restructured."""
+
+    def test_index_maps_domain_to_parents_slices_and_variables(self):
+        mdv = load_mdv(FIXTURES_DIR / "minimal_ir.json")
+        build_where_registry(mdv)
+        build_canonical_slices(mdv)
+        
+        index = get_ir_index(mdv)
+        
+        assert index.domains == ["AE"]
+        assert all(ig.type != "DatasetSpecialization" for ig in index.parents["AE"])
+        assert index.slices["AE"], "AE slices must be indexed"
+        assert all(ig.type == "DatasetSpecialization" for ig in index.slices["AE"])
+        assert set(index.variables["AE"]) == {
+            it.name for ig in index.parents["AE"] for it in (ig.items or [])
+        }
+
+    def test_index_is_cached_and_invalidated(self):
+        mdv = load_mdv(FIXTURES_DIR / "minimal_ir.json")
+        build_where_registry(mdv)
+        
+        first = get_ir_index(mdv)
+        assert get_ir_index(mdv) is first, "Index must be reused while the IR is unchanged"
+        
+        build_canonical_slices(mdv)
+        second = get_ir_index(mdv)
+        assert second is not first, "Slice building must invalidate the index"
+        
+        invalidate_ir_index(mdv)
+        assert get_ir_index(mdv) is not second
+
+    def test_projection_sees_in_place_edits(self):
+        mdv = load_mdv(FIXTURES_DIR / "minimal_ir.json")
+        build_where_registry(mdv)
+        build_canonical_slices(mdv)
+        assert "AENEW" not in project_valuelist_for_domain(mdv, "AE")
+        
+        parent = next(ig for ig in mdv.itemGroups if ig.type != "DatasetSpecialization")
+        parent.items.append(Item(OID="IT.AE.AENEW", name="AENEW", dataType="text"))
+        assert "AENEW" in project_valuelist_for_domain(mdv, "AE")
+        
+        position = mdv.itemGroups.index(parent)
+        mdv.itemGroups[position] = ItemGroup(
+            OID="IG.CM", name="CM", domain="CM",
+            items=[Item(OID="IT.CM.CMTRT", name="CMTRT", dataType="text")],
+        )
+        assert "CMTRT" in project_valuelist_for_domain(mdv, "CM")
+        assert "AENEW" not in project_valuelist_for_domain(mdv, "AE")
+
+
 class TestDeterministicSerialisation:
     """Serialisation must produce identical output for identical input."""
 
@@ -358,6 +721,221 @@ class TestDeterministicSerialisation:
         
         assert output1 == output2, "Processing same file twice must produce identical output"
 
+    def test_serialize_does_not_mutate_input(self):
+        """serialize_canonical must leave the caller's lists in their original order."""
+        mdv = load_mdv(FIXTURES_DIR / "valuelist_test.json")
+        before_groups = [ig.OID for ig in mdv.itemGroups]
+        before_items = [[it.OID for it in (ig.items or [])] for ig in mdv.itemGroups]
+        
+        serialize_canonical(mdv)
+        
+        assert [ig.OID for ig in mdv.itemGroups] == before_groups
+        assert [[it.OID for it in (ig.items or [])] for ig in mdv.itemGroups] == before_items
+
+    def test_streamed_output_matches_digest(self, tmp_path):
+        """write_canonical must stream the canonical bytes and return their SHA-256."""
+        import hashlib
+        mdv = load_mdv(FIXTURES_DIR / "minimal_ir.json")
+        out = tmp_path / "canonical.json"
+        
+        with open(out, "wb") as fh:
+            digest = write_canonical(mdv, fh, buffer_size=64)
+        
+        data = out.read_bytes()
+        assert data == serialize_canonical(mdv)
+        assert digest == hashlib.sha256(data).hexdigest()
+        assert canonical_digest(mdv) == digest
+        json.loads(data)
+
+
+class TestSnapshot:
+    """Binary snapshots must round-trip the canonical IR."""
+
+    def _canonical_mdv(self):
+        mdv = load_mdv(FIXTURES_DIR / "valuelist_test.json")
+        build_condition_registry(mdv)
+        build_where_registry(mdv)
+        build_canonical_slices(mdv)
+        return mdv
+
+    def test_snapshot_roundtrip(self, tmp_path):
+        mdv = self._canonical_mdv()
+        path = tmp_path / "mdv.djir"
+        
+        save_snapshot(mdv, path)
+        restored = load_snapshot(path)
+        
+        assert serialize_canonical(restored) == serialize_canonical(mdv)
+        assert restored.model_dump(exclude_unset=True) == mdv.model_dump(exclude_unset=True)
+
+    def test_validated_load_matches_fast_load(self, tmp_path):
+        mdv = self._canonical_mdv()
+        path = tmp_path / "mdv.djir"
+        save_snapshot(mdv, path)
+        
+        assert load_snapshot(path, validate=True) == load_snapshot(path, validate=False)
+
+    def test_load_mdv_accepts_snapshots(self, tmp_path):
+        mdv = self._canonical_mdv()
+        path = tmp_path / "mdv.djir"
+        save_snapshot(mdv, path)
+        
+        assert serialize_canonical(load_mdv(path)) == serialize_canonical(mdv)
+
+    def test_other_python_version_is_not_loaded(self, tmp_path):
+        path = tmp_path / "mdv.djir"
+        mdv = self._canonical_mdv()
+        save_snapshot(mdv, path)
+        with open(path, "r+b") as fh:
+            fh.seek(10)
+            fh.write(struct.pack("<H", 2 << 8 | 7))  # flags: written by Python 2.7
+        stale = path.read_bytes()
+        
+        with pytest.raises(StaleSnapshotError):
+            load_snapshot(path)
+        assert path.read_bytes() == stale, "A stale snapshot must be left for the caller to rebuild"
+        
+        save_snapshot(mdv, path)
+        assert serialize_canonical(load_snapshot(path)) == serialize_canonical(mdv)
+    
+    def test_rejects_non_snapshot(self):
+        with pytest.raises(ValueError):
+            load_snapshot(FIXTURES_DIR / "minimal_ir.json")
+
+
+class TestMDVIndex:
+    """MDVIndex must answer lookups for dict and model documents alike."""
+
+    DOC = {
+        "OID": "MDV.TEST",
+        "itemGroups": [
+            {
+                "OID": "IG.VS",
+                "name": "VS",
+                "domain": "VS",
+                "items": [
+                    {"OID": "IT.VS.VSTESTCD", "name": "VSTESTCD", "dataType": "text", "codeList": "CL.VSTESTCD"},
+                    {"OID": "IT.VS.VSORRES", "name": "VSORRES", "dataType": "text"},
+                ],
+                "slices": [
+                    {
+                        "OID": "VL.VS.VSORRES",
+                        "name": "VL.VS.VSORRES",
+                        "items": [{"OID": "IT.VS.VSORRES.TEMP", "name": "VSORRES", "dataType": "float"}],
+                    }
+                ],
+            }
+        ],
+        "codeLists": [{"OID": "CL.VSTESTCD", "name": "Vital Signs Test Code", "dataType": "text"}],
+        "conditions": [
+            {"OID": "COND.TEMP", "rangeChecks": [
+                {"item": "IT.VS.VSTESTCD", "comparator": "EQ", "checkValues": ["TEMP"]}
+            ]}
+        ],
+        "whereClauses": [{"OID": "WC.VS.TEMP", "conditions": ["COND.TEMP"]}],
+        "_xmlMetadata": {"commentSupplemental": {"COM.VS": {"OID": "COM.VS", "text": "Vitals"}}},
+    }
+
+    def test_dict_lookups(self):
+        index = MDVIndex(self.DOC)
+        
+        assert index.item("IT.VS.VSORRES.TEMP")["dataType"] == "float"
+        assert index.item_by_name("VS", "VSORRES")["OID"] == "IT.VS.VSORRES"
+        assert [it["OID"] for it in index.items_named("VS", "VSORRES")] == ["IT.VS.VSORRES", "IT.VS.VSORRES.TEMP"]
+        assert index.parent_item_group("IT.VS.VSORRES.TEMP")["OID"] == "VL.VS.VSORRES"
+        assert index.domains == ["VS"]
+        assert index.code_list("CL.VSTESTCD")["name"] == "Vital Signs Test Code"
+        assert index.comment("COM.VS")["text"] == "Vitals"
+        assert index.where_clauses_for("IT.VS.VSTESTCD") == ["WC.VS.TEMP"]
+        assert index.where_clauses_for("IT.VS.VSTESTCD", "TEMP") == ["WC.VS.TEMP"]
+        assert index.where_clauses_for("IT.VS.VSTESTCD", "HR") == []
+
+    def test_model_lookups_match_dict_lookups(self):
+        from_model = MDVIndex(load_mdv(FIXTURES_DIR / "valuelist_test.json"))
+        from_dict = MDVIndex.from_file(FIXTURES_DIR / "valuelist_test.json")
+        
+        assert from_model.stats() == from_dict.stats()
+        assert set(from_model.items) == set(from_dict.items)
+        assert set(from_model.where_clauses) == set(from_dict.where_clauses)
+
+    def test_query_cli(self, tmp_path, capsys):
+        from define_json.utils.cli import main
+        path = tmp_path / "define.json"
+        path.write_text(json.dumps(self.DOC))
+        
+        assert main(["query", str(path), "where", "IT.VS.VSTESTCD", "TEMP"]) == 0
+        assert json.loads(capsys.readouterr().out) == ["WC.VS.TEMP"]
+        assert main(["query", str(path), "item", "IT.MISSING"]) == 1
+
+
+class TestReferenceIndex:
+    """Reverse references and pruning of unreferenced objects."""
+
+    def _doc(self):
+        doc = json.loads(json.dumps(TestMDVIndex.DOC))
+        doc["items"] = [{"OID": "IT.VS.VSSTRESN", "name": "VSSTRESN", "method": "MT.USED"}]
+        doc["methods"] = [{"OID": "MT.USED", "name": "Used"}, {"OID": "MT.UNUSED", "name": "Unused"}]
+        doc["codeLists"].append({"OID": "CL.ORPHAN", "name": "Orphan"})
+        doc["conditions"].append({"OID": "COND.ORPHAN", "rangeChecks": [
+            {"item": "IT.VS.VSTESTCD", "comparator": "EQ", "checkValues": ["HR"]}
+        ]})
+        doc["whereClauses"].append({"OID": "WC.VS.ORPHAN", "conditions": ["COND.ORPHAN"]})
+        doc["itemGroups"][0]["items"][1]["applicableWhen"] = ["WC.VS.TEMP"]
+        doc["_xmlMetadata"]["commentSupplemental"]["COM.ORPHAN"] = {"OID": "COM.ORPHAN", "text": "Only on orphan WC"}
+        doc["_xmlMetadata"]["conditionSupplemental"] = {"WC.VS.ORPHAN": {"commentOID": "COM.ORPHAN"}}
+        doc["_xmlMetadata"]["itemGroupSupplemental"] = {"IG.VS": {"commentOID": "COM.VS"}}
+        return doc
+
+    def test_referrers(self):
+        index = ReferenceIndex(self._doc())
+        
+        assert index.referrers("CL.VSTESTCD") == ["IT.VS.VSTESTCD"]
+        assert index.referrers("MT.USED", field="method") == ["IT.VS.VSSTRESN"]
+        assert index.referrers("COND.TEMP") == ["WC.VS.TEMP"]
+        assert index.referrers("COM.VS") == ["IG.VS"]
+        assert index.referrers("COM.ORPHAN") == ["WC.VS.ORPHAN"]
+        assert set(index.referrers("IT.VS.VSTESTCD")) == {"COND.TEMP", "COND.ORPHAN"}
+        assert index.references_from("WC.VS.ORPHAN") == {"COND.ORPHAN", "COM.ORPHAN"}
+        assert sorted(index.unreferenced()) == ["CL.ORPHAN", "MT.UNUSED", "WC.VS.ORPHAN"]
+
+    def test_prune_cascades(self):
+        doc = self._doc()
+        
+        removed = prune_unreferenced(doc)
+        
+        assert removed == {
+            "codeList": ["CL.ORPHAN"],
+            "method": ["MT.UNUSED"],
+            "whereClause": ["WC.VS.ORPHAN"],
+            "condition": ["COND.ORPHAN"],
+            "comment": ["COM.ORPHAN"],
+        }
+        assert [wc["OID"] for wc in doc["whereClauses"]] == ["WC.VS.TEMP"]
+        assert [c["OID"] for c in doc["conditions"]] == ["COND.TEMP"]
+        assert "COM.ORPHAN" not in doc["_xmlMetadata"]["commentSupplemental"]
+        assert "WC.VS.ORPHAN" not in doc["_xmlMetadata"]["conditionSupplemental"]
+        assert prune_unreferenced(doc) == {}
+
+    def test_prune_respects_kinds_and_keep(self):
+        doc = self._doc()
+        
+        removed = prune_unreferenced(doc, kinds=["whereClause", "condition"], keep=["COND.ORPHAN"])
+        
+        assert removed == {"whereClause": ["WC.VS.ORPHAN"]}
+        assert {c["OID"] for c in doc["conditions"]} == {"COND.TEMP", "COND.ORPHAN"}
+        assert {cl["OID"] for cl in doc["codeLists"]} == {"CL.VSTESTCD", "CL.ORPHAN"}
+
+    def test_prune_model(self):
+        mdv = load_mdv(FIXTURES_DIR / "valuelist_test.json")
+        mdv.whereClauses = list(mdv.whereClauses or []) + [
+            WhereClause(OID="WC.UNUSED", conditions=[mdv.whereClauses[0].conditions[0]])
+        ]
+        
+        removed = prune_unreferenced(mdv, kinds=["whereClause"])
+        
+        assert removed == {"whereClause": ["WC.UNUSED"]}
+        assert "WC.UNUSED" not in {wc.OID for wc in mdv.whereClauses}
+
 
 class TestXMLExporters:
     """XML exporters must produce valid, parseable output."""
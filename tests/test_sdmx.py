@@ -15,12 +15,15 @@ from define_json.utils.ir import load_mdv
 from define_json.utils.sdmx import (
     load_sdmx_policy,
     build_dsd_for_domain,
+    build_dsds,
     validate_dsd_completeness,
     classify_item_role,
     derive_groupkey_from_whereclause,
+    derive_groupkeys,
     is_clean_whereclause,
     infer_attribute_relationships,
     analyze_attribute_variance,
+    analyze_attribute_variances,
 )
 from define_json.schema.define import (
     MetaDataVersion,
@@ -140,6 +143,38 @@ class TestDSDBuilder:
         assert is_complete, f"DSD should classify all variables, missing: {missing}"
         assert len(missing) == 0
 
+    def test_build_dsds_matches_single_domain_builds(self):
+        """Building many domains with one shared index gives the same components."""
+        policy = load_sdmx_policy(FIXTURES_DIR / "lb_sdmx_policy.yaml")
+        single_mdv = load_mdv(FIXTURES_DIR / "lb_sdmx.json")
+        bulk_mdv = load_mdv(FIXTURES_DIR / "lb_sdmx.json")
+        
+        single = build_dsd_for_domain(single_mdv, "LB", policy)
+        bulk = build_dsds(bulk_mdv, {"LB": policy})
+        
+        assert list(bulk) == ["LB"]
+        assert [(c.OID, c.item) for c in bulk["LB"].items] == [(c.OID, c.item) for c in single.items]
+        assert [it.OID for it in bulk_mdv.items] == [it.OID for it in single_mdv.items]
+
+    def test_build_dsds_adds_components_once(self):
+        """Rebuilding with the same configuration must not duplicate top-level components."""
+        mdv = load_mdv(FIXTURES_DIR / "lb_sdmx.json")
+        policy = load_sdmx_policy(FIXTURES_DIR / "lb_sdmx_policy.yaml")
+        
+        build_dsds(mdv, [policy])
+        count = len(mdv.items)
+        build_dsds(mdv, [policy])
+        
+        assert len(mdv.items) == count
+        assert len({it.OID for it in mdv.items}) == count
+
+    def test_build_dsds_rejects_unknown_domain(self):
+        mdv = load_mdv(FIXTURES_DIR / "lb_sdmx.json")
+        policy = dict(load_sdmx_policy(FIXTURES_DIR / "lb_sdmx_policy.yaml"), domain="XX")
+        
+        with pytest.raises(ValueError, match="Domain 'XX' not found"):
+            build_dsds(mdv, [policy])
+
 
 class TestItemRoleClassification:
     """Test policy-driven classification of Items into roles."""
@@ -264,6 +299,24 @@ class TestWhereClauseToGroupKey:
         # Should reference the dimensions that are constrained (LBTEST, VISITNUM)
         # Note: describedBy can be list of Dimension OIDs or ComponentList OID
 
+    def test_derive_groupkeys_in_bulk(self):
+        """Bulk derivation should match per-WhereClause derivation and explain rejections."""
+        mdv = load_mdv(FIXTURES_DIR / "lb_with_whereclause.json")
+        policy = load_sdmx_policy(FIXTURES_DIR / "lb_wc_policy.yaml")
+        
+        dsd = build_dsd_for_domain(mdv, "LB", policy)
+        
+        groupkeys, rejected = derive_groupkeys(None, dsd, mdv)
+        
+        assert list(groupkeys) == ["WC.LB.GLUCOSE.BASELINE"]
+        single = derive_groupkey_from_whereclause(mdv.whereClauses[0], dsd, mdv)
+        assert groupkeys["WC.LB.GLUCOSE.BASELINE"].keyValues == single.keyValues
+        assert groupkeys["WC.LB.GLUCOSE.BASELINE"].describedBy == dsd.OID
+        assert rejected == {
+            "WC.LB.COMPLEX": "non_eq_comparator",
+            "WC.LB.NESTED": "multiple_conditions",
+        }
+
 
 class TestAttributeRelationshipInference:
     """Test attribute relationship inference (Phase 3)."""
@@ -377,3 +430,139 @@ class TestAttributeRelationshipInference:
         studyid_attr = next((a for a in dsd.items if isinstance(a, DataAttribute) and a.name == "STUDYID"), None)
         assert studyid_attr is not None, "Should have STUDYID attribute in DSD"
         assert studyid_attr.role == "Dataset", "Role should be updated to Dataset"
+
+    def test_bulk_variance_matches_per_attribute_analysis(self):
+        """analyze_attribute_variances must report exactly what the per-attribute analysis does."""
+        mdv = load_mdv(FIXTURES_DIR / "lb_with_slices.json")
+        policy = load_sdmx_policy(FIXTURES_DIR / "lb_wc_policy.yaml")
+        
+        dsd = build_dsd_for_domain(mdv, "LB", policy)
+        slices = [ig for ig in mdv.itemGroups if ig.type and 
+                  (ig.type == "DatasetSpecialization" or 
+                   (hasattr(ig.type, 'value') and ig.type.value == "DatasetSpecialization"))]
+        
+        slice_data = {
+            "WC.GLUCOSE.BASELINE": {"STUDYID": "S1", "LBTEST": "Glucose", "VISITNUM": "1", "LBCAT": "CHEMISTRY", "LBNRIND": "NORMAL"},
+            "WC.GLUCOSE.WEEK4": {"STUDYID": "S1", "LBTEST": "Glucose", "VISITNUM": "2", "LBCAT": "CHEMISTRY", "LBNRIND": "HIGH"},
+            "WC.SODIUM.BASELINE": {"STUDYID": "S1", "LBTEST": "Sodium", "VISITNUM": "1", "LBCAT": "CHEMISTRY", "LBNRIND": "HIGH"},
+            "WC.PLATELET.BASELINE": {"STUDYID": "S1", "LBTEST": "Platelet", "LBCAT": "HEMATOLOGY", "LBNRIND": None},
+        }
+        names = ["STUDYID", "LBCAT", "LBNRIND", "MISSING"]
+        
+        bulk = analyze_attribute_variances(names, slices, slice_data, dsd, mdv)
+        
+        assert bulk == {name: analyze_attribute_variance(name, slices, slice_data, dsd, mdv) for name in names}
+        assert bulk["STUDYID"]["level"] == "dataset"
+        assert bulk["LBCAT"]["level"] == "dimension"
+        assert bulk["LBNRIND"]["level"] == "observation"
+        assert bulk["MISSING"]["level"] == "unknown"
+
+
+class TestDependencyDiscovery:
+    """Test functional-dependency discovery of attribute attachments from data."""
+
+    def _lb_frame(self):
+        pd = pytest.importorskip("pandas")
+        rows = []
+        tests = {"GLUC": ("CHEMISTRY", "mg/dL"), "SODIUM": ("CHEMISTRY", "mmol/L"), "PLAT": ("HEMATOLOGY", "10^9/L")}
+        for subj in ("S1-001", "S1-002", "S1-003"):
+            for test, (cat, unit) in tests.items():
+                for visitnum, visit in ((1, "Baseline"), (2, "Week 4")):
+                    missing = subj == "S1-003" and visitnum == 2
+                    rows.append({
+                        "STUDYID": "S1", "DOMAIN": "LB", "USUBJID": subj, "LBTEST": test,
+                        "VISITNUM": visitnum, "LBSEQ": 1, "LBCAT": cat, "VISIT": visit,
+                        "LBDTC": f"2024-0{visitnum}-0{len(subj) % 7}",
+                        "LBSTRESN": None if missing else float(len(test) * visitnum),
+                        "LBSTRESC": None if missing else str(len(test) * visitnum),
+                        "LBORRES": None if missing else str(len(test) * visitnum),
+                        "LBSTRESU": None if missing else unit,
+                        "LBORRESU": None if missing else unit,
+                    })
+        return pd.DataFrame(rows)
+
+    def test_minimal_determinants(self):
+        from define_json.utils.dependency_discovery import DependencyDiscovery
+        discovery = DependencyDiscovery(self._lb_frame(), ["USUBJID", "LBTEST", "VISITNUM", "LBSEQ"])
+        
+        assert discovery.minimal_determinants("STUDYID") == [()]
+        assert discovery.minimal_determinants("LBCAT") == [("LBTEST",)]
+        assert discovery.minimal_determinants("VISIT") == [("VISITNUM",)]
+        assert discovery.holds(["USUBJID", "LBTEST", "VISITNUM"], "LBSTRESN")
+        assert not discovery.holds(["LBTEST"], "LBSTRESN")
+        assert discovery.is_key(["USUBJID", "LBTEST", "VISITNUM"])
+
+    def test_sampled_search_matches_full_search(self):
+        from define_json.utils.dependency_discovery import DependencyDiscovery
+        frame = self._lb_frame()
+        dims = ["USUBJID", "LBTEST", "VISITNUM", "LBSEQ"]
+        
+        full = DependencyDiscovery(frame, dims).analyze(measures=["LBSTRESN"])
+        sampled = DependencyDiscovery(frame, dims, sample_size=5, random_state=3).analyze(measures=["LBSTRESN"])
+        
+        assert sampled == full
+
+    def test_suggest_attribute_config(self):
+        from define_json.utils.sdmx import suggest_attribute_config
+        policy = load_sdmx_policy(FIXTURES_DIR / "lb_sdmx_policy.yaml")
+        
+        suggested = suggest_attribute_config(self._lb_frame(), policy)
+        attributes = suggested["attributes"]
+        
+        assert attributes["dataset_level"] == ["STUDYID", "DOMAIN"]
+        assert {"variable": "LBCAT", "attached_to": ["LBTEST"]} in attributes["dimension_level"]
+        assert {"variable": "VISIT", "attached_to": ["VISITNUM"]} in attributes["dimension_level"]
+        assert {"variable": "LBSTRESU", "attached_to": ["LBSTRESN", "LBSTRESC", "LBORRES"]} in attributes["measure_level"]
+        assert suggested["dimensions"] == policy["dimensions"]
+        assert policy["attributes"]["measure_level"][0]["attached_to"] == ["LBSTRESN", "LBSTRESC"]
+
+
+class TestSeriesKeyCodec:
+    """Test mixed-radix integer SeriesKey encoding of observations."""
+
+    def _cube(self):
+        pd = pytest.importorskip("pandas")
+        return pd.DataFrame({
+            "subject": ["S2", "S1", "S1", "S2", "S1"],
+            "visit": ["WEEK 1", "WEEK 1", None, "WEEK 2", "WEEK 1"],
+            "test": ["HGB", "WBC", "HGB", "HGB", "WBC"],
+            "result": [1.0, 2.0, 3.0, 4.0, 5.0],
+        })
+
+    def test_roundtrip_and_ordering(self):
+        from define_json.utils.series_keys import SeriesKeyCodec
+        cube = self._cube()
+        codec = SeriesKeyCodec.from_frame(cube, ["subject", "visit", "test"])
+        keys = codec.encode(cube)
+
+        # Same dimension values share a key; key order is dimension-wise order
+        assert keys[1] == keys[4]
+        assert len(set(keys.tolist())) == 4
+        assert list(codec.key_values(keys)) == [
+            "S2.WEEK 1.HGB", "S1.WEEK 1.WBC", "S1..HGB", "S2.WEEK 2.HGB", "S1.WEEK 1.WBC"
+        ]
+        assert sorted(keys.tolist()) == [keys[i] for i in (2, 1, 4, 0, 3)]
+        assert list(codec.encode_key_values(codec.key_values(keys))) == list(keys)
+        assert codec.decode(keys)["visit"].isna().tolist() == [False, False, True, False, False]
+
+        series = codec.series_keys(keys, described_by="DSD.LB")
+        assert [s.keyValues for s in series] == ["S1..HGB", "S1.WEEK 1.WBC", "S2.WEEK 1.HGB", "S2.WEEK 2.HGB"]
+        assert all(s.describedBy == "DSD.LB" for s in series)
+
+    def test_group_projection(self):
+        from define_json.utils.series_keys import SeriesKeyCodec
+        cube = self._cube()
+        codec = SeriesKeyCodec.from_frame(cube, ["subject", "visit", "test"])
+        keys = codec.encode(cube)
+
+        group_codec, group_keys = codec.project(keys, ["subject", "test"])
+        assert list(group_keys) == list(group_codec.encode(cube))
+        assert list(codec.in_group(keys, {"test": "HGB", "visit": "WEEK 1"})) == [True, False, False, False, False]
+        assert not codec.in_group(keys, {"test": "GLUC"}).any()
+
+    def test_unknown_values_rejected(self):
+        from define_json.utils.series_keys import SeriesKeyCodec
+        cube = self._cube()
+        codec = SeriesKeyCodec.from_frame(cube.iloc[:2], ["subject", "test"])
+        with pytest.raises(ValueError, match="not known"):
+            codec.encode(cube.assign(test=["HGB", "WBC", "HGB", "HGB", "GLUC"]))